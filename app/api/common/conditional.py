@@ -0,0 +1,69 @@
+import hashlib
+import json
+from typing import Any, Optional, TypeVar, Union
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+
+from app.api.common.errors import PreconditionFailedError
+
+T = TypeVar("T")
+
+
+def _get_digest(content: Any) -> str:
+    body = json.dumps(
+        jsonable_encoder(content, by_alias=True),
+        sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def get_etag(content: Any) -> str:
+    # Versioned resources are tagged with their row version; anything else
+    # with a hash of its serialised representation
+    version = getattr(content, "version", None)
+    if isinstance(version, int):
+        # Fields written without bumping the version still change the
+        # representation, so they are part of the tag too
+        unversioned = [
+            getattr(content, name)
+            for name in getattr(content, "unversioned_fields", ())]
+        if unversioned:
+            return f'"{version}-{_get_digest(unversioned)}"'
+        return f'"{version}"'
+    return f'"{_get_digest(content)}"'
+
+
+def _etag_matches(
+    condition: str, etag: str, weak_comparison: bool = True
+) -> bool:
+    if condition.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in condition.split(",")]
+    # If-None-Match uses the weak comparison function, If-Match the strong one
+    if weak_comparison:
+        candidates = [candidate.removeprefix("W/") for candidate in candidates]
+    return etag in candidates
+
+
+def check_if_match(if_match: Optional[str], content: Any) -> None:
+    if if_match and not _etag_matches(
+            if_match, get_etag(content), weak_comparison=False):
+        raise PreconditionFailedError()
+
+
+def get_conditional_response(
+    request: Request,
+    response: Response,
+    content: T,
+    cache_control: Optional[str] = None
+) -> Union[T, Response]:
+    headers = {"ETag": get_etag(content)}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return content
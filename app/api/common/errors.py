@@ -1,3 +1,4 @@
+from decimal import Decimal
 from typing import Optional
 
 from fastapi import status
@@ -23,7 +24,7 @@ class InvalidCredentialsError(GenericException):
 
 
 class OperationAmountTooLargeError(GenericException):
-    def __init__(self, available_amount: float):
+    def __init__(self, available_amount: Decimal):
         super().__init__(
             status_code=400,
             message=f"Importo non disponibile. L'importo massimo disponibile è: {available_amount}")
@@ -48,3 +49,73 @@ class DuplicateKeyError(GenericException):
         super().__init__(
             status_code=400,
             message="Esiste già una risorsa con lo stesso identificativo.")
+
+
+class InvalidCursorError(GenericException):
+    def __init__(self):
+        super().__init__(
+            status_code=400,
+            message="Il cursore di paginazione non è valido.")
+
+
+class InvalidBatchError(GenericException):
+    def __init__(self):
+        super().__init__(
+            status_code=400,
+            message="Il corpo della richiesta deve essere un array JSON o un flusso NDJSON.")
+
+
+class PreconditionFailedError(GenericException):
+    def __init__(self):
+        super().__init__(
+            status_code=412,
+            message="La risorsa è stata modificata rispetto alla versione indicata.")
+
+
+class VersionConflictError(GenericException):
+    def __init__(self):
+        super().__init__(
+            status_code=409,
+            message="La risorsa è stata modificata da un'altra richiesta. Riprovare.")
+
+
+class InvalidDateRangeError(GenericException):
+    def __init__(self):
+        super().__init__(
+            status_code=400,
+            message="Intervallo di date non valido: la data di inizio deve precedere quella di fine.")
+
+
+class TooManyPeriodsError(GenericException):
+    def __init__(self, max_periods: int):
+        super().__init__(
+            status_code=400,
+            message=f"L'intervallo richiesto supera il numero massimo di {max_periods} periodi.")
+
+
+class IdempotencyKeyInUseError(GenericException):
+    def __init__(self):
+        super().__init__(
+            status_code=409,
+            message="Una richiesta con la stessa chiave di idempotenza è ancora in corso.")
+
+
+class IdempotencyKeyMismatchError(GenericException):
+    def __init__(self):
+        super().__init__(
+            status_code=422,
+            message="La chiave di idempotenza è già stata usata per una richiesta diversa.")
+
+
+class BatchChunkNotCommittedError(GenericException):
+    def __init__(self):
+        super().__init__(
+            status_code=503,
+            message="Errore del database: la transazione non è stata registrata e può essere inviata di nuovo.")
+
+
+class BankAccountInUseError(GenericException):
+    def __init__(self):
+        super().__init__(
+            status_code=409,
+            message="Il conto ha movimenti o rapporti collegati e non può essere eliminato.")
@@ -0,0 +1,51 @@
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from app.db.models import LedgerEntry, StatementRollup
+from app.db.models.money import Money
+
+
+class BalanceInterval(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class BankAccountBalance(BaseModel):
+    bank_account_id: uuid.UUID = Field(
+        ..., serialization_alias="bankAccountId")
+    at: datetime = Field(
+        ..., description="Point in time of the balance (UTC)")
+    balance: Money
+
+
+class BankAccountBalancePoint(BaseModel):
+    period_start: datetime = Field(
+        ..., serialization_alias="periodStart",
+        description="Start of the period (UTC)")
+    balance: Money = Field(
+        ..., description="Balance at the end of the period, or at the end of the range for the last one")
+
+
+class BankAccountBalances(BaseModel):
+    bank_account_id: uuid.UUID = Field(
+        ..., serialization_alias="bankAccountId")
+    from_: datetime = Field(
+        ..., serialization_alias="from")
+    to: datetime
+    interval: BalanceInterval
+    opening_balance: Money = Field(
+        ..., serialization_alias="openingBalance",
+        description="Balance at the start of the range")
+    balances: List[BankAccountBalancePoint]
+
+
+class BankAccountStatement(BaseModel):
+    statement: StatementRollup = Field(
+        ..., description="Monthly totals")
+    entries: List[LedgerEntry] = Field(
+        ..., description="Ledger entries of the month, oldest first")
@@ -0,0 +1,59 @@
+from enum import Enum
+from typing import Generic, Optional, TypeVar
+
+from fastapi import Query
+from fastapi_pagination import Page as BasePage, Params as BaseParams
+from fastapi_pagination.bases import RawParams
+from pydantic import ConfigDict, Field
+
+T = TypeVar("T")
+
+
+class PaginationMode(str, Enum):
+    OFFSET = "offset"
+    CURSOR = "cursor"
+
+
+class TotalMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    CAPPED = "capped"
+    NONE = "none"
+
+
+class Params(BaseParams):
+    model_config = ConfigDict(populate_by_name=True)
+
+    pagination_mode: PaginationMode = Query(
+        PaginationMode.OFFSET,
+        alias="paginationMode",
+        description="Offset pagination (page/size, with total) or keyset pagination (cursor/size, no total)")
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor taken from nextCursor/previousCursor (paginationMode=cursor only)")
+    total_mode: Optional[TotalMode] = Query(
+        None,
+        alias="totalMode",
+        description="How the total is computed: exact count, planner estimate, count capped at a threshold or no total (paginationMode=offset only)")
+
+    def to_raw_params(self) -> RawParams:
+        raw_params = super().to_raw_params()
+        raw_params.include_total = self.total_mode in (None, TotalMode.EXACT)
+        return raw_params
+
+
+class Page(BasePage[T], Generic[T]):
+    total_exact: Optional[bool] = Field(
+        None,
+        serialization_alias="totalExact",
+        description="Whether total is an exact count (false for estimated or capped totals)")
+    next_cursor: Optional[str] = Field(
+        None,
+        serialization_alias="nextCursor",
+        description="Cursor of the next page (paginationMode=cursor only)")
+    previous_cursor: Optional[str] = Field(
+        None,
+        serialization_alias="previousCursor",
+        description="Cursor of the previous page (paginationMode=cursor only)")
+
+    __params_type__ = Params
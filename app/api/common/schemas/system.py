@@ -0,0 +1,60 @@
+from typing import Dict
+
+from pydantic import BaseModel, Field
+
+
+class DatabasePoolCheckoutWait(BaseModel):
+    count: int = Field(
+        ..., description="Number of connection checkouts")
+    sum: float = Field(
+        ..., description="Total time spent waiting for a connection (seconds)")
+    buckets: Dict[str, int] = Field(
+        ..., description="Cumulative checkout wait histogram (upper bound in seconds -> count)")
+
+
+class DatabasePoolStatistics(BaseModel):
+    size: int = Field(
+        ..., description="Configured pool size")
+    max_overflow: int = Field(
+        ..., serialization_alias="maxOverflow",
+        description="Connections allowed beyond the pool size")
+    timeout: float = Field(
+        ..., description="Checkout timeout (seconds)")
+    checked_in: int = Field(
+        ..., serialization_alias="checkedIn",
+        description="Idle connections in the pool")
+    checked_out: int = Field(
+        ..., serialization_alias="checkedOut",
+        description="Connections currently in use")
+    overflow: int = Field(
+        ..., description="Open connections beyond the pool size")
+    checkout_wait: DatabasePoolCheckoutWait = Field(
+        ..., serialization_alias="checkoutWait")
+
+
+class CatalogCacheStatistics(BaseModel):
+    hits: int = Field(
+        ..., description="Reads served from the cache")
+    misses: int = Field(
+        ..., description="Reads that went to the database")
+    entries: int = Field(
+        ..., description="Lists and resources cached by this worker")
+
+
+class RouteQueryStatistics(BaseModel):
+    requests: int = Field(
+        ..., description="Requests served")
+    queries: int = Field(
+        ..., description="Database statements run")
+    queries_per_request: float = Field(
+        ..., serialization_alias="queriesPerRequest",
+        description="Mean database statements per request")
+    db_seconds: float = Field(
+        ..., serialization_alias="dbSeconds",
+        description="Total time spent running database statements (seconds)")
+    too_many_queries: int = Field(
+        ..., serialization_alias="tooManyQueries",
+        description="Requests over the statements threshold")
+    repeated_query: int = Field(
+        ..., serialization_alias="repeatedQuery",
+        description="Requests repeating a statement over the threshold (likely N+1)")
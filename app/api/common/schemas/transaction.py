@@ -0,0 +1,33 @@
+import uuid
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class TransactionsBatchItemStatus(str, Enum):
+    CREATED = "Created"
+    REJECTED = "Rejected"
+
+
+class TransactionsBatchItemResult(BaseModel):
+    index: int = Field(
+        ..., description="Position of the item in the submitted batch")
+    status: TransactionsBatchItemStatus
+    id: Optional[uuid.UUID] = Field(
+        None, description="Id of the created transaction")
+    message: Optional[str] = Field(
+        None, description="Reason why the item was rejected")
+
+
+class TransactionsBatchResponse(BaseModel):
+    created: int = Field(
+        ..., description="Number of created transactions")
+    rejected: int = Field(
+        ..., description="Number of rejected items")
+    results: List[TransactionsBatchItemResult]
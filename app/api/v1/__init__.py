@@ -5,7 +5,7 @@ from .endpoints import (
     insurance_policy_api,
     insurance_policy_product_api, investment_api,
     investment_product_api, loan_api,
-    loan_product_api, transaction_api,
+    loan_product_api, system_api, transaction_api,
     user_bank_account_api, user_profile_api)
 
 
@@ -20,6 +20,7 @@ api_router.include_router(investment_api.router)
 api_router.include_router(investment_product_api.router)
 api_router.include_router(loan_api.router)
 api_router.include_router(loan_product_api.router)
+api_router.include_router(system_api.router)
 api_router.include_router(transaction_api.router)
 api_router.include_router(user_bank_account_api.router)
 api_router.include_router(user_profile_api.router)
@@ -2,7 +2,7 @@ from fastapi import APIRouter
 
 from app.api.common.schemas.response import (
     MessageResponse)
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     CredentialsPost, RefreshCredentials, Token)
 from app.services import (
@@ -28,7 +28,7 @@ router = APIRouter()
 )
 async def login_post(
     login_post: CredentialsPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Token:
     return await auth_service.login_post(
         login_post, session)
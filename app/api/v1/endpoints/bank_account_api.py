@@ -1,16 +1,23 @@
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
-from fastapi_pagination import Page
+from fastapi import APIRouter, Depends, Header, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
+from app.api.common.conditional import get_conditional_response, get_etag
+from app.api.common.schemas.bank_account import (
+    BalanceInterval, BankAccountBalance, BankAccountBalances,
+    BankAccountStatement)
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse)
 from app.core.jwt import get_current_active_user
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     BankAccount, BankAccountPut, UserProfile)
 from app.services import (
-    bank_account as bank_account_service)
+    bank_account as bank_account_service,
+    statement as statement_service)
 
 router = APIRouter()
 
@@ -27,7 +34,7 @@ router = APIRouter()
     response_model_by_alias=True,
 )
 async def bank_accounts_get(
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> Page[BankAccount]:
     return await bank_account_service.bank_accounts_get(
@@ -44,19 +51,106 @@ async def bank_accounts_get(
             "model": MessageResponse,
             "description": "Resource not found response"
         },
+        409: {
+            "model": MessageResponse,
+            "description": "Bank account in use response"
+        },
     },
     tags=["Bank Account"],
     summary="Delete a bank account",
     response_model_by_alias=True,
 )
 async def bank_accounts_id_delete(
-    id: str, session: SessionDep,
+    id: str, session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> None:
     return await bank_account_service.bank_accounts_id_delete(
         id, session)
 
 
+@router.get(
+    "/bankAccounts/{id}/balance",
+    responses={
+        200: {
+            "model": BankAccountBalance,
+            "description": "Bank account balance at a point in time"
+        },
+        404: {
+            "model": MessageResponse,
+            "description": "Resource not found response"
+        },
+    },
+    tags=["Bank Account"],
+    summary="Get a bank account balance at a point in time",
+    response_model_by_alias=True,
+)
+async def bank_accounts_id_balance_get(
+    id: str, session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    at: Optional[datetime] = Query(None, description="Point in time, defaults to now"),
+) -> BankAccountBalance:
+    return await bank_account_service.bank_accounts_id_balance_get(
+        id, at, session)
+
+
+@router.get(
+    "/bankAccounts/{id}/balances",
+    responses={
+        200: {
+            "model": BankAccountBalances,
+            "description": "Bank account balance at the end of each period"
+        },
+        400: {
+            "model": MessageResponse,
+            "description": "Invalid date range"
+        },
+        404: {
+            "model": MessageResponse,
+            "description": "Resource not found response"
+        },
+    },
+    tags=["Bank Account"],
+    summary="Get a bank account balance series",
+    response_model_by_alias=True,
+)
+async def bank_accounts_id_balances_get(
+    id: str, session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    from_: Optional[datetime] = Query(None, description="Exclusive lower bound, defaults to 30 days before the upper bound", alias="from"),
+    to: Optional[datetime] = Query(None, description="Inclusive upper bound, defaults to now"),
+    interval: BalanceInterval = Query(BalanceInterval.DAY, description="Length of each period"),
+) -> BankAccountBalances:
+    return await bank_account_service.bank_accounts_id_balances_get(
+        id, from_, to, interval, session)
+
+
+@router.get(
+    "/bankAccounts/{id}/statements/{month}",
+    responses={
+        200: {
+            "model": BankAccountStatement,
+            "description": "Monthly totals and ledger entries of the month, streamed"
+        },
+        404: {
+            "model": MessageResponse,
+            "description": "Resource not found response"
+        },
+    },
+    tags=["Bank Account"],
+    summary="Get a bank account monthly statement",
+    response_class=StreamingResponse,
+)
+async def bank_accounts_id_statements_month_get(
+    id: str, session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    month: str = Path(..., description="Month of the statement (YYYY-MM)", pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+) -> StreamingResponse:
+    return StreamingResponse(
+        await statement_service.bank_accounts_id_statements_month_get(
+            id, month, session),
+        media_type="application/json")
+
+
 @router.get(
     "/bankAccounts/{id}",
     responses={
@@ -64,6 +158,9 @@ async def bank_accounts_id_delete(
             "model": BankAccount,
             "description": "Bank account details"
         },
+        304: {
+            "description": "Not modified"
+        },
         404: {
             "model": MessageResponse,
             "description": "Resource not found response"
@@ -74,11 +171,14 @@ async def bank_accounts_id_delete(
     response_model_by_alias=True,
 )
 async def bank_accounts_id_get(
-    id: str, session: SessionDep,
+    id: str, request: Request, response: Response,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> BankAccount:
-    return await bank_account_service.bank_accounts_id_get(
+    bank_account = await bank_account_service.bank_accounts_id_get(
         id, session)
+    return get_conditional_response(
+        request, response, bank_account)
 
 
 @router.put(
@@ -92,6 +192,14 @@ async def bank_accounts_id_get(
             "model": MessageResponse,
             "description": "Resource not found response"
         },
+        409: {
+            "model": MessageResponse,
+            "description": "Concurrent modification response"
+        },
+        412: {
+            "model": MessageResponse,
+            "description": "If-Match precondition failed response"
+        },
     },
     tags=["Bank Account"],
     summary="Update a bank account",
@@ -99,8 +207,12 @@ async def bank_accounts_id_get(
 )
 async def bank_accounts_id_put(
     id: str, bank_account_put: BankAccountPut,
-    session: SessionDep,
-    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+    response: Response,
+    session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    if_match: Optional[str] = Header(None, description="", alias="If-Match"),
 ) -> BankAccount:
-    return await bank_account_service.bank_accounts_id_put(
-        id, bank_account_put, session)
+    bank_account = await bank_account_service.bank_accounts_id_put(
+        id, bank_account_put, session, if_match)
+    response.headers["ETag"] = get_etag(bank_account)
+    return bank_account
@@ -1,12 +1,14 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
-from fastapi_pagination import Page
+from fastapi import APIRouter, Depends, Header, Request, Response
 
+from app.api.common.conditional import get_conditional_response, get_etag
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse, PostResponse)
+from app.core.config import settings
 from app.core.jwt import get_current_active_user
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     Bank, BanksPost, BankPut, UserProfile)
 from app.services import (
@@ -21,15 +23,23 @@ router = APIRouter()
             "model": Page[Bank],
             "description": "A list of banks"
         },
+        304: {
+            "description": "Not modified"
+        },
     },
     tags=["Bank"],
     summary="List all banks",
     response_model_by_alias=True,
 )
 async def banks_get(
-    session: SessionDep
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep
 ) -> Page[Bank]:
-    return await bank_service.banks_get(session)
+    banks = await bank_service.banks_get(session)
+    return get_conditional_response(
+        request, response, banks,
+        cache_control=settings.CATALOG_CACHE_CONTROL)
 
 
 @router.delete(
@@ -49,7 +59,7 @@ async def banks_get(
 )
 async def banks_id_delete(
     id: str,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> None:
     return await bank_service.banks_id_delete(
@@ -63,6 +73,9 @@ async def banks_id_delete(
             "model": Bank,
             "description": "Bank details"
         },
+        304: {
+            "description": "Not modified"
+        },
         404: {
             "model": MessageResponse,
             "description": "Resource not found response"
@@ -74,11 +87,15 @@ async def banks_id_delete(
 )
 async def banks_id_get(
     id: str,
-    session: SessionDep,
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> Bank:
-    return await bank_service.banks_id_get(
+    bank = await bank_service.banks_id_get(
         id, session)
+    return get_conditional_response(
+        request, response, bank)
 
 
 @router.put(
@@ -92,6 +109,14 @@ async def banks_id_get(
             "model": MessageResponse,
             "description": "Resource not found response"
         },
+        409: {
+            "model": MessageResponse,
+            "description": "Concurrent modification response"
+        },
+        412: {
+            "model": MessageResponse,
+            "description": "If-Match precondition failed response"
+        },
     },
     tags=["Bank"],
     summary="Update a bank",
@@ -99,11 +124,15 @@ async def banks_id_get(
 )
 async def banks_id_put(
     id: str, bank_put: BankPut,
-    session: SessionDep,
-    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+    response: Response,
+    session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    if_match: Optional[str] = Header(None, description="", alias="If-Match"),
 ) -> Bank:
-    return await bank_service.banks_id_put(
-        id, bank_put, session)
+    bank = await bank_service.banks_id_put(
+        id, bank_put, session, if_match)
+    response.headers["ETag"] = get_etag(bank)
+    return bank
 
 
 @router.post(
@@ -120,7 +149,7 @@ async def banks_id_put(
 )
 async def banks_post(
     banks_post: BanksPost,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> PostResponse:
     return await bank_service.banks_post(
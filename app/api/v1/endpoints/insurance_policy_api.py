@@ -1,17 +1,18 @@
 from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, Query
-from fastapi_pagination import Page
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
 
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse, PostResponse)
 from app.core.jwt import get_current_active_user
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     InsurancePolicy, InsurancePoliciesPost,
     InsurancePolicyActionPost, UserProfile)
 from app.services import (
-    insurance_policy as insurance_policy_service)
+    idempotency as idempotency_service, insurance_policy as insurance_policy_service)
+from app.services.idempotency import get_request_hash
 
 router = APIRouter()
 
@@ -28,7 +29,7 @@ router = APIRouter()
     response_model_by_alias=True,
 )
 async def insurance_policies_get(
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
     bank_account_id: Optional[str] = Query(None, description="", alias="bankAccountId")
 ) -> Page[InsurancePolicy]:
@@ -59,7 +60,7 @@ async def insurance_policies_get(
 async def insurance_policies_id_action_post(
     id: str,
     insurance_policy_action_post: InsurancePolicyActionPost,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> MessageResponse:
     return await insurance_policy_service.insurance_policies_id_action_post(
@@ -84,7 +85,7 @@ async def insurance_policies_id_action_post(
 )
 async def insurance_policies_id_get(
     id: str,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> InsurancePolicy:
     return await insurance_policy_service.insurance_policies_id_get(
@@ -98,6 +99,14 @@ async def insurance_policies_id_get(
             "model": PostResponse,
             "description": "Base resource creation response"
         },
+        409: {
+            "model": MessageResponse,
+            "description": "Idempotency key in use response"
+        },
+        422: {
+            "model": MessageResponse,
+            "description": "Idempotency key reused with a different request response"
+        },
     },
     tags=["Insurance Policy"],
     summary="Create an insurance policy",
@@ -105,8 +114,16 @@ async def insurance_policies_id_get(
 )
 async def insurance_policies_post(
     insurance_policies_post: InsurancePoliciesPost,
-    session: SessionDep,
-    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    idempotency_key: Optional[str] = Header(
+        None, description="", alias="Idempotency-Key", max_length=255),
 ) -> PostResponse:
-    return await insurance_policy_service.insurance_policies_post(
-        insurance_policies_post, session)
+    return await idempotency_service.run_idempotent(
+        idempotency_key, authenticated_user_profile.id,
+        await get_request_hash(request),
+        response,
+        lambda: insurance_policy_service.insurance_policies_post(insurance_policies_post, session),
+        session)
@@ -1,12 +1,14 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
-from fastapi_pagination import Page
+from fastapi import APIRouter, Depends, Header, Request, Response
 
+from app.api.common.conditional import get_conditional_response, get_etag
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse, PostResponse)
+from app.core.config import settings
 from app.core.jwt import get_current_active_user
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     InsurancePolicyProduct, InsurancePolicyProductsPost,
     InsurancePolicyProductPut, UserProfile)
@@ -22,16 +24,24 @@ router = APIRouter()
             "model": Page[InsurancePolicyProduct],
             "description": "A list of insurance policy products"
         },
+        304: {
+            "description": "Not modified"
+        },
     },
     tags=["Insurance Policy Product"],
     summary="List all insurance policy products",
     response_model_by_alias=True,
 )
 async def insurance_policy_products_get(
-    session: SessionDep
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep
 ) -> Page[InsurancePolicyProduct]:
-    return await insurance_policy_product_service.insurance_policy_products_get(
+    insurance_policy_products = await insurance_policy_product_service.insurance_policy_products_get(
         session)
+    return get_conditional_response(
+        request, response, insurance_policy_products,
+        cache_control=settings.CATALOG_CACHE_CONTROL)
 
 
 @router.delete(
@@ -49,7 +59,7 @@ async def insurance_policy_products_get(
 )
 async def insurance_policy_products_id_delete(
     id: str,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> None:
     return await insurance_policy_product_service.insurance_policy_products_id_delete(
@@ -63,6 +73,9 @@ async def insurance_policy_products_id_delete(
             "model": InsurancePolicyProduct,
             "description": "Insurance Policy Product details"
         },
+        304: {
+            "description": "Not modified"
+        },
         404: {
             "model": MessageResponse,
             "description": "Resource not found response"
@@ -74,11 +87,15 @@ async def insurance_policy_products_id_delete(
 )
 async def insurance_policy_products_id_get(
     id: str,
-    session: SessionDep,
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> InsurancePolicyProduct:
-    return await insurance_policy_product_service.insurance_policy_products_id_get(
+    insurance_policy_product = await insurance_policy_product_service.insurance_policy_products_id_get(
         id, session)
+    return get_conditional_response(
+        request, response, insurance_policy_product)
 
 
 @router.put(
@@ -92,6 +109,14 @@ async def insurance_policy_products_id_get(
             "model": MessageResponse,
             "description": "Resource not found response"
         },
+        409: {
+            "model": MessageResponse,
+            "description": "Concurrent modification response"
+        },
+        412: {
+            "model": MessageResponse,
+            "description": "If-Match precondition failed response"
+        },
     },
     tags=["Insurance Policy Product"],
     summary="Update an insurance policy product",
@@ -100,11 +125,15 @@ async def insurance_policy_products_id_get(
 async def insurance_policy_products_id_put(
     id: str,
     insurance_policy_product_put: InsurancePolicyProductPut,
-    session: SessionDep,
-    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+    response: Response,
+    session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    if_match: Optional[str] = Header(None, description="", alias="If-Match"),
 ) -> InsurancePolicyProduct:
-    return await insurance_policy_product_service.insurance_policy_products_id_put(
-        id, insurance_policy_product_put, session)
+    insurance_policy_product = await insurance_policy_product_service.insurance_policy_products_id_put(
+        id, insurance_policy_product_put, session, if_match)
+    response.headers["ETag"] = get_etag(insurance_policy_product)
+    return insurance_policy_product
 
 
 @router.post(
@@ -121,7 +150,7 @@ async def insurance_policy_products_id_put(
 )
 async def insurance_policy_products_post(
     insurance_policy_products_post: InsurancePolicyProductsPost,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> PostResponse:
     return await insurance_policy_product_service.insurance_policy_products_post(
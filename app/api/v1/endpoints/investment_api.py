@@ -1,16 +1,18 @@
 from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, Query
-from fastapi_pagination import Page
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
 
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse, PostResponse)
 from app.core.jwt import get_current_active_user
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     Investment, InvestmentsPost,
     InvestmentActionPost, UserProfile)
-from app.services import investment as investment_service
+from app.services import (
+    idempotency as idempotency_service, investment as investment_service)
+from app.services.idempotency import get_request_hash
 
 router = APIRouter()
 
@@ -27,7 +29,7 @@ router = APIRouter()
     response_model_by_alias=True,
 )
 async def investments_get(
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
     bank_account_id: Optional[str] = Query(None, description="", alias="bankAccountId"),
 ) -> Page[Investment]:
@@ -58,7 +60,7 @@ async def investments_get(
 async def investments_id_action_post(
     id: str,
     investment_action_post: InvestmentActionPost,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> MessageResponse:
     return await investment_service.investments_id_action_post(
@@ -83,7 +85,7 @@ async def investments_id_action_post(
 )
 async def investments_id_get(
     id: str,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> Investment:
     return await investment_service.investments_id_get(
@@ -97,6 +99,14 @@ async def investments_id_get(
             "model": PostResponse,
             "description": "Base resource creation response"
         },
+        409: {
+            "model": MessageResponse,
+            "description": "Idempotency key in use response"
+        },
+        422: {
+            "model": MessageResponse,
+            "description": "Idempotency key reused with a different request response"
+        },
     },
     tags=["Investment"],
     summary="Create an investment",
@@ -104,8 +114,16 @@ async def investments_id_get(
 )
 async def investments_post(
     investments_post: InvestmentsPost,
-    session: SessionDep,
-    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    idempotency_key: Optional[str] = Header(
+        None, description="", alias="Idempotency-Key", max_length=255),
 ) -> PostResponse:
-    return await investment_service.investments_post(
-        investments_post, session)
+    return await idempotency_service.run_idempotent(
+        idempotency_key, authenticated_user_profile.id,
+        await get_request_hash(request),
+        response,
+        lambda: investment_service.investments_post(investments_post, session),
+        session)
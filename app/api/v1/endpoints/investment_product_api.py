@@ -1,12 +1,14 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
-from fastapi_pagination import Page
+from fastapi import APIRouter, Depends, Header, Request, Response
 
+from app.api.common.conditional import get_conditional_response, get_etag
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse, PostResponse)
+from app.core.config import settings
 from app.core.jwt import get_current_active_user
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     InvestmentProduct, InvestmentProductPut,
     InvestmentProductsPost, UserProfile)
@@ -22,16 +24,24 @@ router = APIRouter()
             "model": Page[InvestmentProduct],
             "description": "A list of investment products"
         },
+        304: {
+            "description": "Not modified"
+        },
     },
     tags=["Investment Product"],
     summary="List all investment products",
     response_model_by_alias=True,
 )
 async def investment_products_get(
-    session: SessionDep
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep
 ) -> Page[InvestmentProduct]:
-    return await investment_product_service.investment_products_get(
+    investment_products = await investment_product_service.investment_products_get(
         session)
+    return get_conditional_response(
+        request, response, investment_products,
+        cache_control=settings.CATALOG_CACHE_CONTROL)
 
 
 @router.delete(
@@ -49,7 +59,7 @@ async def investment_products_get(
 )
 async def investment_products_id_delete(
     id: str,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> None:
     return await investment_product_service.investment_products_id_delete(
@@ -63,6 +73,9 @@ async def investment_products_id_delete(
             "model": InvestmentProduct,
             "description": "Investment Product details"
         },
+        304: {
+            "description": "Not modified"
+        },
         404: {
             "model": MessageResponse,
             "description": "Resource not found response"
@@ -74,11 +87,15 @@ async def investment_products_id_delete(
 )
 async def investment_products_id_get(
     id: str,
-    session: SessionDep,
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> InvestmentProduct:
-    return await investment_product_service.investment_products_id_get(
+    investment_product = await investment_product_service.investment_products_id_get(
         id, session)
+    return get_conditional_response(
+        request, response, investment_product)
 
 
 @router.put(
@@ -92,6 +109,14 @@ async def investment_products_id_get(
             "model": MessageResponse,
             "description": "Resource not found response"
         },
+        409: {
+            "model": MessageResponse,
+            "description": "Concurrent modification response"
+        },
+        412: {
+            "model": MessageResponse,
+            "description": "If-Match precondition failed response"
+        },
     },
     tags=["Investment Product"],
     summary="Update an investment product",
@@ -100,11 +125,15 @@ async def investment_products_id_get(
 async def investment_products_id_put(
     id: str,
     investment_product_put: InvestmentProductPut,
-    session: SessionDep,
-    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+    response: Response,
+    session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    if_match: Optional[str] = Header(None, description="", alias="If-Match"),
 ) -> InvestmentProduct:
-    return await investment_product_service.investment_products_id_put(
-        id, investment_product_put, session)
+    investment_product = await investment_product_service.investment_products_id_put(
+        id, investment_product_put, session, if_match)
+    response.headers["ETag"] = get_etag(investment_product)
+    return investment_product
 
 
 @router.post(
@@ -121,7 +150,7 @@ async def investment_products_id_put(
 )
 async def investment_products_post(
     investment_products_post: InvestmentProductsPost,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> PostResponse:
     return await investment_product_service.investment_products_post(
@@ -1,14 +1,16 @@
 from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, Query
-from fastapi_pagination import Page
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
 
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse, PostResponse)
 from app.core.jwt import get_current_active_user
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import Loan, LoansPost, UserProfile
-from app.services import loan as loan_service
+from app.services import (
+    idempotency as idempotency_service, loan as loan_service)
+from app.services.idempotency import get_request_hash
 
 router = APIRouter()
 
@@ -25,7 +27,7 @@ router = APIRouter()
     response_model_by_alias=True,
 )
 async def loans_get(
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
     bank_account_id: Optional[str] = Query(None, description="", alias="bankAccountId"),
 ) -> Page[Loan]:
@@ -51,7 +53,7 @@ async def loans_get(
 )
 async def loans_id_get(
     id: str,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> Loan:
     return await loan_service.loans_id_get(
@@ -65,6 +67,14 @@ async def loans_id_get(
             "model": PostResponse,
             "description": "Base resource creation response"
         },
+        409: {
+            "model": MessageResponse,
+            "description": "Idempotency key in use response"
+        },
+        422: {
+            "model": MessageResponse,
+            "description": "Idempotency key reused with a different request response"
+        },
     },
     tags=["Loan"],
     summary="Create a loan",
@@ -72,8 +82,16 @@ async def loans_id_get(
 )
 async def loans_post(
     loans_post: LoansPost,
-    session: SessionDep,
-    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    idempotency_key: Optional[str] = Header(
+        None, description="", alias="Idempotency-Key", max_length=255),
 ) -> PostResponse:
-    return await loan_service.loans_post(
-        loans_post, session)
+    return await idempotency_service.run_idempotent(
+        idempotency_key, authenticated_user_profile.id,
+        await get_request_hash(request),
+        response,
+        lambda: loan_service.loans_post(loans_post, session),
+        session)
@@ -1,12 +1,14 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
-from fastapi_pagination import Page
+from fastapi import APIRouter, Depends, Header, Request, Response
 
+from app.api.common.conditional import get_conditional_response, get_etag
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse, PostResponse)
+from app.core.config import settings
 from app.core.jwt import get_current_active_user
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     LoanProduct, LoanProductPut,
     LoanProductsPost, UserProfile)
@@ -22,16 +24,24 @@ router = APIRouter()
             "model": Page[LoanProduct],
             "description": "A list of loan products"
         },
+        304: {
+            "description": "Not modified"
+        },
     },
     tags=["Loan Product"],
     summary="List all loan products",
     response_model_by_alias=True,
 )
 async def loan_products_get(
-    session: SessionDep
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep
 ) -> Page[LoanProduct]:
-    return await loan_product_service.loan_products_get(
+    loan_products = await loan_product_service.loan_products_get(
         session)
+    return get_conditional_response(
+        request, response, loan_products,
+        cache_control=settings.CATALOG_CACHE_CONTROL)
 
 
 @router.delete(
@@ -49,7 +59,7 @@ async def loan_products_get(
 )
 async def loan_products_id_delete(
     id: str,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> None:
     return await loan_product_service.loan_products_id_delete(
@@ -63,6 +73,9 @@ async def loan_products_id_delete(
             "model": LoanProduct,
             "description": "Loan Product details"
         },
+        304: {
+            "description": "Not modified"
+        },
         404: {
             "model": MessageResponse,
             "description": "Resource not found response"
@@ -74,11 +87,15 @@ async def loan_products_id_delete(
 )
 async def loan_products_id_get(
     id: str,
-    session: SessionDep,
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> LoanProduct:
-    return await loan_product_service.loan_products_id_get(
+    loan_product = await loan_product_service.loan_products_id_get(
         id, session)
+    return get_conditional_response(
+        request, response, loan_product)
 
 
 @router.put(
@@ -92,6 +109,14 @@ async def loan_products_id_get(
             "model": MessageResponse,
             "description": "Resource not found response"
         },
+        409: {
+            "model": MessageResponse,
+            "description": "Concurrent modification response"
+        },
+        412: {
+            "model": MessageResponse,
+            "description": "If-Match precondition failed response"
+        },
     },
     tags=["Loan Product"],
     summary="Update a loan product",
@@ -100,11 +125,15 @@ async def loan_products_id_get(
 async def loan_products_id_put(
     id: str,
     loan_product_put: LoanProductPut,
-    session: SessionDep,
-    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+    response: Response,
+    session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    if_match: Optional[str] = Header(None, description="", alias="If-Match"),
 ) -> LoanProduct:
-    return await loan_product_service.loan_products_id_put(
-        id, loan_product_put, session)
+    loan_product = await loan_product_service.loan_products_id_put(
+        id, loan_product_put, session, if_match)
+    response.headers["ETag"] = get_etag(loan_product)
+    return loan_product
 
 
 @router.post(
@@ -121,7 +150,7 @@ async def loan_products_id_put(
 )
 async def loan_products_post(
     loan_products_post: LoanProductsPost,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> PostResponse:
     return await loan_product_service.loan_products_post(
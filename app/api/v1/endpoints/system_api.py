@@ -0,0 +1,65 @@
+from typing import Annotated, Dict
+
+from fastapi import APIRouter, Depends
+
+from app.api.common.schemas.system import (
+    CatalogCacheStatistics, DatabasePoolStatistics, RouteQueryStatistics)
+from app.core.jwt import get_current_active_user
+from app.db.models import UserProfile
+from app.services import (
+    system as system_service)
+
+router = APIRouter()
+
+@router.get(
+    "/system/databasePool",
+    responses={
+        200: {
+            "model": DatabasePoolStatistics,
+            "description": "Database connection pool statistics"
+        },
+    },
+    tags=["System"],
+    summary="Get database pool statistics",
+    response_model_by_alias=True,
+)
+async def database_pool_get(
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+) -> DatabasePoolStatistics:
+    return await system_service.database_pool_get()
+
+
+@router.get(
+    "/system/catalogCache",
+    responses={
+        200: {
+            "model": Dict[str, CatalogCacheStatistics],
+            "description": "Catalog cache statistics by catalog"
+        },
+    },
+    tags=["System"],
+    summary="Get catalog cache statistics",
+    response_model_by_alias=True,
+)
+async def catalog_cache_get(
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+) -> Dict[str, CatalogCacheStatistics]:
+    return await system_service.catalog_cache_get()
+
+
+@router.get(
+    "/system/queries",
+    responses={
+        200: {
+            "model": Dict[str, RouteQueryStatistics],
+            "description": "Database statements by route"
+        },
+    },
+    tags=["System"],
+    summary="Get database query statistics",
+    response_model_by_alias=True,
+)
+async def queries_get(
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+) -> Dict[str, RouteQueryStatistics]:
+    return await system_service.queries_get()
@@ -1,19 +1,59 @@
-from typing import Annotated, Optional
+import json
+import uuid
+from datetime import datetime
+from typing import Annotated, Any, AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends, Query
-from fastapi_pagination import Page
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
+from app.api.common.errors import InvalidBatchError
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse, PostResponse)
+from app.api.common.schemas.transaction import (
+    ExportFormat, TransactionsBatchResponse)
+from app.core.config import settings
 from app.core.jwt import get_current_active_user
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     Transaction, TransactionsPost, UserProfile)
 from app.services import (
-    transaction as transaction_service)
+    idempotency as idempotency_service, transaction as transaction_service)
+from app.services.idempotency import get_request_hash
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+
+async def _read_raw_transactions_posts(
+    request: Request
+) -> AsyncIterator[Any]:
+    # NDJSON bodies are consumed line by line as they arrive, so large
+    # batches are never held in memory as a whole
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        buffer = b""
+        async for body_chunk in request.stream():
+            buffer += body_chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        raw_transactions_posts = json.loads(await request.body())
+    except ValueError:
+        raise InvalidBatchError()
+    if not isinstance(raw_transactions_posts, list):
+        raise InvalidBatchError()
+    for raw_transactions_post in raw_transactions_posts:
+        yield raw_transactions_post
+
+
 @router.get(
     "/transactions",
     responses={
@@ -27,7 +67,7 @@ router = APIRouter()
     response_model_by_alias=True,
 )
 async def transactions_get(
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
     source_account_id: Optional[str] = Query(None, description="", alias="sourceAccountId"),
     destination_account_id: Optional[str] = Query(None, description="", alias="destinationAccountId"),
@@ -37,6 +77,46 @@ async def transactions_get(
         session, source_account_id, destination_account_id, involved_account_id)
 
 
+@router.get(
+    "/transactions/export",
+    responses={
+        200: {
+            "content": {
+                NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}},
+                CSV_MEDIA_TYPE: {"schema": {"type": "string"}},
+            },
+            "description": "The matching transactions, oldest first"
+        },
+        400: {
+            "model": MessageResponse,
+            "description": "Invalid date range"
+        },
+    },
+    tags=["Transaction"],
+    summary="Export transactions",
+    response_class=StreamingResponse,
+)
+async def transactions_export_get(
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, description="", alias="format"),
+    source_account_id: Optional[uuid.UUID] = Query(None, description="", alias="sourceAccountId"),
+    destination_account_id: Optional[uuid.UUID] = Query(None, description="", alias="destinationAccountId"),
+    involved_account_id: Optional[uuid.UUID] = Query(None, description="", alias="involvedAccountId"),
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound", alias="createdFrom"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound", alias="createdTo"),
+) -> StreamingResponse:
+    media_type = CSV_MEDIA_TYPE \
+        if export_format is ExportFormat.CSV else NDJSON_MEDIA_TYPE
+    return StreamingResponse(
+        await transaction_service.transactions_export(
+            export_format, source_account_id, destination_account_id,
+            involved_account_id, created_from, created_to),
+        media_type=media_type,
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="transactions.{export_format.value}"'})
+
+
 @router.get(
     "/transactions/{id}",
     responses={
@@ -55,7 +135,7 @@ async def transactions_get(
 )
 async def transactions_id_get(
     id: str,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> Transaction:
     return await transaction_service.transactions_id_get(
@@ -69,6 +149,14 @@ async def transactions_id_get(
             "model": PostResponse,
             "description": "Base resource creation response"
         },
+        409: {
+            "model": MessageResponse,
+            "description": "Idempotency key in use response"
+        },
+        422: {
+            "model": MessageResponse,
+            "description": "Idempotency key reused with a different request response"
+        },
     },
     tags=["Transaction"],
     summary="Create a transaction",
@@ -76,8 +164,60 @@ async def transactions_id_get(
 )
 async def transactions_post(
     transactions_post: TransactionsPost,
-    session: SessionDep,
-    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    idempotency_key: Optional[str] = Header(
+        None, description="", alias="Idempotency-Key", max_length=255),
 ) -> PostResponse:
-    return await transaction_service.transactions_post(
-        transactions_post, session)
+    return await idempotency_service.run_idempotent(
+        idempotency_key, authenticated_user_profile.id,
+        await get_request_hash(request),
+        response,
+        lambda: transaction_service.transactions_post(transactions_post, session),
+        session)
+
+
+@router.post(
+    "/transactions/batch",
+    responses={
+        200: {
+            "model": TransactionsBatchResponse,
+            "description": "Per-item results of the batch"
+        },
+        400: {
+            "model": MessageResponse,
+            "description": "Malformed batch"
+        },
+    },
+    tags=["Transaction"],
+    summary="Create transactions in batch",
+    response_model_by_alias=True,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/TransactionsPost"}
+                    }
+                },
+                NDJSON_MEDIA_TYPE: {
+                    "schema": {"type": "string"}
+                },
+            },
+        },
+    },
+)
+async def transactions_batch_post(
+    request: Request,
+    session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    chunk_size: Optional[int] = Query(
+        None, description="Number of transactions committed together",
+        alias="chunkSize", ge=1, le=settings.TRANSACTIONS_BATCH_MAX_CHUNK_SIZE),
+) -> TransactionsBatchResponse:
+    return await transaction_service.transactions_batch_post(
+        _read_raw_transactions_posts(request), session, chunk_size)
@@ -1,12 +1,12 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends
-from fastapi_pagination import Page
 
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse, PostResponse)
 from app.core.jwt import get_current_active_user
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     BankAccount, BankAccountsPost, UserProfile)
 from app.services import (
@@ -32,7 +32,7 @@ router = APIRouter()
 )
 async def user_profiles_id_bank_accounts_get(
     user_profile_id: str,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> Page[BankAccount]:
     return await user_bank_account_service.user_profiles_id_bank_accounts_get(
@@ -58,7 +58,7 @@ async def user_profiles_id_bank_accounts_get(
 async def user_profiles_id_bank_accounts_post(
     user_profile_id: str,
     bank_accounts_post: BankAccountsPost,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> PostResponse:
     return await user_bank_account_service.user_profiles_id_bank_accounts_post(
@@ -1,12 +1,13 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends
-from fastapi_pagination import Page
+from fastapi import APIRouter, Depends, Header, Request, Response
 
+from app.api.common.conditional import get_conditional_response, get_etag
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse, PostResponse)
 from app.core.jwt import get_current_active_user
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     CredentialsPut, UserProfile,
     UserProfilesPost, UserProfileWithUserData)
@@ -28,7 +29,7 @@ router = APIRouter()
     response_model_by_alias=True,
 )
 async def user_profiles_get(
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> Page[UserProfile]:
     return await user_profile_service.user_profiles_get(
@@ -50,7 +51,7 @@ async def user_profiles_get(
 )
 async def user_profiles_id_delete(
     id: str,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> None:
     return await user_profile_service.user_profiles_id_delete(
@@ -64,6 +65,9 @@ async def user_profiles_id_delete(
             "model": UserProfileWithUserData,
             "description": "User profile details"
         },
+        304: {
+            "description": "Not modified"
+        },
         404: {
             "model": MessageResponse,
             "description": "Resource not found response"
@@ -75,11 +79,15 @@ async def user_profiles_id_delete(
 )
 async def user_profiles_id_get(
     id: str,
-    session: SessionDep,
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> UserProfileWithUserData:
-    return await user_profile_service.user_profiles_id_get(
+    user_profile = await user_profile_service.user_profiles_id_get(
         id, session)
+    return get_conditional_response(
+        request, response, user_profile)
 
 
 @router.put(
@@ -93,6 +101,14 @@ async def user_profiles_id_get(
             "model": MessageResponse,
             "description": "Resource not found response"
         },
+        409: {
+            "model": MessageResponse,
+            "description": "Concurrent modification response"
+        },
+        412: {
+            "model": MessageResponse,
+            "description": "If-Match precondition failed response"
+        },
     },
     tags=["User Profile"],
     summary="Update a user profile",
@@ -101,11 +117,15 @@ async def user_profiles_id_get(
 async def user_profiles_id_put(
     id: str,
     user_profile_put: CredentialsPut,
-    session: SessionDep,
-    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
+    response: Response,
+    session: AsyncSessionDep,
+    authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)],
+    if_match: Optional[str] = Header(None, description="", alias="If-Match"),
 ) -> UserProfileWithUserData:
-    return await user_profile_service.user_profiles_id_put(
-        id, user_profile_put, session)
+    user_profile = await user_profile_service.user_profiles_id_put(
+        id, user_profile_put, session, if_match)
+    response.headers["ETag"] = get_etag(user_profile)
+    return user_profile
 
 
 @router.post(
@@ -122,7 +142,7 @@ async def user_profiles_id_put(
 )
 async def user_profiles_post(
     user_profiles_post: UserProfilesPost,
-    session: SessionDep,
+    session: AsyncSessionDep,
     authenticated_user_profile: Annotated[UserProfile, Depends(get_current_active_user)]
 ) -> PostResponse:
     return await user_profile_service.user_profiles_post(
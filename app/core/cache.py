@@ -0,0 +1,431 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import (
+    Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, Type,
+    TypeVar)
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+from app.db.models import UserProfileWithUserData
+
+_log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+cache_requests = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    labelnames=("cache", "result"))
+cache_entries = Gauge(
+    "cache_entries",
+    "Entries cached by this process, updated when metrics are collected",
+    labelnames=("cache",))
+cache_hit_ratio = Gauge(
+    "cache_hit_ratio",
+    "Share of cache lookups served from the cache since startup",
+    labelnames=("cache",))
+
+
+class TTLCache:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, value), least recently used first
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(
+        self, key: Hashable, value: Any,
+        ttl_seconds: Optional[float] = None
+    ) -> None:
+        if self.max_size <= 0:
+            return
+        if ttl_seconds is None:
+            ttl_seconds = self.ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def delete_matching(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+    def count_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        return sum(1 for key in self._entries if predicate(key))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+InvalidationHandler = Callable[[str], None]
+
+
+class CacheBackend(ABC):
+    # Whether entries are visible to other processes; each cache then keeps
+    # a short-lived local copy, kept coherent by broadcast invalidations
+    shared: bool = False
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(
+        self, key: str, value: str, ttl_seconds: float,
+        generation: Optional[Tuple[str, int]] = None
+    ) -> bool:
+        # With a (namespace, generation) pair, the entry is only written if
+        # the namespace hasn't been invalidated since; returns whether it was
+        ...
+
+    @abstractmethod
+    async def get_generation(self, namespace: str) -> int:
+        ...
+
+    @abstractmethod
+    async def delete_prefix(self, namespace: str, prefix: str) -> None:
+        # Bumps the namespace's generation too
+        ...
+
+    @abstractmethod
+    async def publish_invalidation(self, prefix: str) -> None:
+        ...
+
+    async def start(self, on_invalidation: InvalidationHandler) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+
+class MemoryCacheBackend(CacheBackend):
+    # Entries live only in each cache's local LRU, in this process
+    shared = False
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(
+        self, key: str, value: str, ttl_seconds: float,
+        generation: Optional[Tuple[str, int]] = None
+    ) -> bool:
+        return False
+
+    async def get_generation(self, namespace: str) -> int:
+        return 0
+
+    async def delete_prefix(self, namespace: str, prefix: str) -> None:
+        return None
+
+    async def publish_invalidation(self, prefix: str) -> None:
+        return None
+
+
+class RedisCacheBackend(CacheBackend):
+    shared = True
+
+    def __init__(self, client: Any, key_prefix: str, channel: str):
+        # Any redis.asyncio compatible client, e.g. fakeredis in tests
+        self._client = client
+        self._key_prefix = key_prefix
+        self._channel = channel
+        self._origin = f"{os.getpid()}:{uuid.uuid4().hex}"
+        self._listener: Optional[asyncio.Task] = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(self._key_prefix + key)
+
+    def _get_generation_key(self, namespace: str) -> str:
+        # Outside every namespace's "<namespace>:" data keys
+        return f"{self._key_prefix}generation:{namespace}"
+
+    async def set(
+        self, key: str, value: str, ttl_seconds: float,
+        generation: Optional[Tuple[str, int]] = None
+    ) -> bool:
+        from redis.exceptions import WatchError
+
+        ttl_milliseconds = max(int(ttl_seconds * 1000), 1)
+        if generation is None:
+            await self._client.set(
+                self._key_prefix + key, value, px=ttl_milliseconds)
+            return True
+        # Optimistic transaction: the SET is discarded if the generation
+        # changes between the check and EXEC
+        namespace, expected_generation = generation
+        generation_key = self._get_generation_key(namespace)
+        async with self._client.pipeline(transaction=True) as pipeline:
+            try:
+                await pipeline.watch(generation_key)
+                if int(await pipeline.get(generation_key) or 0) \
+                        != expected_generation:
+                    return False
+                pipeline.multi()
+                pipeline.set(
+                    self._key_prefix + key, value, px=ttl_milliseconds)
+                await pipeline.execute()
+            except WatchError:
+                return False
+        return True
+
+    async def get_generation(self, namespace: str) -> int:
+        return int(await self._client.get(
+            self._get_generation_key(namespace)) or 0)
+
+    async def _scan_prefix(self, prefix: str):
+        pattern = re.sub(r"([*?\[\]\\])", r"\\\1", self._key_prefix + prefix)
+        async for key in self._client.scan_iter(
+                match=pattern + "*", count=500):
+            yield key
+
+    async def delete_prefix(self, namespace: str, prefix: str) -> None:
+        # Bumped before the entries go: a value loaded before the
+        # invalidation either fails its conditional write or gets deleted
+        await self._client.incr(self._get_generation_key(namespace))
+        keys = [key async for key in self._scan_prefix(prefix)]
+        if keys:
+            await self._client.delete(*keys)
+
+    async def publish_invalidation(self, prefix: str) -> None:
+        await self._client.publish(
+            self._channel,
+            json.dumps(dict(origin=self._origin, prefix=prefix)))
+
+    async def start(self, on_invalidation: InvalidationHandler) -> None:
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self._channel)
+        self._listener = asyncio.create_task(
+            self._listen(pubsub, on_invalidation))
+
+    async def _listen(
+        self, pubsub: Any, on_invalidation: InvalidationHandler
+    ) -> None:
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    invalidation = json.loads(message["data"])
+                except (TypeError, ValueError):
+                    _log.warning("Ignoring malformed cache invalidation")
+                    continue
+                if invalidation.get("origin") != self._origin:
+                    on_invalidation(invalidation.get("prefix", ""))
+        finally:
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._client.aclose()
+
+
+class ModelSerializer:
+    # Values go through the shared backend as JSON tagged with their model
+    # name: only the listed pydantic models can be read back, so whoever
+    # can write to the backend can't make workers run anything
+    def __init__(self, *model_types: Type[BaseModel]):
+        self._model_types = {
+            model_type.__name__: model_type for model_type in model_types}
+
+    def dumps(self, value: BaseModel) -> str:
+        return f"{type(value).__name__}\n{value.model_dump_json()}"
+
+    def loads(self, data: bytes) -> BaseModel:
+        model_name, _, value = data.decode().partition("\n")
+        return self.validate(self._model_types[model_name], json.loads(value))
+
+    def validate(self, model_type: Type[BaseModel], value: Any) -> BaseModel:
+        # model_validate rather than model_validate_json: SQLModel table
+        # models only convert their fields (uuids, decimals...) there.
+        # Values are dumped by field name, but fields with a validation
+        # alias (e.g. swiftCode) only accept that
+        validation_aliases = {
+            name: field.validation_alias
+            for name, field in model_type.model_fields.items()
+            if isinstance(field.validation_alias, str)}
+        return model_type.model_validate({
+            validation_aliases.get(name, name): field_value
+            for name, field_value in value.items()})
+
+
+class Cache:
+    def __init__(
+        self, namespace: str, max_size: int, ttl_seconds: float,
+        serializer: ModelSerializer
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.serializer = serializer
+        # Bumped on every invalidation, local or broadcast by other workers
+        self.generation = 0
+        self._local = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        _caches[namespace] = self
+
+    def _get_backend_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _get_local_ttl_seconds(self) -> float:
+        if not cache_backend.shared:
+            return self.ttl_seconds
+        return min(self.ttl_seconds, settings.CACHE_LOCAL_TTL_SECONDS)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self._local.get(key)
+        if value is None and cache_backend.shared:
+            data = await cache_backend.get(self._get_backend_key(key))
+            if data is not None:
+                value = self._loads(key, data)
+            if value is not None:
+                self._local.set(key, value, self._get_local_ttl_seconds())
+        cache_requests.inc(
+            cache=self.namespace, result="miss" if value is None else "hit")
+        return value
+
+    def _loads(self, key: str, data: bytes) -> Optional[Any]:
+        # Unreadable entries, e.g. written by an older release, are misses
+        try:
+            return self.serializer.loads(data)
+        except (KeyError, ValueError):
+            _log.warning(f"Ignoring unreadable cache entry {self.namespace}:{key}")
+            return None
+
+    async def set(
+        self, key: str, value: Any, shared_generation: Optional[int] = None
+    ) -> None:
+        # shared_generation, read before loading the value, makes the shared
+        # write conditional on no worker having invalidated the namespace
+        if cache_backend.shared:
+            stored = await cache_backend.set(
+                self._get_backend_key(key), self.serializer.dumps(value),
+                self.ttl_seconds,
+                generation=None if shared_generation is None
+                else (self.namespace, shared_generation))
+            if not stored:
+                return
+        self._local.set(key, value, self._get_local_ttl_seconds())
+
+    async def read_through(
+        self, key: str, loader: Callable[[], Awaitable[T]]
+    ) -> T:
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        # Reads that raced with an invalidation must not repopulate the cache
+        # with what they loaded before the write. The local generation sees
+        # invalidations that reached this worker, the shared one those made
+        # by any worker
+        generation = self.generation
+        shared_generation = None
+        if cache_backend.shared:
+            shared_generation = await cache_backend.get_generation(
+                self.namespace)
+        value = await loader()
+        if self.generation == generation:
+            await self.set(key, value, shared_generation)
+        return value
+
+    async def delete_prefix(self, prefix: str = "") -> None:
+        self._invalidate_local(prefix)
+        if cache_backend.shared:
+            await cache_backend.delete_prefix(
+                self.namespace, self._get_backend_key(prefix))
+            await cache_backend.publish_invalidation(
+                self._get_backend_key(prefix))
+
+    async def clear(self) -> None:
+        await self.delete_prefix()
+
+    def size(self) -> int:
+        # Entries held by this process: counting the shared backend's would
+        # take a scan of its keyspace
+        return len(self._local)
+
+    def _invalidate_local(self, prefix: str) -> None:
+        self.generation += 1
+        self._local.delete_matching(lambda key: key.startswith(prefix))
+
+
+# namespace -> cache, used to route invalidations broadcast by other workers
+_caches: Dict[str, Cache] = {}
+
+
+def _on_invalidation(backend_prefix: str) -> None:
+    namespace, _, prefix = backend_prefix.partition(":")
+    cache = _caches.get(namespace)
+    if cache is not None:
+        cache._invalidate_local(prefix)
+
+
+def update_cache_metrics() -> None:
+    requests = cache_requests.samples()
+    for namespace, cache in _caches.items():
+        cache_entries.set(cache.size(), cache=namespace)
+        hits = requests.get((namespace, "hit"), 0)
+        misses = requests.get((namespace, "miss"), 0)
+        if hits or misses:
+            cache_hit_ratio.set(hits / (hits + misses), cache=namespace)
+
+
+def create_cache_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCacheBackend()
+    if settings.CACHE_BACKEND == "redis":
+        import redis.asyncio
+
+        return RedisCacheBackend(
+            redis.asyncio.from_url(settings.CACHE_REDIS_URL),
+            key_prefix=settings.CACHE_KEY_PREFIX,
+            channel=settings.CACHE_INVALIDATION_CHANNEL)
+    raise ValueError(f"Unknown cache backend: {settings.CACHE_BACKEND}")
+
+
+cache_backend: CacheBackend = create_cache_backend()
+
+
+async def start_cache_backend() -> None:
+    await cache_backend.start(_on_invalidation)
+
+
+async def close_cache_backend() -> None:
+    await cache_backend.close()
+
+
+# Authenticated principals, keyed by "<token subject>:<token issued-at>"
+principal_cache = Cache(
+    "principal",
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    serializer=ModelSerializer(UserProfileWithUserData))
@@ -13,10 +13,80 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = os.getenv(
         "JWT_ACCESS_TOKEN_EXPIRE_MINUTES")
 
+    PAGINATION_DEFAULT_TOTAL_MODE: str = os.getenv(
+        "PAGINATION_DEFAULT_TOTAL_MODE", "exact")
+    PAGINATION_LARGE_TABLE_TOTAL_MODE: str = os.getenv(
+        "PAGINATION_LARGE_TABLE_TOTAL_MODE", "capped")
+    PAGINATION_TOTAL_CAP: int = os.getenv("PAGINATION_TOTAL_CAP", 10000)
+
+    TRANSACTIONS_BATCH_CHUNK_SIZE: int = os.getenv(
+        "TRANSACTIONS_BATCH_CHUNK_SIZE", 1000)
+    TRANSACTIONS_BATCH_MAX_CHUNK_SIZE: int = os.getenv(
+        "TRANSACTIONS_BATCH_MAX_CHUNK_SIZE", 10000)
+    TRANSACTIONS_EXPORT_YIELD_PER: int = os.getenv(
+        "TRANSACTIONS_EXPORT_YIELD_PER", 1000)
+
+    # Balance snapshots are taken every interval (0 disables them) for the
+    # accounts with at least LEDGER_SNAPSHOT_MIN_ENTRIES new ledger entries
+    LEDGER_SNAPSHOT_INTERVAL_SECONDS: float = os.getenv(
+        "LEDGER_SNAPSHOT_INTERVAL_SECONDS", 3600)
+    LEDGER_SNAPSHOT_MIN_ENTRIES: int = os.getenv(
+        "LEDGER_SNAPSHOT_MIN_ENTRIES", 100)
+
+    BANK_ACCOUNT_BALANCES_DEFAULT_DAYS: int = os.getenv(
+        "BANK_ACCOUNT_BALANCES_DEFAULT_DAYS", 30)
+    BANK_ACCOUNT_BALANCES_MAX_PERIODS: int = os.getenv(
+        "BANK_ACCOUNT_BALANCES_MAX_PERIODS", 1000)
+
+    # Completed keys are kept for the TTL; keys of requests still running
+    # (or that crashed) can be claimed again after the lock time
+    IDEMPOTENCY_KEY_TTL_SECONDS: float = os.getenv(
+        "IDEMPOTENCY_KEY_TTL_SECONDS", 86400)
+    IDEMPOTENCY_KEY_LOCK_SECONDS: float = os.getenv(
+        "IDEMPOTENCY_KEY_LOCK_SECONDS", 60)
+    IDEMPOTENCY_KEY_PURGE_INTERVAL_SECONDS: float = os.getenv(
+        "IDEMPOTENCY_KEY_PURGE_INTERVAL_SECONDS", 3600)
+
+    PASSWORD_HASHING_WORKERS: int = os.getenv(
+        "PASSWORD_HASHING_WORKERS", min(4, os.cpu_count() or 1))
+
+    # "memory" (per process) or "redis" (shared across workers and nodes)
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_REDIS_URL: str = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_KEY_PREFIX: str = os.getenv("CACHE_KEY_PREFIX", "unipegaso:")
+    CACHE_INVALIDATION_CHANNEL: str = os.getenv(
+        "CACHE_INVALIDATION_CHANNEL", "unipegaso:cache:invalidation")
+    CACHE_LOCAL_TTL_SECONDS: float = os.getenv("CACHE_LOCAL_TTL_SECONDS", 5)
+
+    PRINCIPAL_CACHE_MAX_SIZE: int = os.getenv("PRINCIPAL_CACHE_MAX_SIZE", 10000)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60)
+
+    CATALOG_CACHE_MAX_SIZE: int = os.getenv("CATALOG_CACHE_MAX_SIZE", 1000)
+    CATALOG_CACHE_TTL_SECONDS: float = os.getenv("CATALOG_CACHE_TTL_SECONDS", 300)
+    CATALOG_CACHE_CONTROL: str = os.getenv(
+        "CATALOG_CACHE_CONTROL", "public, max-age=60")
+
     DB_HOST: str = os.getenv("POSTGRES_HOST")
     DB_PORT: int = os.getenv("POSTGRES_PORT")
     DB_USER: str = os.getenv("POSTGRES_USER")
     DB_PASSWORD: str = os.getenv("POSTGRES_PASSWORD")
     DB_NAME: str = os.getenv("POSTGRES_DB")
+    DB_POOL_SIZE: int = os.getenv("POSTGRES_POOL_SIZE", 5)
+    DB_POOL_MAX_OVERFLOW: int = os.getenv("POSTGRES_POOL_MAX_OVERFLOW", 10)
+    DB_POOL_TIMEOUT: float = os.getenv("POSTGRES_POOL_TIMEOUT", 30)
+    DB_POOL_RECYCLE: int = os.getenv("POSTGRES_POOL_RECYCLE", 1800)
+    DB_POOL_PRE_PING: bool = os.getenv("POSTGRES_POOL_PRE_PING", True)
+    DB_STATEMENT_TIMEOUT_MS: int = os.getenv("POSTGRES_STATEMENT_TIMEOUT_MS", 0)
+    # Requests running more statements, or the same one more times (likely
+    # an N+1), are logged and counted; 0 disables the check
+    DB_QUERIES_WARNING_THRESHOLD: int = os.getenv(
+        "DB_QUERIES_WARNING_THRESHOLD", 20)
+    DB_REPEATED_QUERY_WARNING_THRESHOLD: int = os.getenv(
+        "DB_REPEATED_QUERY_WARNING_THRESHOLD", 5)
+
+    # Prometheus scrape endpoint, served outside of /api without
+    # authentication: keep it off the public network
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", True)
+    METRICS_PATH: str = os.getenv("METRICS_PATH", "/metrics")
 
 settings = Settings()
@@ -7,20 +7,21 @@ from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 
 from app.api.common.errors import InvalidCredentialsError
+from app.core.cache import principal_cache
 from app.core.config import settings
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import CredentialsPost, Token, TokenData, UserProfile
 from app.services.user_profile import _get_full_user_profile_from_db
-from app.utils.secrets import verify_password
+from app.utils.secrets import async_verify_password
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def authenticate_user(
+async def authenticate_user(
     user_profile: UserProfile,
     credentials_post: CredentialsPost
 ) -> UserProfile:
-    if not verify_password(
+    if not await async_verify_password(
         credentials_post.password, user_profile.password
     ):
         return False
@@ -29,7 +30,7 @@ def authenticate_user(
 
 async def get_current_user_profile(
     token: Annotated[str, Depends(oauth2_scheme)],
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> UserProfile:
     try:
         payload = jwt.decode(
@@ -40,8 +41,12 @@ async def get_current_user_profile(
         token_data = TokenData(id=id)
     except InvalidTokenError:
         raise InvalidCredentialsError()
-    user_profile = await _get_full_user_profile_from_db(
-        id=token_data.id, session=session)
+    cache_key = f"{token_data.id}:{payload.get('iat')}"
+    # A profile updated or deleted while it was loading isn't cached
+    user_profile = await principal_cache.read_through(
+        cache_key,
+        lambda: _get_full_user_profile_from_db(
+            id=token_data.id, session=session))
     if user_profile is None:
         raise InvalidCredentialsError()
     return user_profile
@@ -0,0 +1,149 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple, Union
+
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(Counter):
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        labelnames: Sequence[str] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> Dict[Tuple[str, ...], Tuple[List[int], float, int]]:
+        # Cumulative bucket counts (+Inf last), sum and count per label set
+        with self._lock:
+            snapshot = {
+                key: (list(series[0]), series[1], series[2])
+                for key, series in self._values.items()}
+        for key, (bucket_counts, total, count) in snapshot.items():
+            cumulative = 0
+            for index, bucket_count in enumerate(bucket_counts):
+                cumulative += bucket_count
+                bucket_counts[index] = cumulative
+        return snapshot
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+# name -> metric, in registration order
+_registry: Dict[str, Metric] = {}
+
+
+def _register(metric: Metric) -> None:
+    if metric.name in _registry:
+        raise ValueError(f"Metric {metric.name} is already registered")
+    _registry[metric.name] = metric
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labelnames: Sequence[str], key: Sequence[str]) -> str:
+    if not labelnames:
+        return ""
+    labels = ",".join(
+        '{}="{}"'.format(name, value.replace("\\", "\\\\")
+                         .replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in zip(labelnames, key))
+    return "{" + labels + "}"
+
+
+def render_metrics() -> str:
+    # Prometheus text exposition format (0.0.4)
+    lines = []
+    for metric in _registry.values():
+        metric_type = "histogram" if isinstance(metric, Histogram) else \
+            "gauge" if isinstance(metric, Gauge) else "counter"
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric_type}")
+        if metric_type != "histogram":
+            for key, value in sorted(metric.samples().items()):
+                lines.append(
+                    f"{metric.name}{_format_labels(metric.labelnames, key)} "
+                    f"{_format_value(value)}")
+            continue
+
+        labelnames = metric.labelnames + ("le",)
+        upper_bounds = [_format_value(bucket) for bucket in metric.buckets]
+        for key, (bucket_counts, total, count) in sorted(
+                metric.samples().items()):
+            for upper_bound, bucket_count in zip(
+                    upper_bounds + ["+Inf"], bucket_counts):
+                lines.append(
+                    f"{metric.name}_bucket"
+                    f"{_format_labels(labelnames, key + (upper_bound,))} "
+                    f"{bucket_count}")
+            labels = _format_labels(metric.labelnames, key)
+            lines.append(f"{metric.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{metric.name}_count{labels} {count}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,103 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import Gauge, Histogram
+from app.db.queries import (
+    record_query_statistics, start_query_statistics, stop_query_statistics)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+HTTP_REQUEST_DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25,
+    0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight",
+    "Requests being served",
+    labelnames=("method",))
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request, body included, by route template and status "
+    "class (2xx, 4xx, 5xx...); its count gives the request and error rates",
+    buckets=HTTP_REQUEST_DURATION_BUCKETS,
+    labelnames=("method", "route", "status_class"))
+
+
+def get_route_template(scope: Scope) -> str:
+    # Set by the router once a route matched, e.g. /api/v1/banks/{id}; raw
+    # paths would give a label per resource id
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class QueryStatisticsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware, which runs the endpoint
+    # in another task and would lose the request's statistics
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        query_statistics, token = start_query_statistics()
+
+        async def send_with_query_statistics(message: Message) -> None:
+            # Statements run while streaming the body come after the
+            # headers, so they only show up in the metrics
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Query-Count", str(query_statistics.count))
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={query_statistics.duration * 1000:.1f};'
+                    f'desc="{query_statistics.count} queries"')
+            await send(message)
+
+        try:
+            await self.app(
+                scope, receive,
+                send_with_query_statistics if settings.DEBUG else send)
+        finally:
+            stop_query_statistics(token)
+            record_query_statistics(
+                scope["method"], get_route_template(scope), query_statistics)
+
+
+class MetricsMiddleware:
+    # Plain ASGI as well: a couple of clock reads and counter updates per
+    # request, so it can stay on in production
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        # Unhandled exceptions become a 500 further out, without our send
+        # seeing it
+        status_code = 500
+
+        async def send_with_status_code(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method=method)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status_code)
+        finally:
+            http_request_duration_seconds.observe(
+                time.perf_counter() - started_at,
+                method=method,
+                route=get_route_template(scope),
+                status_class=f"{status_code // 100}xx")
+            http_requests_in_flight.dec(method=method)
@@ -1,24 +1,105 @@
 from typing import Annotated
 
 from fastapi import Depends
-from sqlmodel import create_engine, Session, SQLModel
+from sqlalchemy import Float, Numeric, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.schema import CreateColumn
+from sqlmodel import create_engine, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 import app.db.models
 from app.core.config import settings
+from app.db.pool import InstrumentedAsyncAdaptedQueuePool
+from app.db.queries import instrument_queries
 
 
 DB_CONNECTION_STRING = "postgresql://{}:{}@{}:{}/{}".format(
     settings.DB_USER, settings.DB_PASSWORD,
     settings.DB_HOST, settings.DB_PORT, settings.DB_NAME)
 
+ASYNC_DB_CONNECTION_STRING = "postgresql+asyncpg://{}:{}@{}:{}/{}".format(
+    settings.DB_USER, settings.DB_PASSWORD,
+    settings.DB_HOST, settings.DB_PORT, settings.DB_NAME)
+
+# Synchronous engine, used by standalone scripts (e.g. bootstrap.py)
 engine = create_engine(DB_CONNECTION_STRING)
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+
+def _get_async_connect_args() -> dict:
+    server_settings = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(
+            settings.DB_STATEMENT_TIMEOUT_MS)
+    return dict(server_settings=server_settings)
+
+
+# Asynchronous engine, used by the API so that queries don't block the event loop
+async_engine = create_async_engine(
+    ASYNC_DB_CONNECTION_STRING,
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=_get_async_connect_args())
+# Statements and their time are counted per request
+instrument_queries(async_engine.sync_engine)
+
+
+def _add_missing_columns(connection, table):
+    existing_columns = {
+        column["name"] for column in inspect(connection).get_columns(table.name)}
+    for column in table.columns:
+        if column.name in existing_columns:
+            continue
+        connection.execute(text("ALTER TABLE {} ADD COLUMN {}".format(
+            connection.dialect.identifier_preparer.format_table(table),
+            CreateColumn(column).compile(dialect=connection.dialect))))
+
+
+def _convert_float_columns(connection, table):
+    # Amounts used to be stored as double precision; convert them in place
+    # to the fixed-point type they are declared with now
+    existing_columns = {
+        column["name"]: column["type"]
+        for column in inspect(connection).get_columns(table.name)}
+    for column in table.columns:
+        existing_type = existing_columns.get(column.name)
+        if not isinstance(column.type, Numeric) or \
+                isinstance(column.type, Float) or \
+                not isinstance(existing_type, Float):
+            continue
+        connection.execute(text(
+            "ALTER TABLE {table} ALTER COLUMN {column} TYPE {type} "
+            "USING round({column}::numeric, {scale})".format(
+                table=connection.dialect.identifier_preparer.format_table(table),
+                column=connection.dialect.identifier_preparer.format_column(column),
+                type=column.type.compile(dialect=connection.dialect),
+                scale=column.type.scale or 0)))
+
+
+def _create_all(connection):
+    SQLModel.metadata.create_all(connection)
+    # create_all skips existing tables, so bring columns and indexes declared
+    # later on up to date (new columns need a server default or must be nullable)
+    for table in SQLModel.metadata.sorted_tables:
+        _add_missing_columns(connection, table)
+        _convert_float_columns(connection, table)
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+async def create_db_and_tables():
+    async with async_engine.begin() as connection:
+        await connection.run_sync(_create_all)
 
 
-def get_session():
-    with Session(engine) as session:
+async def get_async_session():
+    # Objects keep their state after commit: every value is generated on
+    # the client or returned by the write itself, so reloading them would
+    # only cost a SELECT per object
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
 
-SessionDep = Annotated[Session, Depends(get_session)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
@@ -1,12 +1,15 @@
 from .auth import *
 from .bank import *
 from .bank_account import *
+from .idempotency_key import *
 from.insurance_policy import *
 from .insurance_policy_product import *
 from .investment import *
 from .investment_product import *
+from .ledger import *
 from .loan import *
 from .loan_product import *
+from .statement import *
 from .token import *
 from .transaction import *
 from .user import *
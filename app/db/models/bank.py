@@ -5,6 +5,8 @@ from typing import Optional
 
 from sqlmodel import Field, SQLModel
 
+from app.db.models.version import Versioned
+
 
 def _generate_random_swift_code() -> str:
     length = random.randint(8, 16)
@@ -21,7 +23,7 @@ class BanksPost(BankPut):
     phone: str
 
 
-class Bank(BanksPost, table=True):
+class Bank(Versioned, BanksPost, table=True):
     __tablename__ = "bank"
 
     id: uuid.UUID = Field(
@@ -2,10 +2,14 @@ import random
 import string
 import uuid
 from datetime import datetime
+from decimal import Decimal
 from typing import Optional
 
 from sqlmodel import Field, SQLModel
 
+from app.db.models.money import Money, MoneyType
+from app.db.models.version import Versioned
+
 
 def _generate_random_iban_code() -> str:
     length = random.randint(10, 34)
@@ -39,7 +43,7 @@ class BankAccountsPost(BankAccountPut):
         max_length=3)
 
 
-class BankAccount(BankAccountsPost, table=True):
+class BankAccount(Versioned, BankAccountsPost, table=True):
     __tablename__ = "bank_account"
 
     id: uuid.UUID = Field(
@@ -58,8 +62,8 @@ class BankAccount(BankAccountsPost, table=True):
         schema_extra=dict(
             validation_alias="accountNumber",
             serialization_alias="accountNumber"))
-    balance: Optional[float] = Field(
-        default=0.00)
+    balance: Optional[Money] = Field(
+        default=Decimal("0.00"), sa_type=MoneyType)
     created_at: datetime = Field(
         default_factory=datetime.utcnow,
         alias="createdAt",
@@ -0,0 +1,19 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class IdempotencyKey(SQLModel, table=True):
+    # Keys are scoped to the user that sent them; a key without a response
+    # is held by a request still in progress
+    __tablename__ = "idempotency_key"
+
+    user_profile_id: uuid.UUID = Field(primary_key=True)
+    key: str = Field(primary_key=True, max_length=255)
+    request_hash: str = Field(max_length=64)
+    # JSON encoded response body
+    response: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
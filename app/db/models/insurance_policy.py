@@ -7,6 +7,7 @@ from pydantic import field_validator
 from sqlmodel import Column, Field, SQLModel
 from sqlmodel import Enum as SQLEnum
 
+from app.db.models.version import Versioned
 from app.utils.dates import string_to_date
 
 
@@ -57,7 +58,7 @@ class InsurancePoliciesPost(SQLModel):
         return value
 
 
-class InsurancePolicy(InsurancePoliciesPost, table=True):
+class InsurancePolicy(Versioned, InsurancePoliciesPost, table=True):
     __tablename__ = "insurance_policy"
 
     id: uuid.UUID = Field(
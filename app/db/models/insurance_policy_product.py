@@ -2,9 +2,11 @@ import uuid
 from enum import Enum
 from typing import Optional
 
-from pydantic import field_validator
 from sqlmodel import Field, SQLModel
 
+from app.db.models.money import Money, MoneyType
+from app.db.models.version import Versioned
+
 
 class InsurancePolicyProductType(str, Enum):
     CAR = 'Car'
@@ -14,44 +16,37 @@ class InsurancePolicyProductType(str, Enum):
 
 class InsurancePolicyProductPut(SQLModel):
     name: Optional[str] = Field(None)
-    annual_premium: Optional[float] = Field(
-        None,
+    annual_premium: Optional[Money] = Field(
+        None, sa_type=MoneyType,
         alias="annualPremium",
         schema_extra=dict(
             validation_alias="annualPremium",
             serialization_alias="annualPremium"))
-    coverage_cap: Optional[float] = Field(
-        None,
+    coverage_cap: Optional[Money] = Field(
+        None, sa_type=MoneyType,
         alias="coverageCap",
         schema_extra=dict(
             validation_alias="coverageCap",
             serialization_alias="coverageCap"))
-    
-    @field_validator("annual_premium", "coverage_cap", mode="before")
-    def round_decimals(cls, value):
-        if isinstance(value, float):
-            return round(value, 2)
-        return value
-
 
 class InsurancePolicyProductsPost(InsurancePolicyProductPut):
     type: InsurancePolicyProductType
     name: str
-    annual_premium: float = Field(
-        ...,
+    annual_premium: Money = Field(
+        ..., sa_type=MoneyType,
         alias="annualPremium",
         schema_extra=dict(
             validation_alias="annualPremium",
             serialization_alias="annualPremium"))
-    coverage_cap: float = Field(
-        ...,
+    coverage_cap: Money = Field(
+        ..., sa_type=MoneyType,
         alias="coverageCap",
         schema_extra=dict(
             validation_alias="coverageCap",
             serialization_alias="coverageCap"))
 
 
-class InsurancePolicyProduct(InsurancePolicyProductsPost, table=True):
+class InsurancePolicyProduct(Versioned, InsurancePolicyProductsPost, table=True):
     __tablename__ = "insurance_policy_product"
 
     id: uuid.UUID = Field(
@@ -7,6 +7,8 @@ from pydantic import field_validator
 from sqlmodel import Column, Field, SQLModel
 from sqlmodel import Enum as SQLEnum
 
+from app.db.models.money import Money, MoneyType
+from app.db.models.version import Versioned
 from app.utils.dates import string_to_date
 
 
@@ -21,7 +23,7 @@ class InvestmentAction(str, Enum):
 
 
 class InvestmentsPost(SQLModel):
-    amount: float
+    amount: Money = Field(sa_type=MoneyType)
     start_date: Optional[datetime] = Field(
         default_factory=datetime.utcnow,
         alias="startDate",
@@ -50,12 +52,6 @@ class InvestmentsPost(SQLModel):
             validation_alias="bankAccountId",
             serialization_alias="bankAccountId"))
     
-    @field_validator("amount", mode="before")
-    def round_decimals(cls, value):
-        if isinstance(value, float):
-            return round(value, 2)
-        return value
-
     @field_validator("start_date", "end_date", mode="before")
     @classmethod
     def parse_date(cls, value):
@@ -64,7 +60,7 @@ class InvestmentsPost(SQLModel):
         return value
 
 
-class Investment(InvestmentsPost, table=True):
+class Investment(Versioned, InvestmentsPost, table=True):
     __tablename__ = "investment"
 
     id: uuid.UUID = Field(
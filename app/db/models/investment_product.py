@@ -2,9 +2,11 @@ import uuid
 from enum import Enum
 from typing import Optional
 
-from pydantic import field_validator
 from sqlmodel import Field, SQLModel
 
+from app.db.models.money import Percentage, PercentageType
+from app.db.models.version import Versioned
+
 
 class InvestmentProductType(str, Enum):
     ACTION = 'Action'
@@ -17,22 +19,16 @@ class InvestmentProductType(str, Enum):
 
 class InvestmentProductPut(SQLModel):
     name: Optional[str] = Field(None)
-    rate: Optional[float] = Field(None)
-
-    @field_validator("rate", mode="before")
-    def round_decimals(cls, value):
-        if isinstance(value, float):
-            return round(value, 2)
-        return value
+    rate: Optional[Percentage] = Field(None, sa_type=PercentageType)
 
 
 class InvestmentProductsPost(InvestmentProductPut):
     type: InvestmentProductType
     name: str
-    rate: float
+    rate: Percentage = Field(sa_type=PercentageType)
 
 
-class InvestmentProduct(InvestmentProductsPost, table=True):
+class InvestmentProduct(Versioned, InvestmentProductsPost, table=True):
     __tablename__ = "investment_product"
 
     id: uuid.UUID = Field(
@@ -0,0 +1,117 @@
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import BigInteger, Column, Identity
+from sqlmodel import Field, Index, SQLModel
+
+from app.db.models.money import Money, MoneyType
+
+
+class LedgerAccount(str, Enum):
+    BANK_ACCOUNT = "BankAccount"
+    EXTERNAL = "External"
+    FEES = "Fees"
+    INVESTMENTS = "Investments"
+    INSURANCE_PREMIUMS = "InsurancePremiums"
+    OPENING_BALANCES = "OpeningBalances"
+
+
+class LedgerReferenceType(str, Enum):
+    TRANSACTION = "Transaction"
+    INVESTMENT = "Investment"
+    INSURANCE_POLICY = "InsurancePolicy"
+    OPENING_BALANCE = "OpeningBalance"
+
+
+class LedgerEntry(SQLModel, table=True):
+    # Append-only: every posting writes one entry per leg and the legs of a
+    # posting sum to zero; bank account balances are their projection
+    __tablename__ = "ledger_entry"
+    __table_args__ = (
+        Index(
+            "ix_ledger_entry_bank_account_id_created_at",
+            "bank_account_id", "created_at"),
+        Index(
+            "ix_ledger_entry_bank_account_id_sequence_number",
+            "bank_account_id", "sequence_number"),
+    )
+
+    id: uuid.UUID = Field(
+        default_factory=uuid.uuid4, primary_key=True)
+    # Assigned on insert. Postings lock the bank accounts they move until
+    # they commit, so an account's entries commit in this order
+    sequence_number: Optional[int] = Field(
+        default=None,
+        sa_column=Column(BigInteger, Identity(), nullable=False))
+    reference_type: LedgerReferenceType = Field(
+        alias="referenceType",
+        schema_extra=dict(
+            validation_alias="referenceType",
+            serialization_alias="referenceType"))
+    reference_id: uuid.UUID = Field(
+        index=True,
+        alias="referenceId",
+        schema_extra=dict(
+            validation_alias="referenceId",
+            serialization_alias="referenceId"))
+    account: LedgerAccount
+    bank_account_id: Optional[uuid.UUID] = Field(
+        default=None,
+        foreign_key="bank_account.id",
+        alias="bankAccountId",
+        schema_extra=dict(
+            validation_alias="bankAccountId",
+            serialization_alias="bankAccountId"))
+    # Signed: credits to the account are positive, debits negative
+    amount: Money = Field(sa_type=MoneyType)
+    # Running balance of the bank account, set on its legs only
+    balance_after: Optional[Money] = Field(
+        default=None,
+        sa_type=MoneyType,
+        alias="balanceAfter",
+        schema_extra=dict(
+            validation_alias="balanceAfter",
+            serialization_alias="balanceAfter"))
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        alias="createdAt",
+        schema_extra=dict(
+            validation_alias="createdAt",
+            serialization_alias="createdAt"))
+
+
+class BalanceSnapshot(SQLModel, table=True):
+    # Balance of a bank account including every one of its entries up to
+    # last_sequence_number; taken_at is the latest of their created_at
+    __tablename__ = "balance_snapshot"
+    __table_args__ = (
+        Index(
+            "ix_balance_snapshot_bank_account_id_taken_at",
+            "bank_account_id", "taken_at"),
+    )
+
+    id: uuid.UUID = Field(
+        default_factory=uuid.uuid4, primary_key=True)
+    bank_account_id: uuid.UUID = Field(
+        foreign_key="bank_account.id",
+        alias="bankAccountId",
+        schema_extra=dict(
+            validation_alias="bankAccountId",
+            serialization_alias="bankAccountId"))
+    balance: Money = Field(sa_type=MoneyType)
+    taken_at: datetime = Field(
+        alias="takenAt",
+        schema_extra=dict(
+            validation_alias="takenAt",
+            serialization_alias="takenAt"))
+    # Null for snapshots taken before entries were numbered, which are
+    # ignored
+    last_sequence_number: Optional[int] = Field(
+        default=None,
+        sa_type=BigInteger,
+        alias="lastSequenceNumber",
+        schema_extra=dict(
+            validation_alias="lastSequenceNumber",
+            serialization_alias="lastSequenceNumber"))
@@ -7,6 +7,7 @@ from pydantic import field_validator
 from sqlmodel import Column, Field, SQLModel
 from sqlmodel import Enum as SQLEnum
 
+from app.db.models.money import Money, MoneyType
 from app.utils.dates import string_to_date
 
 
@@ -16,7 +17,7 @@ class LoanStatus(str, Enum):
 
 
 class LoansPost(SQLModel):
-    amount: float
+    amount: Money = Field(sa_type=MoneyType)
     start_date: Optional[datetime] = Field(
         default_factory=datetime.utcnow,
         alias="startDate",
@@ -45,13 +46,6 @@ class LoansPost(SQLModel):
             validation_alias="bankAccountId",
             serialization_alias="bankAccountId"))
 
-    @field_validator("amount", mode="before")
-    @classmethod
-    def round_decimals(cls, value):
-        if isinstance(value, float):
-            return round(value, 2)
-        return value
-
     @field_validator("start_date", "end_date", mode="before")
     @classmethod
     def parse_date(cls, value):
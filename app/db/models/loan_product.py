@@ -2,9 +2,11 @@ import uuid
 from enum import Enum
 from typing import Optional
 
-from pydantic import field_validator
 from sqlmodel import Field, SQLModel
 
+from app.db.models.money import Percentage, PercentageType
+from app.db.models.version import Versioned
+
 
 class LoanProductType(str, Enum):
     PERSONAL_LOAN = 'PersonalLoan'
@@ -14,22 +16,16 @@ class LoanProductType(str, Enum):
 
 class LoanProductPut(SQLModel):
     name: Optional[str] = Field(None)
-    rate: Optional[float] = Field(None)
-
-    @field_validator("rate", mode="before")
-    def round_decimals(cls, value):
-        if isinstance(value, float):
-            return round(value, 2)
-        return value
+    rate: Optional[Percentage] = Field(None, sa_type=PercentageType)
 
 
 class LoanProductsPost(LoanProductPut):
     type: LoanProductType
     name: str
-    rate: float
+    rate: Percentage = Field(sa_type=PercentageType)
 
 
-class LoanProduct(LoanProductsPost, table=True):
+class LoanProduct(Versioned, LoanProductsPost, table=True):
     __tablename__ = "loan_product"
 
     id: uuid.UUID = Field(
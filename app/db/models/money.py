@@ -0,0 +1,73 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from typing import Any
+
+from pydantic import GetCoreSchemaHandler
+from pydantic_core import core_schema
+from sqlalchemy import Numeric
+
+MONEY_PRECISION = 18
+MONEY_SCALE = 2
+PERCENTAGE_PRECISION = 7
+PERCENTAGE_SCALE = 2
+
+# Column types; pass as sa_type on Field declarations
+MoneyType = Numeric(MONEY_PRECISION, MONEY_SCALE)
+PercentageType = Numeric(PERCENTAGE_PRECISION, PERCENTAGE_SCALE)
+
+
+def _quantize(value: Any, scale: int) -> Any:
+    if isinstance(value, bool) or \
+            not isinstance(value, (int, float, str, Decimal)):
+        return value
+    try:
+        # Floats go through their shortest repr, so 0.1 stays 0.1
+        if isinstance(value, float):
+            value = repr(value)
+        return Decimal(value).quantize(
+            Decimal(1).scaleb(-scale), rounding=ROUND_HALF_EVEN)
+    except (InvalidOperation, ValueError):
+        # Left for pydantic to reject with a proper validation error
+        return value
+
+
+def to_money(value: Any) -> Decimal:
+    return _quantize(value, MONEY_SCALE)
+
+
+def to_percentage(value: Any) -> Decimal:
+    return _quantize(value, PERCENTAGE_SCALE)
+
+
+class _FixedPoint(Decimal):
+    # Validates to a Decimal rounded half-even to the given scale, within
+    # its column's precision. JSON renders it as a decimal string with
+    # exactly that scale, e.g. "1234.50": a JSON number would go through a
+    # binary float in most clients. Numbers are still accepted as input
+    precision: int
+    scale: int
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        scale = cls.scale
+        return core_schema.no_info_before_validator_function(
+            lambda value: _quantize(value, scale),
+            core_schema.decimal_schema(
+                allow_inf_nan=False, max_digits=cls.precision,
+                decimal_places=scale),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda value: f"{_quantize(value, scale):f}",
+                return_schema=core_schema.str_schema(
+                    pattern=rf"^-?\d+\.\d{{{scale}}}$"),
+                when_used="json"))
+
+
+class Money(_FixedPoint):
+    precision = MONEY_PRECISION
+    scale = MONEY_SCALE
+
+
+class Percentage(_FixedPoint):
+    precision = PERCENTAGE_PRECISION
+    scale = PERCENTAGE_SCALE
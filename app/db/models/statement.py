@@ -0,0 +1,47 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from sqlmodel import Field, SQLModel
+
+from app.db.models.money import Money, MoneyType
+
+
+class StatementRollup(SQLModel, table=True):
+    # Monthly totals of a bank account, kept up to date at posting time
+    __tablename__ = "statement_rollup"
+
+    bank_account_id: uuid.UUID = Field(
+        foreign_key="bank_account.id",
+        primary_key=True,
+        alias="bankAccountId",
+        schema_extra=dict(
+            validation_alias="bankAccountId",
+            serialization_alias="bankAccountId"))
+    # First day of the month
+    month: date = Field(primary_key=True)
+    opening_balance: Money = Field(
+        sa_type=MoneyType,
+        alias="openingBalance",
+        schema_extra=dict(
+            validation_alias="openingBalance",
+            serialization_alias="openingBalance"))
+    closing_balance: Money = Field(
+        sa_type=MoneyType,
+        alias="closingBalance",
+        schema_extra=dict(
+            validation_alias="closingBalance",
+            serialization_alias="closingBalance"))
+    inflows: Money = Field(
+        default=Decimal("0.00"), sa_type=MoneyType)
+    # Fees included
+    outflows: Money = Field(
+        default=Decimal("0.00"), sa_type=MoneyType)
+    fees: Money = Field(
+        default=Decimal("0.00"), sa_type=MoneyType)
+    postings_count: int = Field(
+        default=0,
+        alias="postingsCount",
+        schema_extra=dict(
+            validation_alias="postingsCount",
+            serialization_alias="postingsCount"))
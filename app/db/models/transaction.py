@@ -1,10 +1,13 @@
 import uuid
 from enum import Enum
 from datetime import datetime
+from decimal import Decimal
 from typing import Optional
 
-from pydantic import model_validator, field_validator
-from sqlmodel import Field, SQLModel
+from pydantic import model_validator
+from sqlmodel import Field, Index, SQLModel
+
+from app.db.models.money import Money, MoneyType, Percentage, PercentageType
 
 
 import logging
@@ -17,10 +20,11 @@ class TransactionType(str, Enum):
 
 
 class TransactionsPost(SQLModel):
-    amount: float
+    amount: Money = Field(sa_type=MoneyType)
     description: str
     type: TransactionType
-    fee: Optional[float] = Field(0.00)
+    fee: Optional[Percentage] = Field(
+        Decimal("0.00"), sa_type=PercentageType)
     source_account_id: Optional[uuid.UUID] = Field(
         default=None,
         foreign_key="bank_account.id",
@@ -38,12 +42,6 @@ class TransactionsPost(SQLModel):
             validation_alias="destinationAccountId",
             serialization_alias="destinationAccountId"))
     
-    @field_validator("amount", "fee", mode="before")
-    def round_decimals(cls, value):
-        if isinstance(value, float):
-            return round(value, 2)
-        return value
-
 
     @model_validator(mode="after")
     def check_transaction_type_validity(self):
@@ -67,6 +65,15 @@ class TransactionsPost(SQLModel):
 
 class Transaction(TransactionsPost, table=True):
     __tablename__ = "transaction"
+    __table_args__ = (
+        # Account history is read newest first, one index range per side
+        Index(
+            "ix_transaction_source_account_id_created_at",
+            "source_account_id", "created_at", "id"),
+        Index(
+            "ix_transaction_destination_account_id_created_at",
+            "destination_account_id", "created_at", "id"),
+    )
 
     id: uuid.UUID = Field(
         default_factory=uuid.uuid4, primary_key=True)
@@ -1,18 +1,21 @@
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import ClassVar, Optional, Tuple
 
 from sqlmodel import Field, SQLModel
 
 from app.db.models import CredentialsPost, UsersPost
+from app.db.models.version import Versioned
 
 
 class UserProfilesPost(CredentialsPost, UsersPost):
     pass
 
 
-class UserProfile(CredentialsPost, table=True):
+class UserProfile(Versioned, CredentialsPost, table=True):
     __tablename__ = "user_profile"
+    # last_login is written on every login without a version bump
+    unversioned_fields: ClassVar[Tuple[str, ...]] = ("last_login",)
 
     id: uuid.UUID = Field(
         default_factory=uuid.uuid4, primary_key=True)
@@ -36,6 +39,8 @@ class UserProfile(CredentialsPost, table=True):
 
 
 class UserProfileWithUserData(SQLModel):
+    unversioned_fields: ClassVar[Tuple[str, ...]] = ("last_login",)
+
     id: uuid.UUID
     email: str
     last_login: Optional[datetime] = Field(
@@ -74,4 +79,5 @@ class UserProfileWithUserData(SQLModel):
         None,
         alias="birthCity",
         schema_extra=dict(
-            serialization_alias="birthCity"))
\ No newline at end of file
+            serialization_alias="birthCity"))
+    version: int
\ No newline at end of file
@@ -0,0 +1,17 @@
+from sqlalchemy.orm import declared_attr
+from sqlmodel import Field, SQLModel
+
+
+class Versioned(SQLModel):
+    # Bumped on every UPDATE, which SQLAlchemy issues as
+    # "... WHERE id = :id AND version = :version" and fails with
+    # StaleDataError when another writer got there first
+    version: int = Field(
+        default=1,
+        sa_column_kwargs=dict(server_default="1"))
+
+    @declared_attr.directive
+    def __mapper_args__(cls) -> dict:
+        # Server defaults come back with RETURNING instead of a reload
+        return dict(
+            version_id_col=cls.__table__.c.version, eager_defaults=True)
@@ -0,0 +1,185 @@
+import base64
+import json
+import math
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi_pagination import resolve_params
+from fastapi_pagination.ext.sqlalchemy import paginate as paginate_by_offset
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql import Select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.common.errors import InvalidCursorError
+from app.api.common.schemas.pagination import (
+    Page, PaginationMode, Params, TotalMode)
+from app.core.config import settings
+
+CURSOR_DIRECTION_NEXT = "next"
+CURSOR_DIRECTION_PREVIOUS = "prev"
+
+
+def _encode_cursor_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _decode_cursor_value(column: InstrumentedAttribute, value: Any) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    return python_type(value)
+
+
+def encode_cursor(
+    item: Any, keyset: Sequence[InstrumentedAttribute], direction: str
+) -> str:
+    payload = dict(
+        d=direction,
+        k=[_encode_cursor_value(getattr(item, column.key)) for column in keyset])
+    return base64.urlsafe_b64encode(
+        json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(
+    cursor: str, keyset: Sequence[InstrumentedAttribute]
+) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        direction, values = payload["d"], payload["k"]
+        if direction not in (CURSOR_DIRECTION_NEXT, CURSOR_DIRECTION_PREVIOUS) \
+                or len(values) != len(keyset):
+            raise ValueError(cursor)
+        return direction, [
+            _decode_cursor_value(column, value)
+            for column, value in zip(keyset, values)]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursorError()
+
+
+async def _paginate_by_cursor(
+    session: AsyncSession,
+    query: Select,
+    keyset: Sequence[InstrumentedAttribute],
+    descending: bool,
+    params: Params
+) -> Page:
+    direction, values = CURSOR_DIRECTION_NEXT, None
+    if params.cursor:
+        direction, values = decode_cursor(params.cursor, keyset)
+
+    # Walking backwards means flipping both the comparison and the ordering,
+    # then reversing the fetched rows
+    backwards = direction == CURSOR_DIRECTION_PREVIOUS
+    ascending = descending == backwards
+    if values is not None:
+        keyset_tuple, values_tuple = tuple_(*keyset), tuple_(*values)
+        query = query.where(
+            keyset_tuple > values_tuple if ascending
+            else keyset_tuple < values_tuple)
+    query = query \
+        .order_by(None) \
+        .order_by(*[
+            column.asc() if ascending else column.desc()
+            for column in keyset]) \
+        .limit(params.size + 1)
+
+    items: List[Any] = list((await session.scalars(query)).all())
+    has_more = len(items) > params.size
+    items = items[:params.size]
+    if backwards:
+        items.reverse()
+
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+    if items:
+        if has_more or backwards:
+            next_cursor = encode_cursor(
+                items[-1], keyset, CURSOR_DIRECTION_NEXT)
+        if (has_more and backwards) or (values is not None and not backwards):
+            previous_cursor = encode_cursor(
+                items[0], keyset, CURSOR_DIRECTION_PREVIOUS)
+
+    return Page[Any](
+        items=items,
+        total=None,
+        page=None,
+        size=params.size,
+        pages=None,
+        next_cursor=next_cursor,
+        previous_cursor=previous_cursor)
+
+
+async def _count_estimated(session: AsyncSession, query: Select) -> int:
+    # Planner row estimate, no scan of the filtered set
+    compiled_query = query.compile(
+        dialect=session.bind.dialect,
+        compile_kwargs=dict(literal_binds=True))
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled_query}")
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def _count_capped(
+    session: AsyncSession, query: Select, cap: int
+) -> int:
+    capped_query = query.order_by(None).limit(cap + 1).subquery()
+    return await session.scalar(
+        select(func.count()).select_from(capped_query))
+
+
+async def _paginate_by_offset(
+    session: AsyncSession,
+    query: Select,
+    total_mode: TotalMode,
+    params: Params
+) -> Page:
+    params = params.model_copy(update=dict(total_mode=total_mode))
+    page: Page = await paginate_by_offset(session, query, params=params)
+
+    if total_mode is TotalMode.EXACT:
+        return page.model_copy(update=dict(total_exact=True))
+    if total_mode is TotalMode.NONE:
+        return page
+
+    if total_mode is TotalMode.ESTIMATED:
+        total = await _count_estimated(session, query)
+        total_exact = False
+    else:
+        cap = settings.PAGINATION_TOTAL_CAP
+        total = await _count_capped(session, query, cap)
+        total_exact = total <= cap
+        total = min(total, cap)
+    # A page's own rows are a lower bound the estimate must not undercut
+    total = max(total, (params.page - 1) * params.size + len(page.items))
+    return page.model_copy(update=dict(
+        total=total,
+        total_exact=total_exact,
+        pages=math.ceil(total / params.size)))
+
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    keyset: Sequence[InstrumentedAttribute],
+    descending: bool = False,
+    default_total_mode: Optional[TotalMode] = None
+) -> Page:
+    params: Params = resolve_params()
+    if params.pagination_mode is PaginationMode.CURSOR:
+        return await _paginate_by_cursor(
+            session, query, keyset, descending, params)
+    total_mode = params.total_mode or default_total_mode or \
+        TotalMode(settings.PAGINATION_DEFAULT_TOTAL_MODE)
+    return await _paginate_by_offset(session, query, total_mode, params)
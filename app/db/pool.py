@@ -0,0 +1,58 @@
+import time
+from typing import Any, Dict
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.metrics import Gauge, Histogram
+
+POOL_CHECKOUT_WAIT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+pool_checkout_wait_seconds = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the database pool",
+    buckets=POOL_CHECKOUT_WAIT_BUCKETS)
+db_pool_connections = Gauge(
+    "db_pool_connections",
+    "Database pool connections by state (checked_in, checked_out, "
+    "overflow), updated when metrics are collected",
+    labelnames=("state",))
+db_pool_size = Gauge(
+    "db_pool_size",
+    "Configured database pool size")
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_wait_seconds.observe(
+                time.perf_counter() - started_at)
+
+
+def get_pool_statistics(pool: AsyncAdaptedQueuePool) -> Dict[str, Any]:
+    buckets = [str(bucket) for bucket in pool_checkout_wait_seconds.buckets]
+    bucket_counts, wait_sum, wait_count = \
+        pool_checkout_wait_seconds.samples().get(
+            (), ([0] * (len(buckets) + 1), 0.0, 0))
+    return dict(
+        size=pool.size(),
+        max_overflow=pool._max_overflow,
+        timeout=pool.timeout(),
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        overflow=max(pool.overflow(), 0),
+        checkout_wait=dict(
+            count=wait_count,
+            sum=wait_sum,
+            buckets=dict(zip(buckets + ["+Inf"], bucket_counts))))
+
+
+def update_pool_metrics(pool: AsyncAdaptedQueuePool) -> None:
+    db_pool_size.set(pool.size())
+    db_pool_connections.set(pool.checkedin(), state="checked_in")
+    db_pool_connections.set(pool.checkedout(), state="checked_out")
+    db_pool_connections.set(max(pool.overflow(), 0), state="overflow")
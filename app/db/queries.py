@@ -0,0 +1,149 @@
+import logging
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram
+
+_log = logging.getLogger(__name__)
+
+DB_QUERIES_BUCKETS = (1, 2, 3, 5, 8, 13, 20, 30, 50, 100, 200, 500)
+
+http_request_db_queries = Histogram(
+    "http_request_db_queries",
+    "Database statements run by a request",
+    buckets=DB_QUERIES_BUCKETS,
+    labelnames=("method", "route"))
+http_request_db_duration_seconds = Histogram(
+    "http_request_db_duration_seconds",
+    "Time a request spent running database statements",
+    labelnames=("method", "route"))
+http_requests_flagged = Counter(
+    "http_requests_flagged_total",
+    "Requests over the statements threshold (too_many_queries) or running "
+    "the same statement over and over (repeated_query, likely an N+1)",
+    labelnames=("method", "route", "reason"))
+
+
+class QueryStatistics:
+    __slots__ = ("count", "round_trips", "duration", "statements", "parent")
+
+    def __init__(self, parent: Optional["QueryStatistics"] = None) -> None:
+        self.count = 0
+        # Statements plus BEGIN, COMMIT and ROLLBACK
+        self.round_trips = 0
+        self.duration = 0.0
+        # SQL text -> executions; compiled statements are cached, so the
+        # same query is always the same string
+        self.statements: Dict[str, int] = {}
+        # Statistics started around these ones, e.g. by a benchmark around
+        # a request, count the same statements
+        self.parent = parent
+
+    def get_most_repeated_statement(self) -> Tuple[Optional[str], int]:
+        if not self.statements:
+            return None, 0
+        statement = max(self.statements, key=self.statements.__getitem__)
+        return statement, self.statements[statement]
+
+
+# Set for the duration of a request; statements run outside of one (e.g.
+# background jobs) aren't tracked
+_query_statistics: ContextVar[Optional[QueryStatistics]] = ContextVar(
+    "query_statistics", default=None)
+
+
+def start_query_statistics() -> Tuple[QueryStatistics, Token]:
+    query_statistics = QueryStatistics(parent=_query_statistics.get())
+    return query_statistics, _query_statistics.set(query_statistics)
+
+
+def stop_query_statistics(token: Token) -> None:
+    _query_statistics.reset(token)
+
+
+def _before_cursor_execute(
+    connection, cursor, statement, parameters, context, executemany
+) -> None:
+    if _query_statistics.get() is not None:
+        context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(
+    connection, cursor, statement, parameters, context, executemany
+) -> None:
+    query_statistics = _query_statistics.get()
+    started_at = getattr(context, "_query_started_at", None)
+    if started_at is None:
+        return
+    duration = time.perf_counter() - started_at
+    while query_statistics is not None:
+        query_statistics.count += 1
+        query_statistics.round_trips += 1
+        query_statistics.duration += duration
+        query_statistics.statements[statement] = \
+            query_statistics.statements.get(statement, 0) + 1
+        query_statistics = query_statistics.parent
+
+
+def _count_round_trip(*args, **kwargs) -> None:
+    query_statistics = _query_statistics.get()
+    while query_statistics is not None:
+        query_statistics.round_trips += 1
+        query_statistics = query_statistics.parent
+
+
+def instrument_queries(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    for event_name in ("begin", "commit", "rollback"):
+        event.listen(engine, event_name, _count_round_trip)
+
+
+def record_query_statistics(
+    method: str,
+    route: str,
+    query_statistics: QueryStatistics
+) -> None:
+    http_request_db_queries.observe(
+        query_statistics.count, method=method, route=route)
+    http_request_db_duration_seconds.observe(
+        query_statistics.duration, method=method, route=route)
+
+    if settings.DB_QUERIES_WARNING_THRESHOLD and \
+            query_statistics.count > settings.DB_QUERIES_WARNING_THRESHOLD:
+        http_requests_flagged.inc(
+            method=method, route=route, reason="too_many_queries")
+        _log.warning(
+            f"{method} {route} ran {query_statistics.count} statements "
+            f"in {query_statistics.duration * 1000:.1f} ms "
+            f"(threshold {settings.DB_QUERIES_WARNING_THRESHOLD})")
+
+    statement, executions = query_statistics.get_most_repeated_statement()
+    if settings.DB_REPEATED_QUERY_WARNING_THRESHOLD and \
+            executions > settings.DB_REPEATED_QUERY_WARNING_THRESHOLD:
+        http_requests_flagged.inc(
+            method=method, route=route, reason="repeated_query")
+        _log.warning(
+            f"{method} {route} ran the same statement {executions} times, "
+            f"likely an N+1: {' '.join(statement.split())[:200]}")
+
+
+def get_query_statistics() -> Dict[Tuple[str, str], Dict[str, Any]]:
+    durations = http_request_db_duration_seconds.samples()
+    flagged = http_requests_flagged.samples()
+    statistics = {}
+    for key, (_, queries, requests) in http_request_db_queries.samples().items():
+        _, duration, _ = durations.get(key, (None, 0.0, 0))
+        statistics[key] = dict(
+            requests=requests,
+            queries=int(queries),
+            queries_per_request=queries / requests if requests else 0.0,
+            db_seconds=duration,
+            too_many_queries=int(flagged.get(key + ("too_many_queries",), 0)),
+            repeated_query=int(flagged.get(key + ("repeated_query",), 0)))
+    return statistics
@@ -2,13 +2,24 @@ import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi_pagination import add_pagination
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.api import api_router
-from app.api.common.errors import GenericException
+from app.api.common.errors import GenericException, VersionConflictError
+from app.core.cache import close_cache_backend, start_cache_backend
 from app.core.config import settings
-from app.db import create_db_and_tables
+from app.core.middleware import MetricsMiddleware, QueryStatisticsMiddleware
+from app.db import async_engine, create_db_and_tables
+from app.services import system as system_service
+from app.services.idempotency import (
+    start_idempotency_keys_purge, stop_idempotency_keys_purge)
+from app.services.ledger import (
+    open_bank_account_ledgers, start_balance_snapshots,
+    stop_balance_snapshots)
+from app.services.statement import backfill_statement_rollups
+from app.utils.secrets import shutdown_password_hashing_pool
 
 logging.basicConfig(
     level=logging.DEBUG if settings.DEBUG else logging.INFO,
@@ -22,8 +33,19 @@ logging.basicConfig(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Setup DataBase on app startup
-    create_db_and_tables()
+    await create_db_and_tables()
+    await open_bank_account_ledgers()
+    await backfill_statement_rollups()
+    await start_cache_backend()
+    await start_balance_snapshots()
+    await start_idempotency_keys_purge()
     yield
+    # Release pooled connections on app shutdown
+    await stop_idempotency_keys_purge()
+    await stop_balance_snapshots()
+    await close_cache_backend()
+    await async_engine.dispose()
+    shutdown_password_hashing_pool()
 
 
 app = FastAPI(
@@ -32,6 +54,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 add_pagination(app)
+app.add_middleware(QueryStatisticsMiddleware)
+if settings.METRICS_ENABLED:
+    # Outermost, so that the time spent in the other middlewares counts
+    app.add_middleware(MetricsMiddleware)
 
 
 @app.exception_handler(GenericException)
@@ -44,9 +70,24 @@ async def unicorn_generic_exception_handler(request: Request, exc: GenericExcept
     )
 
 
+@app.exception_handler(StaleDataError)
+async def stale_data_exception_handler(request: Request, exc: StaleDataError):
+    # A version-checked UPDATE matched no row: someone else wrote first
+    return await unicorn_generic_exception_handler(
+        request, VersionConflictError())
+
+
 app.include_router(api_router, prefix="/api")
 
 
+if settings.METRICS_ENABLED:
+    @app.get(settings.METRICS_PATH, include_in_schema=False)
+    async def metrics_get() -> PlainTextResponse:
+        return PlainTextResponse(
+            await system_service.metrics_get(),
+            media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,13 +1,14 @@
 import logging
 from datetime import datetime
 
+from sqlalchemy import update
 from sqlmodel import select
 
 from app.api.common.errors import InvalidCredentialsError
 from app.api.common.schemas.response import (
     MessageResponse)
 from app.core.jwt import authenticate_user, create_token, decode_token
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     CredentialsPost, Token, UserProfile)
 
@@ -16,24 +17,26 @@ _log = logging.getLogger(__name__)
 
 async def login_post(
     login_post: CredentialsPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Token:
     user_profile_query = select(UserProfile) \
         .where(UserProfile.email == login_post.email)
-    user_profile = session.exec(
-        user_profile_query).first()
+    user_profile = (await session.exec(
+        user_profile_query)).first()
     
     if not user_profile:
         raise InvalidCredentialsError()
     
-    if not authenticate_user(user_profile, login_post):
+    if not await authenticate_user(user_profile, login_post):
         raise InvalidCredentialsError()
     
-    user_profile.sqlmodel_update(
-        dict(last_login=datetime.utcnow()))
-    session.add(user_profile)
-    session.commit()
-    session.refresh(user_profile)
+    # Plain UPDATE, skipping the version check: concurrent logins of the
+    # same user must not fail on each other's bookkeeping
+    await session.exec(
+        update(UserProfile.__table__)
+        .where(UserProfile.__table__.c.id == user_profile.id)
+        .values(last_login=datetime.utcnow()))
+    await session.commit()
     return create_token(user_profile_id=str(user_profile.id))
 
 
@@ -1,68 +1,80 @@
 import logging
+from typing import Optional
 
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlmodel import select
 
+from app.api.common.conditional import check_if_match
 from app.api.common.errors import ResourceNotFoundError
-from app.db import SessionDep
+from app.api.common.schemas.pagination import Page
+from app.db import AsyncSessionDep
 from app.db.models import Bank, BanksPost, BankPut
+from app.db.pagination import paginate
+from app.services import catalog_cache
+from app.services.catalog_cache import Catalog
 
 _log = logging.getLogger(__name__)
 
 
 async def _get_bank_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> Bank:
-    bank = session.get(Bank, id)
+    bank = await session.get(Bank, id)
     if not bank:
         raise ResourceNotFoundError(resource_id=id)
     return bank
 
 
 async def banks_get(
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Page[Bank]:
-    return paginate(session, select(Bank))
+    return await catalog_cache.read_through(
+        Catalog.BANK, catalog_cache.get_list_cache_key(),
+        lambda: paginate(
+            session, select(Bank),
+            keyset=(Bank.id,)))
 
 
 async def banks_id_delete(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> None:
     bank = await _get_bank_from_db(id, session)
-    session.delete(bank)
-    session.commit()
+    await session.delete(bank)
+    await session.commit()
+    await catalog_cache.invalidate(Catalog.BANK)
     return None
 
 
 async def banks_id_get(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Bank:
-    bank = await _get_bank_from_db(id, session)
-    return bank
+    return await catalog_cache.read_through(
+        Catalog.BANK, catalog_cache.get_id_cache_key(id),
+        lambda: _get_bank_from_db(id, session))
 
 
 async def banks_id_put(
     id: str, bank_put: BankPut,
-    session: SessionDep
+    session: AsyncSessionDep,
+    if_match: Optional[str] = None
 ) -> Bank:
     bank = await _get_bank_from_db(id, session)
+    check_if_match(if_match, bank)
     bank_data = bank_put.model_dump(exclude_unset=True)
     bank.sqlmodel_update(bank_data)
     session.add(bank)
-    session.commit()
-    session.refresh(bank)
+    await session.commit()
+    await catalog_cache.invalidate(Catalog.BANK)
     return bank
 
 
 async def banks_post(
     banks_post: BanksPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Bank:
     bank = Bank(**banks_post.dict(by_alias=True))
     session.add(bank)
-    session.commit()
-    session.refresh(bank)
+    await session.commit()
+    await catalog_cache.invalidate(Catalog.BANK)
     return bank
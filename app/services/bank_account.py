@@ -1,44 +1,170 @@
 import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
 
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 
-from app.api.common.errors import ResourceNotFoundError
-from app.db import SessionDep
+from app.api.common.conditional import check_if_match
+from app.api.common.errors import (
+    BankAccountInUseError, InvalidDateRangeError, ResourceNotFoundError,
+    TooManyPeriodsError)
+from app.api.common.schemas.bank_account import (
+    BalanceInterval, BankAccountBalance, BankAccountBalancePoint,
+    BankAccountBalances)
+from app.api.common.schemas.pagination import Page
+from app.core.config import settings
+from app.db import AsyncSessionDep
 from app.db.models import BankAccount, BankAccountPut
+from app.db.pagination import paginate
+from app.services import ledger as ledger_service
 
 _log = logging.getLogger(__name__)
 
 async def _get_bank_account_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> BankAccount:
-    bank_account = session.get(BankAccount, id)
+    bank_account = await session.get(BankAccount, id)
     if not bank_account:
         raise ResourceNotFoundError(resource_id=id)
     return bank_account
 
 
+async def _lock_bank_accounts(
+    account_ids: Iterable[uuid.UUID], session: AsyncSessionDep
+) -> Dict[uuid.UUID, BankAccount]:
+    # Rows are locked in primary key order so that concurrent postings
+    # touching the same accounts can't deadlock each other
+    bank_accounts_query = select(BankAccount) \
+        .where(BankAccount.id.in_(set(account_ids))) \
+        .order_by(BankAccount.id) \
+        .with_for_update() \
+        .execution_options(populate_existing=True)
+    return {
+        bank_account.id: bank_account
+        for bank_account in (await session.exec(bank_accounts_query)).all()}
+
+
+async def _get_bank_accounts_for_update_from_db(
+    ids: Iterable[str], session: AsyncSessionDep
+) -> Dict[uuid.UUID, BankAccount]:
+    account_ids = set()
+    for id in ids:
+        try:
+            account_ids.add(uuid.UUID(str(id)))
+        except ValueError:
+            raise ResourceNotFoundError(resource_id=id)
+
+    bank_accounts = await _lock_bank_accounts(account_ids, session)
+    for account_id in account_ids:
+        if account_id not in bank_accounts:
+            raise ResourceNotFoundError(resource_id=str(account_id))
+    return bank_accounts
+
+
+async def _get_bank_account_for_update_from_db(
+    id: str, session: AsyncSessionDep
+) -> BankAccount:
+    bank_accounts = await _get_bank_accounts_for_update_from_db(
+        [id], session)
+    return next(iter(bank_accounts.values()))
+
+
 async def bank_accounts_get(
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Page[BankAccount]:
-    return paginate(session, select(BankAccount))
+    return await paginate(
+        session, select(BankAccount),
+        keyset=(BankAccount.id,))
 
 
 async def bank_accounts_id_delete(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> None:
-    bank_account = await _get_bank_account_from_db(
+    # Locked like postings lock it, so none can add an entry meanwhile.
+    # The ledger is append-only: accounts with entries are kept
+    bank_account = await _get_bank_account_for_update_from_db(
         id, session)
-    session.delete(bank_account)
-    session.commit()
+    if await ledger_service.has_ledger_entries(bank_account.id, session):
+        raise BankAccountInUseError()
+    try:
+        await session.delete(bank_account)
+        await session.commit()
+    except IntegrityError:
+        # Still referenced, e.g. by a loan or an investment
+        await session.rollback()
+        raise BankAccountInUseError()
     return None
 
 
+def _to_naive_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _count_balance_periods(
+    from_: datetime, to: datetime, interval: BalanceInterval
+) -> int:
+    if interval is BalanceInterval.MONTH:
+        return (to.year - from_.year) * 12 + to.month - from_.month + 1
+    if interval is BalanceInterval.WEEK:
+        from_week = from_.date() - timedelta(days=from_.weekday())
+        to_week = to.date() - timedelta(days=to.weekday())
+        return (to_week - from_week).days // 7 + 1
+    return (to.date() - from_.date()).days + 1
+
+
+async def bank_accounts_id_balance_get(
+    id: str,
+    at: Optional[datetime],
+    session: AsyncSessionDep
+) -> BankAccountBalance:
+    bank_account = await _get_bank_account_from_db(
+        id, session)
+    at = _to_naive_utc(at) if at else datetime.utcnow()
+    balance = await ledger_service.get_bank_account_balance_at(
+        bank_account.id, at, session)
+    return BankAccountBalance(
+        bank_account_id=bank_account.id, at=at, balance=balance)
+
+
+async def bank_accounts_id_balances_get(
+    id: str,
+    from_: Optional[datetime],
+    to: Optional[datetime],
+    interval: BalanceInterval,
+    session: AsyncSessionDep
+) -> BankAccountBalances:
+    to = _to_naive_utc(to) if to else datetime.utcnow()
+    from_ = _to_naive_utc(from_) if from_ else \
+        to - timedelta(days=settings.BANK_ACCOUNT_BALANCES_DEFAULT_DAYS)
+    if from_ >= to:
+        raise InvalidDateRangeError()
+    if _count_balance_periods(from_, to, interval) > \
+            settings.BANK_ACCOUNT_BALANCES_MAX_PERIODS:
+        raise TooManyPeriodsError(
+            max_periods=settings.BANK_ACCOUNT_BALANCES_MAX_PERIODS)
+
+    bank_account = await _get_bank_account_from_db(
+        id, session)
+    opening_balance, balances = await ledger_service.get_bank_account_balances(
+        bank_account.id, from_, to, interval.value, session)
+    return BankAccountBalances(
+        bank_account_id=bank_account.id,
+        from_=from_, to=to, interval=interval,
+        opening_balance=opening_balance,
+        balances=[
+            BankAccountBalancePoint(period_start=period_start, balance=balance)
+            for period_start, balance in balances])
+
+
 async def bank_accounts_id_get(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> BankAccount:
     return await _get_bank_account_from_db(
         id, session)
@@ -47,14 +173,15 @@ async def bank_accounts_id_get(
 async def bank_accounts_id_put(
     id: str,
     bank_account_put: BankAccountPut,
-    session: SessionDep
+    session: AsyncSessionDep,
+    if_match: Optional[str] = None
 ) -> BankAccount:
     bank_account = await _get_bank_account_from_db(
         id, session)
+    check_if_match(if_match, bank_account)
     bank_account_update_data = bank_account_put.model_dump(
         exclude_unset=True)
     bank_account.sqlmodel_update(bank_account_update_data)
     session.add(bank_account)
-    session.commit()
-    session.refresh(bank_account)
+    await session.commit()
     return bank_account
@@ -0,0 +1,86 @@
+import logging
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Type, TypeVar
+
+from fastapi_pagination import resolve_params
+from sqlmodel import SQLModel
+
+from app.api.common.schemas.pagination import Page
+from app.core.cache import Cache, ModelSerializer, cache_requests
+from app.core.config import settings
+from app.db.models import (
+    Bank, InsurancePolicyProduct, InvestmentProduct, LoanProduct)
+
+_log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Catalog(str, Enum):
+    BANK = "bank"
+    LOAN_PRODUCT = "loan_product"
+    INVESTMENT_PRODUCT = "investment_product"
+    INSURANCE_POLICY_PRODUCT = "insurance_policy_product"
+
+
+_catalog_models: Dict[Catalog, Type[SQLModel]] = {
+    Catalog.BANK: Bank,
+    Catalog.LOAN_PRODUCT: LoanProduct,
+    Catalog.INVESTMENT_PRODUCT: InvestmentProduct,
+    Catalog.INSURANCE_POLICY_PRODUCT: InsurancePolicyProduct}
+
+
+class _CatalogSerializer(ModelSerializer):
+    # A catalog caches its resources and pages of them
+    def __init__(self, model_type: Type[SQLModel]):
+        super().__init__(model_type, Page[model_type])
+        self._model_type = model_type
+
+    def validate(self, model_type: Type[SQLModel], value: Any) -> Any:
+        # Table models nested in a page aren't converted by the page's own
+        # validation, so its items are validated first
+        validate = super().validate
+        if model_type is not self._model_type:
+            value["items"] = [
+                validate(self._model_type, item) for item in value["items"]]
+        return validate(model_type, value)
+
+
+_catalog_caches: Dict[Catalog, Cache] = {
+    catalog: Cache(
+        f"catalog.{catalog.value}",
+        max_size=settings.CATALOG_CACHE_MAX_SIZE,
+        ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS,
+        serializer=_CatalogSerializer(_catalog_models[catalog]))
+    for catalog in Catalog}
+
+
+def get_list_cache_key() -> str:
+    return "list:" + resolve_params().model_dump_json()
+
+
+def get_id_cache_key(id: str) -> str:
+    return f"id:{id}"
+
+
+async def read_through(
+    catalog: Catalog,
+    key: str,
+    loader: Callable[[], Awaitable[T]]
+) -> T:
+    return await _catalog_caches[catalog].read_through(key, loader)
+
+
+async def invalidate(catalog: Catalog) -> None:
+    await _catalog_caches[catalog].clear()
+
+
+async def get_catalog_cache_statistics() -> Dict[str, Dict[str, int]]:
+    statistics = {}
+    requests = cache_requests.samples()
+    for catalog, cache in _catalog_caches.items():
+        statistics[catalog.value] = dict(
+            hits=int(requests.get((cache.namespace, "hit"), 0)),
+            misses=int(requests.get((cache.namespace, "miss"), 0)),
+            entries=cache.size())
+    return statistics
@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.common.errors import (
+    IdempotencyKeyInUseError, IdempotencyKeyMismatchError)
+from app.core.config import settings
+from app.db import AsyncSessionDep, async_engine
+from app.db.models import IdempotencyKey
+
+_log = logging.getLogger(__name__)
+
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+
+_idempotency_keys_purge_task: Optional[asyncio.Task] = None
+
+
+async def get_request_hash(request: Request) -> str:
+    # Raw body, since parsed ones get defaults such as the current time
+    request_hash = hashlib.sha256(
+        f"{request.method} {request.url.path} ".encode())
+    request_hash.update(await request.body())
+    return request_hash.hexdigest()
+
+
+async def _reserve_idempotency_key(
+    user_profile_id: uuid.UUID,
+    key: str,
+    request_hash: str,
+    now: datetime,
+    session: AsyncSessionDep
+) -> Optional[IdempotencyKey]:
+    # Claims the key, or an expired one, in a single statement; returns the
+    # stored key when somebody else holds it. Only keys whose request never
+    # committed can expire, completed ones get the longer TTL in the same
+    # transaction as the request's writes
+    idempotency_keys = IdempotencyKey.__table__
+    reserve = insert(idempotency_keys).values(
+        user_profile_id=user_profile_id,
+        key=key,
+        request_hash=request_hash,
+        response=None,
+        created_at=now,
+        expires_at=now + timedelta(
+            seconds=settings.IDEMPOTENCY_KEY_LOCK_SECONDS))
+    reserved = (await session.exec(reserve.on_conflict_do_update(
+        index_elements=[
+            idempotency_keys.c.user_profile_id, idempotency_keys.c.key],
+        set_=dict(
+            request_hash=reserve.excluded.request_hash,
+            response=reserve.excluded.response,
+            created_at=reserve.excluded.created_at,
+            expires_at=reserve.excluded.expires_at),
+        where=idempotency_keys.c.expires_at < now
+    ).returning(idempotency_keys.c.key))).first()
+    await session.commit()
+    if reserved:
+        return None
+    return await session.get(IdempotencyKey, (user_profile_id, key))
+
+
+async def _complete_idempotency_key(
+    user_profile_id: uuid.UUID,
+    key: str,
+    reserved_at: datetime,
+    response: Any,
+    session: AsyncSessionDep
+) -> None:
+    # Staged with the request's writes. A request that outlived its lock
+    # may have lost the key to a retry, in which case nothing is committed;
+    # the row lock taken here makes a retry reserving the key meanwhile
+    # wait for the commit and then find it completed
+    completed = (await session.exec(update(IdempotencyKey).where(
+        IdempotencyKey.user_profile_id == user_profile_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.created_at == reserved_at,
+        IdempotencyKey.response.is_(None)
+    ).values(
+        response=json.dumps(response),
+        expires_at=datetime.utcnow() + timedelta(
+            seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+    ).returning(IdempotencyKey.key))).first()
+    if not completed:
+        raise IdempotencyKeyInUseError()
+
+
+async def _release_idempotency_key(
+    user_profile_id: uuid.UUID,
+    key: str,
+    reserved_at: datetime,
+    session: AsyncSessionDep
+) -> None:
+    # Failed requests leave nothing behind, so that they can be retried
+    await session.rollback()
+    await session.exec(delete(IdempotencyKey).where(
+        IdempotencyKey.user_profile_id == user_profile_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.created_at == reserved_at,
+        IdempotencyKey.response.is_(None)))
+    await session.commit()
+
+
+async def run_idempotent(
+    key: Optional[str],
+    user_profile_id: uuid.UUID,
+    request_hash: str,
+    response: Response,
+    operation: Callable[[], Awaitable[Any]],
+    session: AsyncSessionDep
+) -> Any:
+    # The operation stages its writes without committing: they are
+    # committed here along with the key's response, so a posting is never
+    # committed without it. Requests with different keys never wait on each
+    # other; a retry gets the stored response, or a conflict while the
+    # first one is running
+    if not key:
+        result = await operation()
+        await session.commit()
+        return result
+
+    reserved_at = datetime.utcnow()
+    stored_idempotency_key = await _reserve_idempotency_key(
+        user_profile_id, key, request_hash, reserved_at, session)
+    if stored_idempotency_key:
+        if stored_idempotency_key.request_hash != request_hash:
+            raise IdempotencyKeyMismatchError()
+        if stored_idempotency_key.response is None:
+            raise IdempotencyKeyInUseError()
+        response.headers[IDEMPOTENT_REPLAYED_HEADER] = "true"
+        return json.loads(stored_idempotency_key.response)
+
+    try:
+        result = await operation()
+        # Flushed so that failing writes release the key and generated
+        # values make it into the stored response
+        await session.flush()
+        result = jsonable_encoder(result, by_alias=True)
+        await _complete_idempotency_key(
+            user_profile_id, key, reserved_at, result, session)
+        await session.commit()
+    except Exception:
+        await _release_idempotency_key(
+            user_profile_id, key, reserved_at, session)
+        raise
+    return result
+
+
+async def purge_idempotency_keys() -> None:
+    async with AsyncSession(async_engine) as session:
+        result = await session.exec(delete(IdempotencyKey).where(
+            IdempotencyKey.expires_at < datetime.utcnow()))
+        await session.commit()
+    _log.info(f"Purged {result.rowcount} expired idempotency keys")
+
+
+async def _run_idempotency_keys_purge() -> None:
+    while True:
+        await asyncio.sleep(settings.IDEMPOTENCY_KEY_PURGE_INTERVAL_SECONDS)
+        try:
+            await purge_idempotency_keys()
+        except Exception:
+            _log.exception("Idempotency keys purge failed")
+
+
+async def start_idempotency_keys_purge() -> None:
+    global _idempotency_keys_purge_task
+    if settings.IDEMPOTENCY_KEY_PURGE_INTERVAL_SECONDS > 0:
+        _idempotency_keys_purge_task = asyncio.create_task(
+            _run_idempotency_keys_purge())
+
+
+async def stop_idempotency_keys_purge() -> None:
+    global _idempotency_keys_purge_task
+    if _idempotency_keys_purge_task is not None:
+        _idempotency_keys_purge_task.cancel()
+        try:
+            await _idempotency_keys_purge_task
+        except asyncio.CancelledError:
+            pass
+        _idempotency_keys_purge_task = None
@@ -1,20 +1,23 @@
 import logging
-from typing import Optional
+from typing import List, Optional
 
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlmodel import select
 
 from app.api.common.errors import ResourceNotFoundError, OperationAmountTooLargeError, ResourceAlreadyInStatusError
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse)
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     BankAccount, InsurancePolicy, InsurancePolicyAction,
     InsurancePolicyActionPost, InsurancePolicyStatus,
-    InsurancePoliciesPost, InsurancePolicyProduct)
-from app.services.bank_account import _get_bank_account_from_db
+    InsurancePoliciesPost, InsurancePolicyProduct,
+    LedgerAccount, LedgerEntry, LedgerReferenceType)
+from app.db.pagination import paginate
+from app.services.bank_account import _get_bank_account_for_update_from_db
 from app.services.insurance_policy_product import _get_insurance_policy_product_from_db
+from app.services.ledger import _post_to_ledger
+from app.services.statement import _update_statement_rollups
 
 _log = logging.getLogger(__name__)
 
@@ -26,19 +29,19 @@ INSURANCE_POLICY_STATUS_BY_ACTION_MAP = {
 
 
 async def _get_insurance_policy_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> InsurancePolicy:
-    insurance_policy = session.get(
+    insurance_policy = await session.get(
         InsurancePolicy, id)
     if not insurance_policy:
         raise ResourceNotFoundError(resource_id=id)
     return insurance_policy
 
 
-async def _get_bank_account_with_updated_balance_by_insurance_policy(
+async def _post_insurance_policy_to_ledger(
     insurance_policy: InsurancePolicy,
-    session: SessionDep
-) -> BankAccount:
+    session: AsyncSessionDep
+) -> List[LedgerEntry]:
     async def _validate_insurance_policy_product_amount(
         insurance_policy_product: InsurancePolicyProduct,
         bank_account: BankAccount
@@ -48,7 +51,7 @@ async def _get_bank_account_with_updated_balance_by_insurance_policy(
                 available_amount=bank_account.balance)
         return
 
-    bank_account = await _get_bank_account_from_db(
+    bank_account = await _get_bank_account_for_update_from_db(
         insurance_policy.bank_account_id, session)
     insurance_policy_product = await _get_insurance_policy_product_from_db(
         insurance_policy.insurance_policy_product_id, session)
@@ -56,13 +59,15 @@ async def _get_bank_account_with_updated_balance_by_insurance_policy(
     await _validate_insurance_policy_product_amount(
         insurance_policy_product, bank_account)
 
-    bank_account.balance -= insurance_policy_product.annual_premium
-
-    return bank_account
+    annual_premium = insurance_policy_product.annual_premium
+    return _post_to_ledger(
+        LedgerReferenceType.INSURANCE_POLICY, insurance_policy.id, [
+            (LedgerAccount.BANK_ACCOUNT, bank_account, -annual_premium),
+            (LedgerAccount.INSURANCE_PREMIUMS, None, annual_premium)])
 
 
 async def insurance_policies_get(
-    session: SessionDep,
+    session: AsyncSessionDep,
     bank_account_id: Optional[str]
 ) -> Page[InsurancePolicy]:
     insurance_policies_query = select(InsurancePolicy)
@@ -71,13 +76,15 @@ async def insurance_policies_get(
         insurance_policies_query = insurance_policies_query \
             .where(InsurancePolicy.bank_account_id == bank_account_id)
 
-    return paginate(session, insurance_policies_query)
+    return await paginate(
+        session, insurance_policies_query,
+        keyset=(InsurancePolicy.id,))
 
 
 async def insurance_policies_id_action_post(
     id: str,
     insurance_policy_action_post: InsurancePolicyActionPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> MessageResponse:
     insurance_policy = await _get_insurance_policy_from_db(
         id, session)
@@ -92,8 +99,7 @@ async def insurance_policies_id_action_post(
 
     insurance_policy.status_id = updated_status
     session.add(insurance_policy)
-    session.commit()
-    session.refresh(insurance_policy)
+    await session.commit()
     return MessageResponse(
         message=f"Action {insurance_policy_action.value} successfully performed on resource {id}"
     )
@@ -101,7 +107,7 @@ async def insurance_policies_id_action_post(
 
 async def insurance_policies_id_get(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> InsurancePolicy:
     return await _get_insurance_policy_from_db(
         id, session)
@@ -109,15 +115,14 @@ async def insurance_policies_id_get(
 
 async def insurance_policies_post(
     insurance_policies_post: InsurancePoliciesPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> InsurancePolicy:
     insurance_policy = InsurancePolicy(
         **insurance_policies_post.dict(by_alias=True))
-    updated_bank_account = await _get_bank_account_with_updated_balance_by_insurance_policy(
+    ledger_entries = await _post_insurance_policy_to_ledger(
         insurance_policy, session)
     session.add(insurance_policy)
-    session.add(updated_bank_account)
-    session.commit()
-    session.refresh(insurance_policy)
-    session.refresh(updated_bank_account)
+    session.add_all(ledger_entries)
+    await _update_statement_rollups(ledger_entries, session)
+    # Committed by the caller, together with the request's idempotency key
     return insurance_policy
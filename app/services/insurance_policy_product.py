@@ -1,21 +1,25 @@
 import logging
+from typing import Optional
 
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlmodel import select
 
+from app.api.common.conditional import check_if_match
 from app.api.common.errors import ResourceNotFoundError
-from app.db import SessionDep
+from app.api.common.schemas.pagination import Page
+from app.db import AsyncSessionDep
 from app.db.models import (
     InsurancePolicyProduct, InsurancePolicyProductsPost,
     InsurancePolicyProductPut)
+from app.db.pagination import paginate
+from app.services import catalog_cache
+from app.services.catalog_cache import Catalog
 
 _log = logging.getLogger(__name__)
 
 async def _get_insurance_policy_product_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> InsurancePolicyProduct:
-    insurance_policy_product = session.get(
+    insurance_policy_product = await session.get(
         InsurancePolicyProduct, id)
     if not insurance_policy_product:
         raise ResourceNotFoundError(resource_id=id)
@@ -23,56 +27,65 @@ async def _get_insurance_policy_product_from_db(
 
 
 async def insurance_policy_products_get(
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Page[InsurancePolicyProduct]:
-    return paginate(session, select(InsurancePolicyProduct))
+    return await catalog_cache.read_through(
+        Catalog.INSURANCE_POLICY_PRODUCT, catalog_cache.get_list_cache_key(),
+        lambda: paginate(
+            session, select(InsurancePolicyProduct),
+            keyset=(InsurancePolicyProduct.id,)))
 
 
 async def insurance_policy_products_id_delete(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> None:
     insurance_policy_product = await _get_insurance_policy_product_from_db(
         id, session)
-    session.delete(insurance_policy_product)
-    session.commit()
+    await session.delete(insurance_policy_product)
+    await session.commit()
+    await catalog_cache.invalidate(Catalog.INSURANCE_POLICY_PRODUCT)
     return None
 
 
 async def insurance_policy_products_id_get(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> InsurancePolicyProduct:
-    return await _get_insurance_policy_product_from_db(
-        id, session)
+    return await catalog_cache.read_through(
+        Catalog.INSURANCE_POLICY_PRODUCT, catalog_cache.get_id_cache_key(id),
+        lambda: _get_insurance_policy_product_from_db(
+            id, session))
 
 
 async def insurance_policy_products_id_put(
     id: str,
     insurance_policy_product_put: InsurancePolicyProductPut,
-    session: SessionDep
+    session: AsyncSessionDep,
+    if_match: Optional[str] = None
 ) -> InsurancePolicyProduct:
     insurance_policy_product = \
         await _get_insurance_policy_product_from_db(
             id, session)
+    check_if_match(if_match, insurance_policy_product)
     insurance_policy_product_update_data = \
         insurance_policy_product_put.model_dump(
             exclude_unset=True)
     insurance_policy_product.sqlmodel_update(
         insurance_policy_product_update_data)
     session.add(insurance_policy_product)
-    session.commit()
-    session.refresh(insurance_policy_product)
+    await session.commit()
+    await catalog_cache.invalidate(Catalog.INSURANCE_POLICY_PRODUCT)
     return insurance_policy_product
 
 
 async def insurance_policy_products_post(
     insurance_policy_products_post: InsurancePolicyProductsPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> InsurancePolicyProduct:
     insurance_policy_product = InsurancePolicyProduct(
         **insurance_policy_products_post.dict(by_alias=True))
     session.add(insurance_policy_product)
-    session.commit()
-    session.refresh(insurance_policy_product)
+    await session.commit()
+    await catalog_cache.invalidate(Catalog.INSURANCE_POLICY_PRODUCT)
     return insurance_policy_product
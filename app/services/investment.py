@@ -1,19 +1,21 @@
 import logging
-from typing import Optional
+from typing import List, Optional
 
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlmodel import select
 
 from app.api.common.errors import ResourceNotFoundError, OperationAmountTooLargeError, ResourceAlreadyInStatusError
+from app.api.common.schemas.pagination import Page
 from app.api.common.schemas.response import (
     MessageResponse)
-from app.db import SessionDep
+from app.db import AsyncSessionDep
 from app.db.models import (
     BankAccount, Investment, InvestmentsPost,
     InvestmentAction, InvestmentStatus,
-    InvestmentActionPost)
-from app.services.bank_account import _get_bank_account_from_db
+    InvestmentActionPost, LedgerAccount, LedgerEntry, LedgerReferenceType)
+from app.db.pagination import paginate
+from app.services.bank_account import _get_bank_account_for_update_from_db
+from app.services.ledger import _post_to_ledger
+from app.services.statement import _update_statement_rollups
 
 _log = logging.getLogger(__name__)
 
@@ -25,19 +27,19 @@ INVESTMENT_STATUS_BY_ACTION_MAP = {
 
 
 async def _get_investment_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> Investment:
-    investment = session.get(
+    investment = await session.get(
         Investment, id)
     if not investment:
         raise ResourceNotFoundError(resource_id=id)
     return investment
 
 
-async def _get_bank_account_with_updated_balance_by_investment(
+async def _post_investment_to_ledger(
     investment: Investment,
-    session: SessionDep
-) -> BankAccount:
+    session: AsyncSessionDep
+) -> List[LedgerEntry]:
     async def _validate_investment_amount(
         investment: Investment,
         bank_account: BankAccount
@@ -47,18 +49,19 @@ async def _get_bank_account_with_updated_balance_by_investment(
                 available_amount=bank_account.balance)
         return
 
-    bank_account = await _get_bank_account_from_db(
+    bank_account = await _get_bank_account_for_update_from_db(
             investment.bank_account_id, session)
 
     await _validate_investment_amount(investment, bank_account)
 
-    bank_account.balance -= investment.amount
-
-    return bank_account
+    return _post_to_ledger(
+        LedgerReferenceType.INVESTMENT, investment.id, [
+            (LedgerAccount.BANK_ACCOUNT, bank_account, -investment.amount),
+            (LedgerAccount.INVESTMENTS, None, investment.amount)])
 
 
 async def investments_get(
-    session: SessionDep,
+    session: AsyncSessionDep,
     bank_account_id: Optional[str]
 ) -> Page[Investment]:
     investments_query = select(Investment)
@@ -67,13 +70,15 @@ async def investments_get(
         investments_query = investments_query \
             .where(Investment.bank_account_id == bank_account_id)
 
-    return paginate(session, investments_query)
+    return await paginate(
+        session, investments_query,
+        keyset=(Investment.id,))
 
 
 async def investments_id_action_post(
     id: str,
     investment_action_post: InvestmentActionPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> MessageResponse:
     investment = await _get_investment_from_db(
         id, session)
@@ -88,8 +93,7 @@ async def investments_id_action_post(
 
     investment.status_id = updated_status
     session.add(investment)
-    session.commit()
-    session.refresh(investment)
+    await session.commit()
     return MessageResponse(
         message=f"Action {investment_action.value} successfully performed on resource {id}"
     )
@@ -97,7 +101,7 @@ async def investments_id_action_post(
 
 async def investments_id_get(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Investment:
     return await _get_investment_from_db(
         id, session)
@@ -105,15 +109,14 @@ async def investments_id_get(
 
 async def investments_post(
     investments_post: InvestmentsPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Investment:
     investment = Investment(
         **investments_post.dict(by_alias=True))
-    updated_bank_account = await _get_bank_account_with_updated_balance_by_investment(
+    ledger_entries = await _post_investment_to_ledger(
         investment, session)
     session.add(investment)
-    session.add(updated_bank_account)
-    session.commit()
-    session.refresh(investment)
-    session.refresh(updated_bank_account)
+    session.add_all(ledger_entries)
+    await _update_statement_rollups(ledger_entries, session)
+    # Committed by the caller, together with the request's idempotency key
     return investment
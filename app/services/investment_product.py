@@ -1,21 +1,25 @@
 import logging
+from typing import Optional
 
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlmodel import select
 
+from app.api.common.conditional import check_if_match
 from app.api.common.errors import ResourceNotFoundError
-from app.db import SessionDep
+from app.api.common.schemas.pagination import Page
+from app.db import AsyncSessionDep
 from app.db.models import (
     InvestmentProduct, InvestmentProductPut,
     InvestmentProductsPost)
+from app.db.pagination import paginate
+from app.services import catalog_cache
+from app.services.catalog_cache import Catalog
 
 _log = logging.getLogger(__name__)
 
 async def _get_investment_product_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> InvestmentProduct:
-    investment_product = session.get(InvestmentProduct, id)
+    investment_product = await session.get(InvestmentProduct, id)
     if not investment_product:
         raise ResourceNotFoundError(
             resource_id=id)
@@ -23,56 +27,65 @@ async def _get_investment_product_from_db(
 
 
 async def investment_products_get(
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Page[InvestmentProduct]:
-    return paginate(session, select(InvestmentProduct))
+    return await catalog_cache.read_through(
+        Catalog.INVESTMENT_PRODUCT, catalog_cache.get_list_cache_key(),
+        lambda: paginate(
+            session, select(InvestmentProduct),
+            keyset=(InvestmentProduct.id,)))
 
 
 async def investment_products_id_delete(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> None:
     investment_product = await _get_investment_product_from_db(
         id, session)
-    session.delete(investment_product)
-    session.commit()
+    await session.delete(investment_product)
+    await session.commit()
+    await catalog_cache.invalidate(Catalog.INVESTMENT_PRODUCT)
     return None
 
 
 async def investment_products_id_get(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> InvestmentProduct:
-    return await _get_investment_product_from_db(
-        id, session)
+    return await catalog_cache.read_through(
+        Catalog.INVESTMENT_PRODUCT, catalog_cache.get_id_cache_key(id),
+        lambda: _get_investment_product_from_db(
+            id, session))
 
 
 async def investment_products_id_put(
     id: str,
     investment_product_put: InvestmentProductPut,
-    session: SessionDep
+    session: AsyncSessionDep,
+    if_match: Optional[str] = None
 ) -> InvestmentProduct:
     investment_product = \
         await _get_investment_product_from_db(
             id, session)
+    check_if_match(if_match, investment_product)
     investment_product_update_data = \
         investment_product_put.model_dump(
             exclude_unset=True)
     investment_product.sqlmodel_update(
         investment_product_update_data)
     session.add(investment_product)
-    session.commit()
-    session.refresh(investment_product)
+    await session.commit()
+    await catalog_cache.invalidate(Catalog.INVESTMENT_PRODUCT)
     return investment_product
 
 
 async def investment_products_post(
     investment_products_post: InvestmentProductsPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> InvestmentProduct:
     investment_product = InvestmentProduct(
         **investment_products_post.dict(by_alias=True))
     session.add(investment_product)
-    session.commit()
-    session.refresh(investment_product)
+    await session.commit()
+    await catalog_cache.invalidate(Catalog.INVESTMENT_PRODUCT)
     return investment_product
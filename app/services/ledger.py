@@ -0,0 +1,331 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    BindParameter, Column, ColumnElement, and_, cast, delete, exists, func,
+    literal, or_, true)
+from sqlalchemy.dialects.postgresql import INTERVAL
+from sqlalchemy.sql.dml import Insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db import AsyncSessionDep, async_engine
+from app.db.models import (
+    BalanceSnapshot, BankAccount, LedgerAccount, LedgerEntry,
+    LedgerReferenceType)
+from app.db.models.money import to_money
+
+_log = logging.getLogger(__name__)
+
+# pg advisory lock keys, so that only one worker at a time opens ledgers or
+# takes snapshots
+OPEN_LEDGERS_LOCK_KEY = 160001
+BALANCE_SNAPSHOTS_LOCK_KEY = 160002
+
+LedgerLeg = Tuple[LedgerAccount, Optional[BankAccount], Decimal]
+
+_balance_snapshots_task: Optional[asyncio.Task] = None
+
+
+def _post_to_ledger(
+    reference_type: LedgerReferenceType,
+    reference_id: uuid.UUID,
+    legs: Sequence[LedgerLeg]
+) -> List[LedgerEntry]:
+    # Bank account legs also move the (locked) account's materialised
+    # balance, so it always equals the sum of its entries
+    if sum(amount for _, _, amount in legs) != 0:
+        raise ValueError(
+            f"Unbalanced ledger posting for {reference_type.value} {reference_id}")
+
+    created_at = datetime.utcnow()
+    ledger_entries = []
+    for account, bank_account, amount in legs:
+        if not amount:
+            continue
+        if bank_account is not None:
+            bank_account.balance += amount
+        ledger_entries.append(LedgerEntry(
+            reference_type=reference_type,
+            reference_id=reference_id,
+            account=account,
+            bank_account_id=bank_account.id if bank_account else None,
+            amount=amount,
+            balance_after=bank_account.balance if bank_account else None,
+            created_at=created_at))
+    return ledger_entries
+
+
+def _typed(value: Any, column: Column) -> BindParameter:
+    # Bound with the column's type, so enums are stored by name as usual
+    return literal(value, type_=column.type)
+
+
+def _get_opening_balance() -> ColumnElement:
+    # What an account's balance holds beyond its ledger. Postings move both
+    # by the same amount, so this is the balance that predates the ledger,
+    # whether or not the account was posted to before being opened
+    ledger_balance = select(
+        func.coalesce(func.sum(LedgerEntry.amount), 0)
+    ).where(
+        LedgerEntry.bank_account_id == BankAccount.id
+    ).scalar_subquery()
+    return BankAccount.balance - ledger_balance
+
+
+def _get_open_bank_account_ledgers_statement() -> Insert:
+    # Balances that predate the ledger are brought in as an opening posting
+    # against OpeningBalances, dated at the account's creation
+    ledger_entries = LedgerEntry.__table__
+    columns = [
+        ledger_entries.c.id, ledger_entries.c.reference_type,
+        ledger_entries.c.reference_id, ledger_entries.c.account,
+        ledger_entries.c.bank_account_id, ledger_entries.c.amount,
+        ledger_entries.c.balance_after, ledger_entries.c.created_at]
+
+    opening_balance = _get_opening_balance()
+    opened_bank_accounts = ledger_entries.insert().from_select(
+        columns,
+        select(
+            func.gen_random_uuid(),
+            _typed(LedgerReferenceType.OPENING_BALANCE,
+                   ledger_entries.c.reference_type),
+            BankAccount.id,
+            _typed(LedgerAccount.BANK_ACCOUNT, ledger_entries.c.account),
+            BankAccount.id,
+            opening_balance,
+            opening_balance,
+            BankAccount.created_at)
+        .where(opening_balance != 0)
+    ).returning(
+        ledger_entries.c.reference_id,
+        ledger_entries.c.amount,
+        ledger_entries.c.created_at
+    ).cte("opened_bank_accounts")
+
+    return ledger_entries.insert().from_select(
+        columns,
+        select(
+            func.gen_random_uuid(),
+            _typed(LedgerReferenceType.OPENING_BALANCE,
+                   ledger_entries.c.reference_type),
+            opened_bank_accounts.c.reference_id,
+            _typed(LedgerAccount.OPENING_BALANCES, ledger_entries.c.account),
+            _typed(None, ledger_entries.c.bank_account_id),
+            -opened_bank_accounts.c.amount,
+            _typed(None, ledger_entries.c.balance_after),
+            opened_bank_accounts.c.created_at))
+
+
+async def open_bank_account_ledgers() -> None:
+    async with AsyncSession(async_engine) as session:
+        await session.exec(
+            select(func.pg_advisory_xact_lock(OPEN_LEDGERS_LOCK_KEY)))
+        # Accounts to open are locked like postings lock them, in primary
+        # key order, so none is posted to while it's being opened
+        unopened_bank_account_ids = select(BankAccount.id) \
+            .where(_get_opening_balance() != 0)
+        unopened_bank_accounts = (await session.exec(
+            unopened_bank_account_ids
+            .order_by(BankAccount.id)
+            .with_for_update())).all()
+        if unopened_bank_accounts:
+            # Snapshots taken without the opening entry are dropped and
+            # taken again from the complete ledger
+            await session.exec(delete(BalanceSnapshot).where(
+                BalanceSnapshot.bank_account_id.in_(
+                    unopened_bank_account_ids)))
+            await session.exec(_get_open_bank_account_ledgers_statement())
+        await session.commit()
+
+
+async def take_balance_snapshots() -> None:
+    # Each snapshot carries on from the account's previous one with the
+    # entries numbered after it. An account's entries commit in number
+    # order, so one still in flight is numbered after every entry visible
+    # here and is picked up by the next snapshot, however late it commits
+    last_snapshots = select(
+        BalanceSnapshot.bank_account_id,
+        func.max(BalanceSnapshot.last_sequence_number).label(
+            "last_sequence_number")
+    ).group_by(BalanceSnapshot.bank_account_id).subquery()
+
+    balances_query = select(
+        func.gen_random_uuid(),
+        LedgerEntry.bank_account_id,
+        func.coalesce(BalanceSnapshot.balance, 0) + func.sum(LedgerEntry.amount),
+        func.greatest(
+            func.max(LedgerEntry.created_at), BalanceSnapshot.taken_at),
+        func.max(LedgerEntry.sequence_number)
+    ).select_from(LedgerEntry).outerjoin(
+        last_snapshots,
+        last_snapshots.c.bank_account_id == LedgerEntry.bank_account_id
+    ).outerjoin(
+        BalanceSnapshot,
+        and_(BalanceSnapshot.bank_account_id == last_snapshots.c.bank_account_id,
+             BalanceSnapshot.last_sequence_number
+             == last_snapshots.c.last_sequence_number)
+    ).where(
+        LedgerEntry.bank_account_id.is_not(None),
+        or_(last_snapshots.c.last_sequence_number.is_(None),
+            LedgerEntry.sequence_number > last_snapshots.c.last_sequence_number)
+    ).group_by(
+        LedgerEntry.bank_account_id, BalanceSnapshot.balance,
+        BalanceSnapshot.taken_at
+    ).having(
+        func.count() >= settings.LEDGER_SNAPSHOT_MIN_ENTRIES)
+
+    balance_snapshots = BalanceSnapshot.__table__
+    async with AsyncSession(async_engine) as session:
+        locked = (await session.exec(select(
+            func.pg_try_advisory_xact_lock(BALANCE_SNAPSHOTS_LOCK_KEY)))).one()
+        if not locked:
+            return
+        result = await session.exec(balance_snapshots.insert().from_select(
+            [balance_snapshots.c.id, balance_snapshots.c.bank_account_id,
+             balance_snapshots.c.balance, balance_snapshots.c.taken_at,
+             balance_snapshots.c.last_sequence_number],
+            balances_query))
+        await session.commit()
+    _log.info(f"Took {result.rowcount} balance snapshots")
+
+
+async def _run_balance_snapshots() -> None:
+    while True:
+        await asyncio.sleep(settings.LEDGER_SNAPSHOT_INTERVAL_SECONDS)
+        try:
+            await take_balance_snapshots()
+        except Exception:
+            _log.exception("Balance snapshots failed")
+
+
+async def start_balance_snapshots() -> None:
+    global _balance_snapshots_task
+    if settings.LEDGER_SNAPSHOT_INTERVAL_SECONDS > 0:
+        _balance_snapshots_task = asyncio.create_task(
+            _run_balance_snapshots())
+
+
+async def stop_balance_snapshots() -> None:
+    global _balance_snapshots_task
+    if _balance_snapshots_task is not None:
+        _balance_snapshots_task.cancel()
+        try:
+            await _balance_snapshots_task
+        except asyncio.CancelledError:
+            pass
+        _balance_snapshots_task = None
+
+
+def _get_balance_at(
+    bank_account_id: uuid.UUID,
+    at: datetime
+) -> ColumnElement:
+    # Latest snapshot before the requested time plus the entries numbered
+    # after it and created up to that time. Entries are numbered in commit
+    # order and stamped while holding the account, so those numbered after
+    # the next snapshot are all created after the requested time
+    snapshots = select(BalanceSnapshot).where(
+        BalanceSnapshot.bank_account_id == bank_account_id,
+        BalanceSnapshot.last_sequence_number.is_not(None))
+    last_snapshot = snapshots.where(
+        BalanceSnapshot.taken_at <= at
+    ).order_by(
+        BalanceSnapshot.last_sequence_number.desc()
+    ).limit(1).subquery("last_snapshot")
+    next_snapshot = snapshots.where(
+        BalanceSnapshot.taken_at > at
+    ).order_by(
+        BalanceSnapshot.last_sequence_number
+    ).limit(1).subquery("next_snapshot")
+
+    entries_since_snapshot = select(
+        func.sum(LedgerEntry.amount)
+    ).where(
+        LedgerEntry.bank_account_id == bank_account_id,
+        LedgerEntry.created_at <= at,
+        LedgerEntry.sequence_number > func.coalesce(
+            select(last_snapshot.c.last_sequence_number).scalar_subquery(), 0),
+        LedgerEntry.sequence_number <= func.coalesce(
+            select(next_snapshot.c.last_sequence_number).scalar_subquery(),
+            _typed(2 ** 63 - 1, LedgerEntry.__table__.c.sequence_number))
+    ).scalar_subquery()
+
+    return func.coalesce(select(last_snapshot.c.balance).scalar_subquery(), 0) \
+        + func.coalesce(entries_since_snapshot, 0)
+
+
+async def has_ledger_entries(
+    bank_account_id: uuid.UUID,
+    session: AsyncSessionDep
+) -> bool:
+    return (await session.exec(select(exists().where(
+        LedgerEntry.bank_account_id == bank_account_id)))).one()
+
+
+async def get_bank_account_balance_at(
+    bank_account_id: uuid.UUID,
+    at: datetime,
+    session: AsyncSessionDep
+) -> Decimal:
+    balance = (await session.exec(select(
+        _get_balance_at(bank_account_id, at)))).one()
+    return to_money(balance)
+
+
+async def get_bank_account_balances(
+    bank_account_id: uuid.UUID,
+    from_: datetime,
+    to: datetime,
+    interval: str,
+    session: AsyncSessionDep
+) -> Tuple[Decimal, List[Tuple[datetime, Decimal]]]:
+    # One statement: the opening balance comes from the snapshots, the
+    # per-period net changes from the (bank_account_id, created_at) index
+    # and the closing balances from a running sum over the periods
+    opening_balance = select(
+        _get_balance_at(bank_account_id, from_).label("balance")
+    ).cte("opening_balance")
+    # Rendered inline so that the truncation in SELECT and GROUP BY is the
+    # same expression
+    unit = literal(interval, literal_execute=True)
+    step = cast(literal(f"1 {interval}", literal_execute=True), INTERVAL)
+
+    periods = func.generate_series(
+        func.date_trunc(unit, _typed(from_, LedgerEntry.__table__.c.created_at)),
+        _typed(to, LedgerEntry.__table__.c.created_at),
+        step
+    ).table_valued("period_start").render_derived("periods")
+
+    period_changes = select(
+        func.date_trunc(unit, LedgerEntry.created_at).label("period_start"),
+        func.sum(LedgerEntry.amount).label("amount")
+    ).where(
+        LedgerEntry.bank_account_id == bank_account_id,
+        LedgerEntry.created_at > from_,
+        LedgerEntry.created_at <= to
+    ).group_by(
+        func.date_trunc(unit, LedgerEntry.created_at)
+    ).subquery("period_changes")
+
+    balances_query = select(
+        opening_balance.c.balance.label("opening_balance"),
+        periods.c.period_start,
+        (opening_balance.c.balance + func.sum(
+            func.coalesce(period_changes.c.amount, 0)
+        ).over(order_by=periods.c.period_start)).label("balance")
+    ).select_from(periods).join(
+        opening_balance, true()
+    ).outerjoin(
+        period_changes,
+        period_changes.c.period_start == periods.c.period_start
+    ).order_by(periods.c.period_start)
+
+    rows = (await session.exec(balances_query)).all()
+    return to_money(rows[0].opening_balance), [
+        (row.period_start, to_money(row.balance)) for row in rows]
@@ -1,25 +1,25 @@
 import logging
 from typing import Optional
 
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlmodel import select
 
 from app.api.common.errors import (
     ResourceNotFoundError)
-from app.db import SessionDep
+from app.api.common.schemas.pagination import Page
+from app.db import AsyncSessionDep
 from app.db.models import (
     Loan, LoansPost,
     TransactionsPost, TransactionType)
-from app.services.transaction import transactions_post
+from app.db.pagination import paginate
+from app.services.transaction import _add_transaction
 
 _log = logging.getLogger(__name__)
 
 
 async def _get_loan_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> Loan:
-    loan = session.get(Loan, id)
+    loan = await session.get(Loan, id)
     if not loan:
         raise ResourceNotFoundError(resource_id=id)
     return loan
@@ -38,7 +38,7 @@ def _build_loan_transaction(
 
 
 async def loans_get(
-    session: SessionDep,
+    session: AsyncSessionDep,
     bank_account_id: Optional[str]
 ) -> Page[Loan]:
     loans_query = select(Loan)
@@ -47,12 +47,14 @@ async def loans_get(
         loans_query = loans_query \
             .where(Loan.bank_account_id == bank_account_id)
 
-    return paginate(session, loans_query)
+    return await paginate(
+        session, loans_query,
+        keyset=(Loan.id,))
 
 
 async def loans_id_get(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Loan:
     return await _get_loan_from_db(
         id, session)
@@ -60,14 +62,15 @@ async def loans_id_get(
 
 async def loans_post(
     loans_post: LoansPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Loan:
+    # The disbursement and the loan are committed together by the caller,
+    # with the request's idempotency key, so there is never a deposit
+    # without its loan
     loan = Loan(
         **loans_post.dict(by_alias=True))
     loan_transaction = _build_loan_transaction(
         loans_post)
-    await transactions_post(loan_transaction, session)
+    await _add_transaction(loan_transaction, session)
     session.add(loan)
-    session.commit()
-    session.refresh(loan)
     return loan
@@ -1,21 +1,25 @@
 import logging
+from typing import Optional
 
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlmodel import select
 
+from app.api.common.conditional import check_if_match
 from app.api.common.errors import ResourceNotFoundError
-from app.db import SessionDep
+from app.api.common.schemas.pagination import Page
+from app.db import AsyncSessionDep
 from app.db.models import (
     LoanProduct, LoanProductPut,
     LoanProductsPost)
+from app.db.pagination import paginate
+from app.services import catalog_cache
+from app.services.catalog_cache import Catalog
 
 _log = logging.getLogger(__name__)
 
 async def _get_loan_product_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> LoanProduct:
-    loan_product = session.get(LoanProduct, id)
+    loan_product = await session.get(LoanProduct, id)
     if not loan_product:
         raise ResourceNotFoundError(
             resource_id=id)
@@ -23,56 +27,65 @@ async def _get_loan_product_from_db(
 
 
 async def loan_products_get(
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Page[LoanProduct]:
-    return paginate(session, select(LoanProduct))
+    return await catalog_cache.read_through(
+        Catalog.LOAN_PRODUCT, catalog_cache.get_list_cache_key(),
+        lambda: paginate(
+            session, select(LoanProduct),
+            keyset=(LoanProduct.id,)))
 
 
 async def loan_products_id_delete(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> None:
     loan_product = await _get_loan_product_from_db(
         id, session)
-    session.delete(loan_product)
-    session.commit()
+    await session.delete(loan_product)
+    await session.commit()
+    await catalog_cache.invalidate(Catalog.LOAN_PRODUCT)
     return None
 
 
 async def loan_products_id_get(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> LoanProduct:
-    return await _get_loan_product_from_db(
-        id, session)
+    return await catalog_cache.read_through(
+        Catalog.LOAN_PRODUCT, catalog_cache.get_id_cache_key(id),
+        lambda: _get_loan_product_from_db(
+            id, session))
 
 
 async def loan_products_id_put(
     id: str,
     loan_product_put: LoanProductPut,
-    session: SessionDep
+    session: AsyncSessionDep,
+    if_match: Optional[str] = None
 ) -> LoanProduct:
     loan_product = \
         await _get_loan_product_from_db(
             id, session)
+    check_if_match(if_match, loan_product)
     loan_product_update_data = \
         loan_product_put.model_dump(
             exclude_unset=True)
     loan_product.sqlmodel_update(
         loan_product_update_data)
     session.add(loan_product)
-    session.commit()
-    session.refresh(loan_product)
+    await session.commit()
+    await catalog_cache.invalidate(Catalog.LOAN_PRODUCT)
     return loan_product
 
 
 async def loan_products_post(
     loan_products_post: LoanProductsPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> LoanProduct:
     loan_product = LoanProduct(
         **loan_products_post.dict(by_alias=True))
     session.add(loan_product)
-    session.commit()
-    session.refresh(loan_product)
+    await session.commit()
+    await catalog_cache.invalidate(Catalog.LOAN_PRODUCT)
     return loan_product
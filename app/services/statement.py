@@ -0,0 +1,276 @@
+import logging
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    Date, and_, case, cast, distinct, func, literal, tuple_)
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
+
+from app.core.config import settings
+from app.db import AsyncSessionDep, async_engine
+from app.db.models import (
+    BankAccount, LedgerAccount, LedgerEntry, StatementRollup)
+from app.services import ledger as ledger_service
+from app.services.bank_account import _get_bank_account_from_db
+
+_log = logging.getLogger(__name__)
+
+# pg advisory lock key, so that only one worker backfills the rollups
+STATEMENT_ROLLUPS_LOCK_KEY = 180001
+
+# Rows per upsert statement, well below the bind parameter limit
+STATEMENT_ROLLUPS_UPSERT_SIZE = 1000
+
+STATEMENT_ROLLUP_COLUMNS = [
+    "bank_account_id", "month", "opening_balance", "closing_balance",
+    "inflows", "outflows", "fees", "postings_count"]
+
+
+def _get_month(value: datetime) -> date:
+    return value.date().replace(day=1)
+
+
+def _get_month_bounds(month: date) -> Tuple[datetime, datetime]:
+    month_start = datetime(month.year, month.month, 1)
+    if month.month == 12:
+        return month_start, datetime(month.year + 1, 1, 1)
+    return month_start, datetime(month.year, month.month + 1, 1)
+
+
+def _get_statement_rollups(
+    ledger_entries: Sequence[LedgerEntry]
+) -> List[dict]:
+    # Entries come in posting order, so an account's first leg in a month
+    # gives the opening balance and its last leg the closing one; a
+    # posting's fee is charged to the account it debits
+    fees_by_posting: Dict[uuid.UUID, Decimal] = {}
+    for ledger_entry in ledger_entries:
+        if ledger_entry.account is LedgerAccount.FEES:
+            fees_by_posting[ledger_entry.reference_id] = \
+                fees_by_posting.get(ledger_entry.reference_id, 0) \
+                + ledger_entry.amount
+
+    rollups: Dict[Tuple[uuid.UUID, date], dict] = {}
+    postings = set()
+    for ledger_entry in ledger_entries:
+        if ledger_entry.bank_account_id is None:
+            continue
+        key = (ledger_entry.bank_account_id,
+               _get_month(ledger_entry.created_at))
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = dict(
+                bank_account_id=key[0],
+                month=key[1],
+                opening_balance=ledger_entry.balance_after - ledger_entry.amount,
+                closing_balance=ledger_entry.balance_after,
+                inflows=Decimal("0.00"),
+                outflows=Decimal("0.00"),
+                fees=Decimal("0.00"),
+                postings_count=0)
+        rollup["closing_balance"] = ledger_entry.balance_after
+        if ledger_entry.amount > 0:
+            rollup["inflows"] += ledger_entry.amount
+        else:
+            rollup["outflows"] -= ledger_entry.amount
+            rollup["fees"] += fees_by_posting.pop(
+                ledger_entry.reference_id, 0)
+        if (key, ledger_entry.reference_id) not in postings:
+            postings.add((key, ledger_entry.reference_id))
+            rollup["postings_count"] += 1
+    return [rollups[key] for key in sorted(rollups)]
+
+
+async def _update_statement_rollups(
+    ledger_entries: Sequence[LedgerEntry],
+    session: AsyncSessionDep
+) -> None:
+    # Bank accounts are locked while posting, so the closing balance of
+    # the latest posting always wins
+    rollups = _get_statement_rollups(ledger_entries)
+    statement_rollups = StatementRollup.__table__
+    for start in range(0, len(rollups), STATEMENT_ROLLUPS_UPSERT_SIZE):
+        upsert = insert(statement_rollups).values(
+            rollups[start:start + STATEMENT_ROLLUPS_UPSERT_SIZE])
+        await session.exec(upsert.on_conflict_do_update(
+            index_elements=[
+                statement_rollups.c.bank_account_id,
+                statement_rollups.c.month],
+            set_=dict(
+                closing_balance=upsert.excluded.closing_balance,
+                inflows=statement_rollups.c.inflows + upsert.excluded.inflows,
+                outflows=statement_rollups.c.outflows + upsert.excluded.outflows,
+                fees=statement_rollups.c.fees + upsert.excluded.fees,
+                postings_count=statement_rollups.c.postings_count
+                + upsert.excluded.postings_count)))
+
+
+def _get_statement_rollups_query(
+    bank_account_id: Optional[uuid.UUID] = None
+) -> Select:
+    # The same totals, rebuilt from the ledger: closing balances are a
+    # running sum of the monthly net changes
+    posting_fees = select(
+        LedgerEntry.reference_id,
+        func.sum(LedgerEntry.amount).label("fees")
+    ).where(
+        LedgerEntry.account == LedgerAccount.FEES
+    ).group_by(LedgerEntry.reference_id).subquery("posting_fees")
+
+    month = func.date_trunc(
+        literal("month", literal_execute=True), LedgerEntry.created_at)
+    monthly_changes = select(
+        LedgerEntry.bank_account_id,
+        month.label("month"),
+        func.sum(LedgerEntry.amount).label("net"),
+        func.sum(case(
+            (LedgerEntry.amount > 0, LedgerEntry.amount),
+            else_=0)).label("inflows"),
+        func.sum(case(
+            (LedgerEntry.amount < 0, -LedgerEntry.amount),
+            else_=0)).label("outflows"),
+        func.sum(case(
+            (LedgerEntry.amount < 0, func.coalesce(posting_fees.c.fees, 0)),
+            else_=0)).label("fees"),
+        func.count(distinct(LedgerEntry.reference_id)).label("postings_count")
+    ).outerjoin(
+        posting_fees,
+        posting_fees.c.reference_id == LedgerEntry.reference_id
+    ).where(
+        LedgerEntry.bank_account_id.is_not(None)
+    ).group_by(LedgerEntry.bank_account_id, month)
+    if bank_account_id:
+        monthly_changes = monthly_changes \
+            .where(LedgerEntry.bank_account_id == bank_account_id)
+    monthly_changes = monthly_changes.subquery("monthly_changes")
+
+    closing_balance = func.sum(monthly_changes.c.net).over(
+        partition_by=monthly_changes.c.bank_account_id,
+        order_by=monthly_changes.c.month)
+    return select(
+        monthly_changes.c.bank_account_id,
+        cast(monthly_changes.c.month, Date).label("month"),
+        (closing_balance - monthly_changes.c.net).label("opening_balance"),
+        closing_balance.label("closing_balance"),
+        monthly_changes.c.inflows,
+        monthly_changes.c.outflows,
+        monthly_changes.c.fees,
+        monthly_changes.c.postings_count)
+
+
+async def backfill_statement_rollups() -> None:
+    # Rollups are maintained at posting time; months that missed entries
+    # (posted before rollups existed, opening balances...) are rebuilt from
+    # the ledger. Their accounts are locked like postings lock them, so that
+    # none is posted to between rebuilding a month and writing it
+    statement_rollups = StatementRollup.__table__
+    columns = STATEMENT_ROLLUP_COLUMNS[2:]
+    rebuilt_rollups = _get_statement_rollups_query().subquery("rebuilt_rollups")
+    stale_bank_account_ids = select(
+        rebuilt_rollups.c.bank_account_id
+    ).outerjoin(
+        statement_rollups,
+        and_(statement_rollups.c.bank_account_id
+             == rebuilt_rollups.c.bank_account_id,
+             statement_rollups.c.month == rebuilt_rollups.c.month)
+    ).where(
+        tuple_(*[statement_rollups.c[column] for column in columns])
+        .is_distinct_from(
+            tuple_(*[rebuilt_rollups.c[column] for column in columns])))
+
+    async with AsyncSession(async_engine) as session:
+        await session.exec(
+            select(func.pg_advisory_xact_lock(STATEMENT_ROLLUPS_LOCK_KEY)))
+        bank_account_ids = (await session.exec(
+            select(BankAccount.id)
+            .where(BankAccount.id.in_(stale_bank_account_ids))
+            .order_by(BankAccount.id)
+            .with_for_update())).all()
+        if bank_account_ids:
+            upsert = insert(statement_rollups).from_select(
+                [statement_rollups.c[column]
+                 for column in STATEMENT_ROLLUP_COLUMNS],
+                select(rebuilt_rollups).where(
+                    rebuilt_rollups.c.bank_account_id.in_(
+                        stale_bank_account_ids)))
+            await session.exec(upsert.on_conflict_do_update(
+                index_elements=[
+                    statement_rollups.c.bank_account_id,
+                    statement_rollups.c.month],
+                set_={
+                    column: upsert.excluded[column] for column in columns}))
+        await session.commit()
+    _log.info(f"Rebuilt statement rollups of {len(bank_account_ids)} bank accounts")
+
+
+async def _get_statement_rollup(
+    bank_account_id: uuid.UUID,
+    month: date,
+    session: AsyncSessionDep
+) -> StatementRollup:
+    statement_rollup = await session.get(
+        StatementRollup, (bank_account_id, month))
+    if statement_rollup:
+        return statement_rollup
+
+    # Entries that didn't go through posting (e.g. opening balances) are
+    # rebuilt from the ledger; with none, the balance was carried over
+    rebuilt_rollups = _get_statement_rollups_query(bank_account_id).subquery()
+    rebuilt_rollup = (await session.exec(
+        select(rebuilt_rollups).where(rebuilt_rollups.c.month == month)
+    )).first()
+    if rebuilt_rollup:
+        return StatementRollup(**rebuilt_rollup._mapping)
+
+    month_start, _ = _get_month_bounds(month)
+    balance = await ledger_service.get_bank_account_balance_at(
+        bank_account_id, month_start, session)
+    return StatementRollup(
+        bank_account_id=bank_account_id, month=month,
+        opening_balance=balance, closing_balance=balance,
+        inflows=Decimal("0.00"), outflows=Decimal("0.00"),
+        fees=Decimal("0.00"), postings_count=0)
+
+
+async def _get_statement_chunks(
+    statement_rollup: StatementRollup
+) -> AsyncIterator[str]:
+    # A JSON document whose detail is streamed from the ledger, yield_per
+    # entries at a time, like the transactions export
+    month_start, month_end = _get_month_bounds(statement_rollup.month)
+    ledger_entries_query = select(LedgerEntry).where(
+        LedgerEntry.bank_account_id == statement_rollup.bank_account_id,
+        LedgerEntry.created_at >= month_start,
+        LedgerEntry.created_at < month_end
+    ).order_by(
+        LedgerEntry.created_at, LedgerEntry.id
+    ).execution_options(yield_per=settings.TRANSACTIONS_EXPORT_YIELD_PER)
+
+    yield '{"statement":' + statement_rollup.model_dump_json(by_alias=True) \
+        + ',"entries":['
+    separator = ""
+    async with AsyncSession(async_engine) as session:
+        ledger_entries = await session.stream_scalars(ledger_entries_query)
+        async for partition in ledger_entries.partitions():
+            chunk = ",".join(
+                ledger_entry.model_dump_json(by_alias=True)
+                for ledger_entry in partition)
+            yield separator + chunk
+            separator = ","
+    yield "]}"
+
+
+async def bank_accounts_id_statements_month_get(
+    id: str,
+    month: str,
+    session: AsyncSessionDep
+) -> AsyncIterator[str]:
+    bank_account = await _get_bank_account_from_db(id, session)
+    statement_rollup = await _get_statement_rollup(
+        bank_account.id, datetime.strptime(month, "%Y-%m").date(), session)
+    return _get_statement_chunks(statement_rollup)
@@ -0,0 +1,39 @@
+import logging
+from typing import Dict
+
+from app.api.common.schemas.system import (
+    CatalogCacheStatistics, DatabasePoolStatistics, RouteQueryStatistics)
+from app.core.cache import update_cache_metrics
+from app.core.metrics import render_metrics
+from app.db import async_engine
+from app.db.pool import get_pool_statistics, update_pool_metrics
+from app.db.queries import get_query_statistics
+from app.services.catalog_cache import get_catalog_cache_statistics
+
+_log = logging.getLogger(__name__)
+
+
+async def database_pool_get() -> DatabasePoolStatistics:
+    return DatabasePoolStatistics.model_validate(
+        get_pool_statistics(async_engine.pool))
+
+
+async def catalog_cache_get() -> Dict[str, CatalogCacheStatistics]:
+    return {
+        catalog: CatalogCacheStatistics.model_validate(statistics)
+        for catalog, statistics in (
+            await get_catalog_cache_statistics()).items()}
+
+
+async def queries_get() -> Dict[str, RouteQueryStatistics]:
+    return {
+        f"{method} {route}": RouteQueryStatistics.model_validate(statistics)
+        for (method, route), statistics in sorted(
+            get_query_statistics().items())}
+
+
+async def metrics_get() -> str:
+    # Gauges are read when scraped rather than kept up to date
+    update_pool_metrics(async_engine.pool)
+    update_cache_metrics()
+    return render_metrics()
@@ -1,34 +1,58 @@
+import csv
+import io
 import logging
-from typing import List, Optional
+import uuid
+from datetime import datetime
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Sequence,
+    Tuple, Type)
 
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
-from sqlalchemy import or_
+from pydantic import ValidationError
+
+from sqlalchemy import union_all
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import aliased
 from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
 
-from app.api.common.errors import ResourceNotFoundError, OperationAmountTooLargeError
-from app.db import SessionDep
+from app.api.common.errors import (
+    BatchChunkNotCommittedError, GenericException, InvalidDateRangeError, ResourceNotFoundError,
+    OperationAmountTooLargeError)
+from app.api.common.schemas.pagination import Page, TotalMode
+from app.api.common.schemas.transaction import (
+    ExportFormat, TransactionsBatchItemResult, TransactionsBatchItemStatus,
+    TransactionsBatchResponse)
+from app.core.config import settings
+from app.db import AsyncSessionDep, async_engine
 from app.db.models import (
-    Transaction, TransactionsPost, BankAccount, TransactionType)
-from app.services.bank_account import _get_bank_account_from_db
+    Transaction, TransactionsPost, BankAccount, TransactionType,
+    LedgerAccount, LedgerEntry, LedgerReferenceType)
+from app.db.models.money import to_money
+from app.db.pagination import paginate
+from app.services.bank_account import (
+    _get_bank_accounts_for_update_from_db, _lock_bank_accounts,
+    _to_naive_utc)
+from app.services.ledger import _post_to_ledger
+from app.services.statement import _update_statement_rollups
 
 _log = logging.getLogger(__name__)
 
 async def _get_transaction_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> Transaction:
-    transaction = session.get(Transaction, id)
+    transaction = await session.get(Transaction, id)
     if not transaction:
         raise ResourceNotFoundError(
             resource_id=id)
     return transaction
 
 
-async def _get_bank_accounts_with_updated_balance_by_transaction(
+def _apply_transaction_to_bank_accounts(
     transaction: Transaction,
-    session: SessionDep
-) -> List[BankAccount]:
-    async def _validate_transaction_amount(
+    bank_accounts: Dict[uuid.UUID, BankAccount]
+) -> List[LedgerEntry]:
+    def _validate_transaction_amount(
             transaction: Transaction,
             source_account: BankAccount
     ) -> None:
@@ -42,81 +66,326 @@ async def _get_bank_accounts_with_updated_balance_by_transaction(
 
     source_bank_account = None
     destination_bank_account = None
-    involved_accounts = []
     if transaction.source_account_id:
-        source_bank_account = await _get_bank_account_from_db(
-            transaction.source_account_id, session)
+        source_bank_account = bank_accounts.get(
+            uuid.UUID(str(transaction.source_account_id)))
+        if source_bank_account is None:
+            raise ResourceNotFoundError(
+                resource_id=str(transaction.source_account_id))
     if transaction.destination_account_id:
-        destination_bank_account = await _get_bank_account_from_db(
-            transaction.destination_account_id, session)
+        destination_bank_account = bank_accounts.get(
+            uuid.UUID(str(transaction.destination_account_id)))
+        if destination_bank_account is None:
+            raise ResourceNotFoundError(
+                resource_id=str(transaction.destination_account_id))
 
-    await _validate_transaction_amount(transaction, source_bank_account)
+    _validate_transaction_amount(transaction, source_bank_account)
 
     transaction_amount = transaction.amount
-    transaction_with_fee = transaction_amount + (
-        transaction_amount * transaction.fee / 100)
+    transaction_with_fee = to_money(transaction_amount + (
+        transaction_amount * transaction.fee / 100))
+    transaction_fee = transaction_with_fee - transaction_amount
 
+    ledger_legs = []
     if transaction.type is TransactionType.TRANSFER:
-        source_bank_account.balance -= transaction_with_fee
-        destination_bank_account.balance += transaction_amount
+        ledger_legs = [
+            (LedgerAccount.BANK_ACCOUNT, source_bank_account, -transaction_with_fee),
+            (LedgerAccount.BANK_ACCOUNT, destination_bank_account, transaction_amount),
+            (LedgerAccount.FEES, None, transaction_fee)]
     if transaction.type is TransactionType.WITHDRAW:
-        source_bank_account.balance -= transaction_with_fee
+        ledger_legs = [
+            (LedgerAccount.BANK_ACCOUNT, source_bank_account, -transaction_with_fee),
+            (LedgerAccount.EXTERNAL, None, transaction_amount),
+            (LedgerAccount.FEES, None, transaction_fee)]
     if transaction.type is TransactionType.DEPOSIT:
-        destination_bank_account.balance += transaction_amount
+        ledger_legs = [
+            (LedgerAccount.BANK_ACCOUNT, destination_bank_account, transaction_amount),
+            (LedgerAccount.EXTERNAL, None, -transaction_amount)]
 
-    if source_bank_account is not None:
-        involved_accounts.append(source_bank_account)
-    if destination_bank_account is not None:
-        involved_accounts.append(destination_bank_account)
-    return involved_accounts
+    return _post_to_ledger(
+        LedgerReferenceType.TRANSACTION, transaction.id, ledger_legs)
 
 
-async def transactions_get(
-    session: SessionDep,
+def _get_transaction_account_ids(
+    transaction: TransactionsPost
+) -> List[uuid.UUID]:
+    return [
+        account_id for account_id in (
+            transaction.source_account_id,
+            transaction.destination_account_id)
+        if account_id]
+
+
+async def _post_transaction_to_ledger(
+    transaction: Transaction,
+    session: AsyncSessionDep
+) -> List[LedgerEntry]:
+    bank_accounts = await _get_bank_accounts_for_update_from_db(
+        _get_transaction_account_ids(transaction), session)
+    return _apply_transaction_to_bank_accounts(transaction, bank_accounts)
+
+
+def _get_involved_account_transactions(
+    involved_account_id: str
+) -> Type[Transaction]:
+    # UNION ALL of one index range per side instead of an OR across two
+    # columns; transfers to self only come from the source branch
+    source_transactions_query = select(Transaction) \
+        .where(Transaction.source_account_id == involved_account_id)
+    destination_transactions_query = select(Transaction) \
+        .where(Transaction.destination_account_id == involved_account_id) \
+        .where(Transaction.source_account_id.is_distinct_from(
+            involved_account_id))
+    involved_account_transactions = union_all(
+        source_transactions_query,
+        destination_transactions_query).subquery()
+    return aliased(Transaction, involved_account_transactions)
+
+
+def _get_transactions_query(
     source_account_id: Optional[str],
     destination_account_id: Optional[str],
     involved_account_id: Optional[str]
-) -> Page[Transaction]:
-    transactions_query = select(Transaction)
-
+) -> Tuple[Select, Type[Transaction]]:
+    transaction_entity = Transaction
     if involved_account_id:
-        transactions_query = transactions_query.where(
-            or_(
-                Transaction.source_account_id == involved_account_id,
-                Transaction.destination_account_id == involved_account_id))
-    elif source_account_id:
+        transaction_entity = _get_involved_account_transactions(
+            involved_account_id)
+    transactions_query = select(transaction_entity)
+
+    if source_account_id and not involved_account_id:
         transactions_query = transactions_query \
             .where(Transaction.source_account_id == source_account_id)
-    elif destination_account_id:
+    elif destination_account_id and not involved_account_id:
         transactions_query = transactions_query \
             .where(Transaction.destination_account_id == destination_account_id)
+    return transactions_query, transaction_entity
 
-    return paginate(session, transactions_query)
+
+async def transactions_get(
+    session: AsyncSessionDep,
+    source_account_id: Optional[str],
+    destination_account_id: Optional[str],
+    involved_account_id: Optional[str]
+) -> Page[Transaction]:
+    transactions_query, transaction_entity = _get_transactions_query(
+        source_account_id, destination_account_id, involved_account_id)
+    transactions_query = transactions_query.order_by(
+        transaction_entity.created_at.desc(),
+        transaction_entity.id.desc())
+
+    return await paginate(
+        session, transactions_query,
+        keyset=(transaction_entity.created_at, transaction_entity.id),
+        descending=True,
+        default_total_mode=TotalMode(
+            settings.PAGINATION_LARGE_TABLE_TOTAL_MODE))
+
+
+TRANSACTIONS_CSV_COLUMNS = [
+    field.serialization_alias or name
+    for name, field in Transaction.model_fields.items()]
+
+
+def _get_transactions_csv_rows(
+    transactions: Sequence[Transaction]
+) -> str:
+    rows = io.StringIO()
+    writer = csv.DictWriter(rows, fieldnames=TRANSACTIONS_CSV_COLUMNS)
+    for transaction in transactions:
+        writer.writerow(transaction.model_dump(mode="json", by_alias=True))
+    return rows.getvalue()
+
+
+async def transactions_export(
+    export_format: ExportFormat,
+    source_account_id: Optional[str],
+    destination_account_id: Optional[str],
+    involved_account_id: Optional[str],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime]
+) -> AsyncIterator[str]:
+    # Validated before the stream starts: errors raised while streaming
+    # come after the 200 and would only truncate the body
+    created_from = _to_naive_utc(created_from) if created_from else None
+    created_to = _to_naive_utc(created_to) if created_to else None
+    if created_from and created_to and created_from >= created_to:
+        raise InvalidDateRangeError()
+
+    transactions_query, transaction_entity = _get_transactions_query(
+        source_account_id, destination_account_id, involved_account_id)
+    if created_from:
+        transactions_query = transactions_query \
+            .where(transaction_entity.created_at >= created_from)
+    if created_to:
+        transactions_query = transactions_query \
+            .where(transaction_entity.created_at < created_to)
+    transactions_query = transactions_query \
+        .order_by(transaction_entity.created_at, transaction_entity.id) \
+        .execution_options(yield_per=settings.TRANSACTIONS_EXPORT_YIELD_PER)
+    return _stream_transactions_export(export_format, transactions_query)
+
+
+async def _stream_transactions_export(
+    export_format: ExportFormat,
+    transactions_query: Select
+) -> AsyncIterator[str]:
+    if export_format is ExportFormat.CSV:
+        header = io.StringIO()
+        csv.writer(header).writerow(TRANSACTIONS_CSV_COLUMNS)
+        yield header.getvalue()
+
+    # The response outlives request-scoped dependencies, so the stream
+    # owns its session; rows are fetched yield_per at a time from a
+    # server-side cursor and never accumulated
+    async with AsyncSession(async_engine) as session:
+        transactions = await session.stream_scalars(transactions_query)
+        async for partition in transactions.partitions():
+            if export_format is ExportFormat.CSV:
+                yield _get_transactions_csv_rows(partition)
+            else:
+                yield "".join(
+                    transaction.model_dump_json(by_alias=True) + "\n"
+                    for transaction in partition)
 
 
 async def transactions_id_get(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Transaction:
     return await _get_transaction_from_db(id, session)
 
 
-async def transactions_post(
+async def _add_transaction(
     transactions_post: TransactionsPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Transaction:
+    # Stages the transaction and its postings without committing, so that
+    # callers can make it part of a larger unit of work
     transaction = Transaction(
         **transactions_post.dict(by_alias=True))
 
-    updated_bank_accounts: List[BankAccount] = await _get_bank_accounts_with_updated_balance_by_transaction(
+    ledger_entries = await _post_transaction_to_ledger(
         transaction, session)
 
     session.add(transaction)
-    for updated_bank_account in updated_bank_accounts:
-        session.add(updated_bank_account)
-    session.commit()
-    session.refresh(transaction)
-    for updated_bank_account in updated_bank_accounts:
-        session.refresh(updated_bank_account)
-
+    session.add_all(ledger_entries)
+    await _update_statement_rollups(ledger_entries, session)
     return transaction
+
+
+async def transactions_post(
+    transactions_post: TransactionsPost,
+    session: AsyncSessionDep
+) -> Transaction:
+    # Committed by the caller, together with the request's idempotency key
+    return await _add_transaction(transactions_post, session)
+
+
+def _validate_transactions_post(raw_transactions_post: Any) -> TransactionsPost:
+    # NDJSON lines arrive undecoded and are parsed and validated in one pass
+    if isinstance(raw_transactions_post, bytes):
+        return TransactionsPost.model_validate_json(raw_transactions_post)
+    return TransactionsPost.model_validate(raw_transactions_post)
+
+
+async def _add_transactions_chunk(
+    transactions_posts: List[Tuple[int, TransactionsPost]],
+    session: AsyncSessionDep
+) -> List[TransactionsBatchItemResult]:
+    # One locking query for every account touched by the chunk; items are
+    # then applied in order against the locked rows, so each account gets
+    # a single UPDATE with its net balance at flush time next to the
+    # inserted ledger entries
+    bank_accounts = await _lock_bank_accounts(
+        [account_id
+         for _, transactions_post in transactions_posts
+         for account_id in _get_transaction_account_ids(transactions_post)],
+        session)
+
+    results = []
+    transactions = []
+    ledger_entries = []
+    for index, transactions_post in transactions_posts:
+        transaction = Transaction(
+            **transactions_post.dict(by_alias=True))
+        try:
+            ledger_entries.extend(_apply_transaction_to_bank_accounts(
+                transaction, bank_accounts))
+        except GenericException as e:
+            results.append(TransactionsBatchItemResult(
+                index=index,
+                status=TransactionsBatchItemStatus.REJECTED,
+                message=e.message))
+            continue
+        transactions.append(transaction)
+        results.append(TransactionsBatchItemResult(
+            index=index,
+            status=TransactionsBatchItemStatus.CREATED,
+            id=transaction.id))
+
+    session.add_all(transactions)
+    session.add_all(ledger_entries)
+    await _update_statement_rollups(ledger_entries, session)
+    return results
+
+
+async def _post_transactions_chunk(
+    transactions_posts: List[Tuple[int, TransactionsPost]],
+    session: AsyncSessionDep
+) -> List[TransactionsBatchItemResult]:
+    try:
+        results = await _add_transactions_chunk(transactions_posts, session)
+        await session.commit()
+        return results
+    except SQLAlchemyError:
+        # Deadlocks, timeouts, overflows...: only this chunk is lost, the
+        # ones before it are committed and must still be reported
+        _log.exception(
+            f"Batch chunk of {len(transactions_posts)} transactions failed")
+        await session.rollback()
+    message = BatchChunkNotCommittedError().message
+    return [
+        TransactionsBatchItemResult(
+            index=index,
+            status=TransactionsBatchItemStatus.REJECTED,
+            message=message)
+        for index, _ in transactions_posts]
+
+
+async def transactions_batch_post(
+    raw_transactions_posts: AsyncIterable[Any],
+    session: AsyncSessionDep,
+    chunk_size: Optional[int] = None
+) -> TransactionsBatchResponse:
+    chunk_size = chunk_size or settings.TRANSACTIONS_BATCH_CHUNK_SIZE
+
+    results: List[TransactionsBatchItemResult] = []
+    chunk: List[Tuple[int, TransactionsPost]] = []
+    index = 0
+    async for raw_transactions_post in raw_transactions_posts:
+        try:
+            chunk.append((
+                index, _validate_transactions_post(raw_transactions_post)))
+        except ValidationError as e:
+            results.append(TransactionsBatchItemResult(
+                index=index,
+                status=TransactionsBatchItemStatus.REJECTED,
+                message="; ".join(
+                    error["msg"] for error in e.errors())))
+        index += 1
+
+        if len(chunk) >= chunk_size:
+            results.extend(await _post_transactions_chunk(chunk, session))
+            chunk = []
+    if chunk:
+        results.extend(await _post_transactions_chunk(chunk, session))
+
+    results.sort(key=lambda result: result.index)
+    created = sum(
+        1 for result in results
+        if result.status is TransactionsBatchItemStatus.CREATED)
+    return TransactionsBatchResponse(
+        created=created,
+        rejected=len(results) - created,
+        results=results)
@@ -1,20 +1,20 @@
 import logging
 
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlmodel import select
 
 from app.api.common.errors import ResourceNotFoundError
-from app.db import SessionDep
+from app.api.common.schemas.pagination import Page
+from app.db import AsyncSessionDep
 from app.db.models import (
     BankAccount, BankAccountsPost, UserProfile)
+from app.db.pagination import paginate
 
 _log = logging.getLogger(__name__)
 
 async def _get_user_profile_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> UserProfile:
-    user_profile = session.get(UserProfile, id)
+    user_profile = await session.get(UserProfile, id)
     if not user_profile:
         raise ResourceNotFoundError(
             resource_id=id)
@@ -23,17 +23,19 @@ async def _get_user_profile_from_db(
 
 async def user_profiles_id_bank_accounts_get(
     user_profile_id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Page[BankAccount]:
     user_bank_accounts_query = select(BankAccount) \
         .where(BankAccount.user_profile_id == user_profile_id)
-    return paginate(session, user_bank_accounts_query)
+    return await paginate(
+        session, user_bank_accounts_query,
+        keyset=(BankAccount.id,))
 
 
 async def user_profiles_id_bank_accounts_post(
     user_profile_id: str,
     bank_accounts_post: BankAccountsPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> BankAccount:
     _ = await _get_user_profile_from_db(user_profile_id, session)
     bank_account = BankAccount(
@@ -41,6 +43,5 @@ async def user_profiles_id_bank_accounts_post(
         userProfileId=user_profile_id
     )
     session.add(bank_account)
-    session.commit()
-    session.refresh(bank_account)
+    await session.commit()
     return bank_account
@@ -1,25 +1,29 @@
 import logging
+from typing import Optional
 
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlmodel import select
 from sqlalchemy.exc import IntegrityError
 
+from app.api.common.conditional import check_if_match
 from app.api.common.errors import (
     ResourceNotFoundError, DuplicateKeyError)
-from app.db import SessionDep
+from app.api.common.schemas.pagination import Page, TotalMode
+from app.core.cache import principal_cache
+from app.core.config import settings
+from app.db import AsyncSessionDep
 from app.db.models import (
     CredentialsPut, User, UserProfile,
     UserProfilesPost, UserProfileWithUserData)
-from app.utils.secrets import get_password_hash
+from app.db.pagination import paginate
+from app.utils.secrets import async_get_password_hash
 
 _log = logging.getLogger(__name__)
 
 
 async def _get_user_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> User:
-    user = session.get(User, id)
+    user = await session.get(User, id)
     if not user:
         raise ResourceNotFoundError(
             resource_id=id)
@@ -27,23 +31,27 @@ async def _get_user_from_db(
 
 
 async def _get_user_profile_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> UserProfile:
-    user_profile = session.get(UserProfile, id)
+    user_profile = await session.get(UserProfile, id)
     if not user_profile:
         raise ResourceNotFoundError(
             resource_id=id)
     return user_profile
 
 
+async def _invalidate_cached_principal(user_profile_id: str) -> None:
+    await principal_cache.delete_prefix(f"{user_profile_id}:")
+
+
 async def _get_full_user_profile_from_db(
-    id: str, session: SessionDep
+    id: str, session: AsyncSessionDep
 ) -> UserProfileWithUserData:
     user_profile_query = select(UserProfile, User) \
         .where(UserProfile.id == id) \
         .join(User, User.id == UserProfile.user_id)
-    user_profile_with_user = session.exec(
-        user_profile_query).first()
+    user_profile_with_user = (await session.exec(
+        user_profile_query)).first()
     if not user_profile_with_user:
         raise ResourceNotFoundError(
             resource_id=id)
@@ -61,32 +69,39 @@ async def _get_full_user_profile_from_db(
             birth_date=user.birth_date,
             birth_country=user.birth_country,
             birth_state=user.birth_state,
-            birth_city=user.birth_city
+            birth_city=user.birth_city,
+            version=user_profile.version
         )
     )
 
 
 async def user_profiles_get(
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> Page[UserProfile]:
-    return paginate(session, select(UserProfile))
+    return await paginate(
+        session, select(UserProfile),
+        keyset=(UserProfile.id,),
+        default_total_mode=TotalMode(
+            settings.PAGINATION_LARGE_TABLE_TOTAL_MODE))
 
 
 async def user_profiles_id_delete(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> None:
     user_profile = await _get_user_profile_from_db(id, session)
     user = await _get_user_from_db(user_profile.user_id, session)
-    session.delete(user_profile)
-    session.delete(user)
-    session.commit()
+    await session.delete(user_profile)
+    await session.delete(user)
+    user_profile_id = user_profile.id
+    await session.commit()
+    await _invalidate_cached_principal(user_profile_id)
     return None
 
 
 async def user_profiles_id_get(
     id: str,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> UserProfileWithUserData:
     user_profile = await _get_full_user_profile_from_db(id, session)
     return user_profile
@@ -95,15 +110,17 @@ async def user_profiles_id_get(
 async def user_profiles_id_put(
     id: str,
     user_profile_put: CredentialsPut,
-    session: SessionDep
+    session: AsyncSessionDep,
+    if_match: Optional[str] = None
 ) -> UserProfileWithUserData:
     user_profile = await _get_user_profile_from_db(id, session)
+    check_if_match(if_match, user_profile)
     updated_user_profile = user_profile_put.model_dump(
         exclude_unset=True)
     user_profile.sqlmodel_update(updated_user_profile)
     session.add(user_profile)
-    session.commit()
-    session.refresh(user_profile)
+    await session.commit()
+    await _invalidate_cached_principal(user_profile.id)
     full_user_profile = await _get_full_user_profile_from_db(
         id, session)
     return full_user_profile
@@ -111,11 +128,11 @@ async def user_profiles_id_put(
 
 async def user_profiles_post(
     user_profiles_post: UserProfilesPost,
-    session: SessionDep
+    session: AsyncSessionDep
 ) -> UserProfile:
     def _create_user(
         user_profiles_post: UserProfilesPost,
-        session: SessionDep
+        session: AsyncSessionDep
     ) -> User:
         user = User(**user_profiles_post.dict(by_alias=True))
 
@@ -128,15 +145,13 @@ async def user_profiles_post(
     user_profile = UserProfile.model_validate(
         dict(
             email=user_profiles_post.email,
-            password=get_password_hash(
+            password=await async_get_password_hash(
                 user_profiles_post.password),
             user_id=user.id))
     try:
         session.add(user_profile)
-        session.commit()
-        session.refresh(user)
-        session.refresh(user_profile)
+        await session.commit()
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise DuplicateKeyError()
     return user_profile
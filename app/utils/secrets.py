@@ -1,7 +1,29 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 from passlib.context import CryptContext
 
+from app.core.config import settings
+from app.core.metrics import Histogram
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a thread pool is enough to keep hashing off
+# the event loop while capping how many hashes run at the same time. It is
+# created on first use, so that the app can start again after a shutdown
+_password_hashing_executor: Optional[ThreadPoolExecutor] = None
+
+password_hashing_queue_seconds = Histogram(
+    "password_hashing_queue_seconds",
+    "Time a password hashing job waits for a free worker",
+    labelnames=("operation",))
+password_hashing_duration_seconds = Histogram(
+    "password_hashing_duration_seconds",
+    "Time spent hashing or verifying a password",
+    labelnames=("operation",))
+
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -9,3 +31,47 @@ def verify_password(plain_password, hashed_password):
 
 def get_password_hash(password):
     return pwd_context.hash(password)
+
+
+def _get_password_hashing_executor() -> ThreadPoolExecutor:
+    global _password_hashing_executor
+    if _password_hashing_executor is None:
+        _password_hashing_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASHING_WORKERS,
+            thread_name_prefix="password-hashing")
+    return _password_hashing_executor
+
+
+async def _run_in_password_hashing_pool(operation: str, function, *args):
+    queued_at = time.perf_counter()
+
+    def _timed_function():
+        started_at = time.perf_counter()
+        password_hashing_queue_seconds.observe(
+            started_at - queued_at, operation=operation)
+        try:
+            return function(*args)
+        finally:
+            password_hashing_duration_seconds.observe(
+                time.perf_counter() - started_at, operation=operation)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_password_hashing_executor(), _timed_function)
+
+
+async def async_verify_password(plain_password, hashed_password):
+    return await _run_in_password_hashing_pool(
+        "verify", verify_password, plain_password, hashed_password)
+
+
+async def async_get_password_hash(password):
+    return await _run_in_password_hashing_pool(
+        "hash", get_password_hash, password)
+
+
+def shutdown_password_hashing_pool():
+    global _password_hashing_executor
+    if _password_hashing_executor is not None:
+        _password_hashing_executor.shutdown(wait=False, cancel_futures=True)
+        _password_hashing_executor = None
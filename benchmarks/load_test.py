@@ -0,0 +1,336 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.main import app
+from app.db import async_engine
+from app.db.models import BankAccount, UserProfile
+from app.db.queries import start_query_statistics, stop_query_statistics
+
+# Drives a mix of scenarios against the app, run in process against the
+# configured database (bootstrap.py or generate_data.py data), and stores
+# the results so that later runs can be compared with them:
+#
+#   python -m benchmarks.load_test --concurrency 20 --duration 30
+#   python -m benchmarks.load_test --compare benchmarks/results/<run>.json
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+DEFAULT_MIX = dict(
+    login=1,
+    list_transactions=4,
+    post_transfer=3,
+    open_investment=1,
+    catalog_reads=4)
+
+CATALOG_PATHS = [
+    "/banks", "/loanProducts", "/investmentProducts",
+    "/insurancePolicyProducts"]
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    bank_account_id: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Context:
+    client: httpx.AsyncClient
+    password: str
+    users: List[VirtualUser]
+    investment_product_ids: List[str]
+    rng: random.Random
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status_code: int
+    latency_ms: float
+    queries: int
+    round_trips: int
+
+
+# Each scenario sends one request and returns the endpoint it hit, named
+# after its route template
+Scenario = Callable[
+    [Context, VirtualUser], Awaitable[Tuple[str, httpx.Response]]]
+
+
+async def _login(context: Context, user: VirtualUser):
+    return "POST /auth/login", await context.client.post(
+        "/auth/login", json=dict(email=user.email, password=context.password))
+
+
+async def _list_transactions(context: Context, user: VirtualUser):
+    return "GET /transactions", await context.client.get(
+        "/transactions", headers=user.headers,
+        params=dict(involvedAccountId=user.bank_account_id, size=20))
+
+
+async def _post_transfer(context: Context, user: VirtualUser):
+    destination = context.rng.choice(context.users)
+    while destination is user and len(context.users) > 1:
+        destination = context.rng.choice(context.users)
+    return "POST /transactions", await context.client.post(
+        "/transactions", headers=user.headers,
+        json=dict(amount=1, description="Load test", type="Transfer",
+                  sourceAccountId=user.bank_account_id,
+                  destinationAccountId=destination.bank_account_id))
+
+
+async def _open_investment(context: Context, user: VirtualUser):
+    return "POST /investments", await context.client.post(
+        "/investments", headers=user.headers,
+        json=dict(amount=1, endDate="2030-01-01",
+                  investmentProductId=context.rng.choice(
+                      context.investment_product_ids),
+                  bankAccountId=user.bank_account_id))
+
+
+async def _catalog_reads(context: Context, user: VirtualUser):
+    path = context.rng.choice(CATALOG_PATHS)
+    return f"GET {path}", await context.client.get(path)
+
+
+SCENARIOS: Dict[str, Scenario] = dict(
+    login=_login,
+    list_transactions=_list_transactions,
+    post_transfer=_post_transfer,
+    open_investment=_open_investment,
+    catalog_reads=_catalog_reads)
+
+
+def _parse_mix(mix: Optional[str]) -> Dict[str, int]:
+    # "login=1,post_transfer=3": scenarios left out keep their weight
+    weights = dict(DEFAULT_MIX)
+    for item in filter(None, (mix or "").split(",")):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(
+                f"Unknown scenario {name}, expected one of {', '.join(SCENARIOS)}")
+        weights[name] = int(weight)
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+async def _get_virtual_users(
+    client: httpx.AsyncClient,
+    users: int,
+    password: str
+) -> List[VirtualUser]:
+    async with AsyncSession(async_engine) as session:
+        rows = (await session.exec(
+            select(UserProfile.email, BankAccount.id)
+            .join(BankAccount, BankAccount.user_profile_id == UserProfile.id)
+            .distinct(UserProfile.email)
+            .order_by(UserProfile.email)
+            .limit(users))).all()
+    if not rows:
+        raise SystemExit("No user with a bank account, seed the database first")
+
+    virtual_users = [
+        VirtualUser(email=email, bank_account_id=str(bank_account_id))
+        for email, bank_account_id in rows]
+
+    async def _authenticate(user: VirtualUser) -> None:
+        response = await client.post(
+            "/auth/login", json=dict(email=user.email, password=password))
+        response.raise_for_status()
+        user.headers = dict(
+            Authorization=f"Bearer {response.json()['access_token']}")
+
+    await asyncio.gather(*map(_authenticate, virtual_users))
+    return virtual_users
+
+
+async def _run_worker(
+    context: Context,
+    weights: Dict[str, int],
+    warmup_ends_at: float,
+    ends_at: float,
+    samples: List[Sample]
+) -> None:
+    names, name_weights = list(weights), list(weights.values())
+    while time.perf_counter() < ends_at:
+        scenario = SCENARIOS[context.rng.choices(names, name_weights)[0]]
+        user = context.rng.choice(context.users)
+        query_statistics, token = start_query_statistics()
+        try:
+            started_at = time.perf_counter()
+            endpoint, response = await scenario(context, user)
+            latency_ms = (time.perf_counter() - started_at) * 1000
+        finally:
+            stop_query_statistics(token)
+        if started_at >= warmup_ends_at:
+            samples.append(Sample(
+                endpoint, response.status_code, latency_ms,
+                query_statistics.count, query_statistics.round_trips))
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    # Nearest rank
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1,
+                       int(round(percentile / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _summarize(samples: List[Sample], duration: float) -> dict:
+    latencies = [sample.latency_ms for sample in samples]
+    return dict(
+        requests=len(samples),
+        errors=sum(sample.status_code >= 400 for sample in samples),
+        statusCodes={
+            str(status_code): count for status_code, count in sorted(
+                Counter(sample.status_code for sample in samples).items())},
+        throughput=len(samples) / duration,
+        p50=_percentile(latencies, 50),
+        p95=_percentile(latencies, 95),
+        p99=_percentile(latencies, 99),
+        queries=statistics.mean(sample.queries for sample in samples),
+        roundTrips=statistics.mean(sample.round_trips for sample in samples))
+
+
+def _get_git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_results(results: dict) -> None:
+    print(f"{'Endpoint':<32} {'Requests':>8} {'Errors':>6} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Queries':>7}")
+    rows = list(results["endpoints"].items()) + [("Total", results["total"])]
+    for endpoint, summary in rows:
+        print(f"{endpoint:<32} {summary['requests']:>8} {summary['errors']:>6} "
+              f"{summary['throughput']:>8.1f} {summary['p50']:>8.2f} "
+              f"{summary['p95']:>8.2f} {summary['p99']:>8.2f} "
+              f"{summary['queries']:>7.1f}")
+
+
+def _compare_results(results: dict, baseline: dict, tolerance: float) -> bool:
+    # Latency and throughput are compared with some tolerance, query
+    # counts exactly; returns whether anything regressed
+    print(f"\nCompared with {baseline.get('gitCommit')} "
+          f"({baseline.get('startedAt')}):")
+    regressed = False
+    for endpoint, summary in results["endpoints"].items():
+        baseline_summary = baseline["endpoints"].get(endpoint)
+        if baseline_summary is None:
+            continue
+        regressions = []
+        if summary["p95"] > baseline_summary["p95"] * (1 + tolerance):
+            regressions.append("p95")
+        if summary["throughput"] < baseline_summary["throughput"] * (1 - tolerance):
+            regressions.append("throughput")
+        if summary["queries"] > baseline_summary["queries"]:
+            regressions.append("queries")
+        regressed = regressed or bool(regressions)
+        print(f"{endpoint:<32} "
+              f"p95 {baseline_summary['p95']:.2f} -> {summary['p95']:.2f} ms, "
+              f"{baseline_summary['throughput']:.1f} -> {summary['throughput']:.1f} req/s, "
+              f"queries {baseline_summary['queries']:.1f} -> {summary['queries']:.1f}"
+              + (f"  REGRESSED ({', '.join(regressions)})" if regressions else ""))
+    return regressed
+
+
+async def main(arguments: argparse.Namespace) -> bool:
+    weights = _parse_mix(arguments.mix)
+    rng = random.Random(arguments.seed)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark/api/v1",
+            timeout=None) as client:
+        users = await _get_virtual_users(
+            client, arguments.users, arguments.password)
+        investment_product_ids = [
+            investment_product["id"] for investment_product in
+            (await client.get("/investmentProducts")).json()["items"]]
+        context = Context(
+            client, arguments.password, users, investment_product_ids, rng)
+
+        samples: List[Sample] = []
+        started_at = time.perf_counter()
+        warmup_ends_at = started_at + arguments.warmup
+        ends_at = warmup_ends_at + arguments.duration
+        await asyncio.gather(*(
+            _run_worker(context, weights, warmup_ends_at, ends_at, samples)
+            for _ in range(arguments.concurrency)))
+        duration = time.perf_counter() - warmup_ends_at
+
+    samples_by_endpoint: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        samples_by_endpoint.setdefault(sample.endpoint, []).append(sample)
+    results = dict(
+        startedAt=datetime.utcnow().isoformat(),
+        gitCommit=_get_git_commit(),
+        config=dict(
+            concurrency=arguments.concurrency, duration=arguments.duration,
+            warmup=arguments.warmup, users=len(users), mix=weights,
+            seed=arguments.seed),
+        endpoints={
+            endpoint: _summarize(endpoint_samples, duration)
+            for endpoint, endpoint_samples in sorted(samples_by_endpoint.items())},
+        total=_summarize(samples, duration))
+    _print_results(results)
+
+    output = arguments.output or os.path.join(
+        RESULTS_DIR, "load_test-{}.json".format(
+            datetime.utcnow().strftime("%Y%m%dT%H%M%S")))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+    print(f"\nResults stored in {output}")
+
+    if arguments.compare:
+        with open(arguments.compare) as baseline_file:
+            return _compare_results(
+                results, json.load(baseline_file), arguments.tolerance)
+    return False
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser(
+        description="Load test the API with a mix of scenarios")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--duration", type=float, default=30,
+        help="Seconds measured, after the warmup")
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument(
+        "--users", type=int, default=20,
+        help="Users (with a bank account) the requests are spread over")
+    parser.add_argument("--password", default="password")
+    parser.add_argument(
+        "--mix",
+        help="Scenario weights, e.g. login=0,post_transfer=5; "
+             f"defaults to {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())}")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="Where to store the results")
+    parser.add_argument(
+        "--compare", help="Results of a previous run to compare with")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1,
+        help="Allowed p95 and throughput change before flagging a regression")
+    sys.exit(1 if asyncio.run(main(parser.parse_args())) else 0)
@@ -0,0 +1,138 @@
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable, List, Tuple
+
+import httpx
+
+from app.main import app
+from app.db.queries import start_query_statistics, stop_query_statistics
+
+# Counts the database round trips of each write endpoint, run in process
+# against the configured database (bootstrap.py data):
+#
+#   python -m benchmarks.round_trips [--runs 20]
+
+Request = Callable[[], Awaitable[httpx.Response]]
+
+
+async def _get_requests(
+    client: httpx.AsyncClient,
+    email: str,
+    password: str
+) -> List[Tuple[str, Request]]:
+    async def _get(url: str, **kwargs) -> dict:
+        response = await client.get(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    login = dict(email=email, password=password)
+    response = await client.post("/auth/login", json=login)
+    response.raise_for_status()
+    headers = dict(Authorization=f"Bearer {response.json()['access_token']}")
+
+    bank_accounts = (await _get("/bankAccounts", headers=headers))["items"]
+    source_account_id = bank_accounts[0]["id"]
+    destination_account_id = bank_accounts[1]["id"]
+    # Funds every debit of the runs below
+    response = await client.post(
+        "/transactions", headers=headers,
+        json=dict(amount=1_000_000, description="Benchmark", type="Deposit",
+                  destinationAccountId=source_account_id))
+    response.raise_for_status()
+    bank = (await _get("/banks"))["items"][0]
+    loan_product_id = (await _get("/loanProducts"))["items"][0]["id"]
+    investment_product_id = \
+        (await _get("/investmentProducts"))["items"][0]["id"]
+    insurance_policy_product_id = \
+        (await _get("/insurancePolicyProducts"))["items"][0]["id"]
+    user_profile_id = (await _get(
+        "/userProfiles", headers=headers))["items"][0]["id"]
+
+    def _user_profile() -> dict:
+        suffix = uuid.uuid4().hex[:12]
+        return dict(
+            email=f"benchmark.{suffix}@mail.com", password="password",
+            name="Benchmark", surname="User",
+            taxIdentificationNumber=suffix.upper().ljust(16, "X"))
+
+    return [
+        ("POST /auth/login", lambda: client.post(
+            "/auth/login", json=login)),
+        ("POST /banks", lambda: client.post(
+            "/banks", headers=headers,
+            json=dict(name="Benchmark Bank", address="Via Roma, 1",
+                      phone="+390812345678"))),
+        ("PUT /banks/{id}", lambda: client.put(
+            f"/banks/{bank['id']}", headers=headers,
+            json=dict(name=bank["name"]))),
+        ("PUT /bankAccounts/{id}", lambda: client.put(
+            f"/bankAccounts/{source_account_id}", headers=headers,
+            json=dict(bankId=bank["id"]))),
+        ("POST /transactions", lambda: client.post(
+            "/transactions", headers=headers,
+            json=dict(amount=1, description="Benchmark", type="Transfer",
+                      sourceAccountId=source_account_id,
+                      destinationAccountId=destination_account_id, fee=0.1))),
+        ("POST /loans", lambda: client.post(
+            "/loans", headers=headers,
+            json=dict(amount=10, endDate="2030-01-01",
+                      loanProductId=loan_product_id,
+                      bankAccountId=source_account_id))),
+        ("POST /investments", lambda: client.post(
+            "/investments", headers=headers,
+            json=dict(amount=1, endDate="2030-01-01",
+                      investmentProductId=investment_product_id,
+                      bankAccountId=source_account_id))),
+        ("POST /insurancePolicies", lambda: client.post(
+            "/insurancePolicies", headers=headers,
+            json=dict(endDate="2030-01-01",
+                      insurancePolicyProductId=insurance_policy_product_id,
+                      bankAccountId=source_account_id))),
+        ("POST /userProfiles", lambda: client.post(
+            "/userProfiles", headers=headers, json=_user_profile())),
+        ("POST /userProfiles/{id}/bankAccounts", lambda: client.post(
+            f"/userProfiles/{user_profile_id}/bankAccounts", headers=headers,
+            json=dict(bankId=bank["id"], currency="EUR"))),
+    ]
+
+
+async def _measure(request: Request, runs: int) -> Tuple[float, float]:
+    # The first run warms up caches and prepared statements
+    (await request()).raise_for_status()
+    round_trips, latencies = [], []
+    for _ in range(runs):
+        query_statistics, token = start_query_statistics()
+        try:
+            started_at = time.perf_counter()
+            (await request()).raise_for_status()
+            latencies.append((time.perf_counter() - started_at) * 1000)
+        finally:
+            stop_query_statistics(token)
+        round_trips.append(query_statistics.round_trips)
+    return statistics.mean(round_trips), statistics.median(latencies)
+
+
+async def main(email: str, password: str, runs: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark/api/v1") as client:
+        requests = await _get_requests(client, email, password)
+        print(f"{'Endpoint':<40} {'Round trips':>11} {'p50 ms':>8}")
+        for name, request in requests:
+            round_trips, latency = await _measure(request, runs)
+            print(f"{name:<40} {round_trips:>11.1f} {latency:>8.2f}")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    parser = argparse.ArgumentParser(
+        description="Database round trips per write endpoint")
+    parser.add_argument("--email", default="c.leclerc@mail.com")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--runs", type=int, default=20)
+    arguments = parser.parse_args()
+    asyncio.run(main(arguments.email, arguments.password, arguments.runs))
@@ -1,6 +1,8 @@
+import asyncio
 import logging
 import random
 
+from sqlalchemy import exists
 from sqlmodel import select, Session
 
 from app.db import create_db_and_tables, engine
@@ -11,6 +13,7 @@ from app.db.models import (
     LoanProduct, LoanProductType,
     Transaction, TransactionType,
     User, UserProfile)
+from app.services.ledger import _get_open_bank_account_ledgers_statement
 from app.utils.secrets import get_password_hash
 
 logging.basicConfig(
@@ -27,9 +30,14 @@ def get_session_sync():
     return Session(engine)
 
 
+def has_rows(session, model):
+    # EXISTS stops at the first row instead of loading the whole table
+    return session.exec(select(exists().select_from(model))).one()
+
+
 def bootstrap_banks():
     with get_session_sync() as session:
-        if session.exec(select(Bank)).all():
+        if has_rows(session, Bank):
             _log.debug('[-] Skipping banks bootstrap...')
             return
 
@@ -55,7 +63,7 @@ def bootstrap_banks():
 
 def bootstrap_users_and_profiles():
     with get_session_sync() as session:
-        if session.exec(select(User)).all():
+        if has_rows(session, User):
             _log.debug('[-] Skipping users bootstrap...')
             return
 
@@ -186,12 +194,14 @@ def bootstrap_users_and_profiles():
 
         session.add_all(users)
 
+        # Every user gets the same password, so it is hashed once
+        password_hash = get_password_hash("password")
         for user in users:
             user_email = '{}.{}@mail.com'.format(
                 user.name[0].lower(), user.surname.lower()
             ).replace(" ", "")
             user_profile = UserProfile(
-                email=user_email, password=get_password_hash("password"),
+                email=user_email, password=password_hash,
                 user_id=user.id)
             session.add(user_profile)
 
@@ -201,7 +211,7 @@ def bootstrap_users_and_profiles():
 
 def bootstrap_insurance_policy_products():
     with get_session_sync() as session:
-        if session.exec(select(InsurancePolicyProduct)).all():
+        if has_rows(session, InsurancePolicyProduct):
             _log.debug('[-] Skipping insurance_policy_products bootstrap...')
             return
 
@@ -277,7 +287,7 @@ def bootstrap_insurance_policy_products():
 
 def bootstrap_investment_products():
     with get_session_sync() as session:
-        if session.exec(select(InvestmentProduct)).all():
+        if has_rows(session, InvestmentProduct):
             _log.debug('[-] Skipping investment_products bootstrap...')
             return
 
@@ -343,7 +353,7 @@ def bootstrap_investment_products():
 
 def bootstrap_loan_products():
     with get_session_sync() as session:
-        if session.exec(select(LoanProduct)).all():
+        if has_rows(session, LoanProduct):
             _log.debug('[-] Skipping loan_products bootstrap...')
             return
 
@@ -409,7 +419,7 @@ def bootstrap_loan_products():
 
 def bootstrap_bank_accounts():
     with get_session_sync() as session:
-        if session.exec(select(BankAccount)).all():
+        if has_rows(session, BankAccount):
             _log.debug('[-] Skipping bank_accounts bootstrap...')
             return
 
@@ -431,6 +441,9 @@ def bootstrap_bank_accounts():
                 )
             )
         session.add_all(bank_accounts)
+        session.flush()
+        # Initial balances enter the ledger as opening postings
+        session.exec(_get_open_bank_account_ledgers_statement())
         session.commit()
         _log.debug('[+] bank_accounts bootstrap done!')
 
@@ -462,7 +475,7 @@ def bootstrap_transactions():
         session.add(transaction)
 
     with get_session_sync() as session:
-        if session.exec(select(Transaction)).all():
+        if has_rows(session, Transaction):
             _log.debug('[-] Skipping transactions bootstrap...')
             return
 
@@ -486,7 +499,7 @@ def bootstrap_transactions():
 
 
 if __name__ == "__main__":
-    create_db_and_tables()
+    asyncio.run(create_db_and_tables())
     bootstrap_banks()
     bootstrap_insurance_policy_products()
     bootstrap_investment_products()
@@ -0,0 +1,402 @@
+import argparse
+import asyncio
+import io
+import logging
+import random
+import string
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, List, Sequence, Tuple
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+import app.api  # noqa: F401 (loads the services in the API's import order)
+import bootstrap
+from app.db import create_db_and_tables, engine
+from app.db.models import (
+    Bank, BankAccount,
+    InsurancePolicyProduct, InsurancePolicyProductType,
+    InvestmentProduct, InvestmentProductType,
+    LedgerAccount, LedgerEntry, LedgerReferenceType,
+    LoanProduct, LoanProductType,
+    StatementRollup, Transaction, TransactionType,
+    User, UserProfile)
+from app.services.ledger import _get_open_bank_account_ledgers_statement
+from app.services.statement import (
+    STATEMENT_ROLLUP_COLUMNS, _get_statement_rollups_query)
+from app.utils.secrets import get_password_hash
+
+# Synthetic data for load testing, on top of the bootstrap catalog:
+#
+#   python generate_data.py --users 100000 --transactions 10000000
+#
+# Rows are streamed with COPY in chunks inside a single transaction, and
+# transactions go through the ledger like the API would post them, so
+# balances, ledger entries and statement rollups stay consistent.
+
+_log = logging.getLogger(__name__)
+
+NAMES = [
+    "Giovanni", "Maria", "Luca", "Giulia", "Marco", "Francesca", "Andrea",
+    "Chiara", "Matteo", "Sara", "Alessandro", "Martina", "Lorenzo", "Elena",
+    "Davide", "Federica", "Simone", "Valentina", "Stefano", "Alessia"]
+SURNAMES = [
+    "Rossi", "Russo", "Ferrari", "Esposito", "Bianchi", "Romano", "Colombo",
+    "Ricci", "Marino", "Greco", "Bruno", "Gallo", "Conti", "De Luca",
+    "Mancini", "Costa", "Giordano", "Rizzo", "Lombardi", "Moretti"]
+CITIES = [
+    ("RM", "Roma"), ("MI", "Milano"), ("NA", "Napoli"), ("TO", "Torino"),
+    ("PA", "Palermo"), ("GE", "Genova"), ("BO", "Bologna"), ("FI", "Firenze")]
+
+# Share of each transaction type; withdrawals and transfers the source
+# account can't afford become deposits
+TRANSACTION_TYPE_WEIGHTS = [
+    (TransactionType.TRANSFER, 60),
+    (TransactionType.WITHDRAW, 20),
+    (TransactionType.DEPOSIT, 20)]
+TRANSACTION_DESCRIPTIONS = {
+    TransactionType.DEPOSIT: "Deposito contanti",
+    TransactionType.WITHDRAW: "Prelievo contanti",
+    TransactionType.TRANSFER: "Bonifico"}
+
+NULL = "\\N"
+EPOCH = datetime(1970, 1, 1)
+
+
+def _get_uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _get_ordered_uuid(rng: random.Random, timestamp_ms: int) -> uuid.UUID:
+    # UUIDv7 layout: rows generated in time order land at the end of the
+    # primary key and reference indexes instead of on random pages
+    return uuid.UUID(int=(
+        timestamp_ms << 80 | 0x7 << 76 | rng.getrandbits(12) << 64
+        | 0b10 << 62 | rng.getrandbits(62)))
+
+
+def _get_code(rng: random.Random, length: int) -> str:
+    return "".join(rng.choices(string.ascii_uppercase + string.digits, k=length))
+
+
+def _format_cents(cents: int) -> str:
+    sign = "-" if cents < 0 else ""
+    return "{}{}.{:02d}".format(sign, abs(cents) // 100, abs(cents) % 100)
+
+
+def _get_fee_cents(amount_cents: int, fee_percentage: int) -> int:
+    # Rounded half to even, like to_money
+    fee_cents, remainder = divmod(amount_cents * fee_percentage, 100)
+    if remainder > 50 or (remainder == 50 and fee_cents % 2):
+        fee_cents += 1
+    return fee_cents
+
+
+def _copy_rows(
+    cursor,
+    model,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[str]]
+) -> None:
+    # COPY text format: values are generated, so they never contain tabs,
+    # newlines or backslashes
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(
+        'COPY "{}" ({}) FROM STDIN'.format(
+            model.__tablename__, ", ".join(columns)),
+        buffer)
+
+
+def _chunks(total: int, chunk_size: int) -> Iterable[Tuple[int, int]]:
+    for start in range(0, total, chunk_size):
+        yield start, min(start + chunk_size, total)
+
+
+def generate_products(connection, rng: random.Random, products: int) -> None:
+    # A handful of rows per catalog, so a plain multi-row INSERT is enough
+    if not products:
+        return
+    _log.debug(f'[i] Generating {products} products per catalog...')
+    connection.execute(insert(LoanProduct), [
+        dict(id=_get_uuid(rng), type=rng.choice(list(LoanProductType)),
+             name=f"Prestito {index + 1}", rate=rng.randint(100, 2000) / 100)
+        for index in range(products)])
+    connection.execute(insert(InvestmentProduct), [
+        dict(id=_get_uuid(rng), type=rng.choice(list(InvestmentProductType)),
+             name=f"Investimento {index + 1}",
+             rate=rng.randint(100, 1200) / 100)
+        for index in range(products)])
+    connection.execute(insert(InsurancePolicyProduct), [
+        dict(id=_get_uuid(rng),
+             type=rng.choice(list(InsurancePolicyProductType)),
+             name=f"Assicurazione {index + 1}",
+             annual_premium=rng.randint(5, 25) * 100,
+             coverage_cap=rng.randint(3, 25) * 100000)
+        for index in range(products)])
+
+
+def generate_users(
+    connection,
+    rng: random.Random,
+    users: int,
+    password: str,
+    chunk_size: int,
+    created_at: datetime
+) -> List[uuid.UUID]:
+    _log.debug(f'[i] Generating {users} users...')
+    # Every generated user gets the same password, so it is hashed once
+    password_hash = get_password_hash(password)
+    run_id = _get_code(rng, 6).lower()
+    cursor = connection.connection.cursor()
+    user_profile_ids = []
+    for start, end in _chunks(users, chunk_size):
+        user_rows, user_profile_rows = [], []
+        for index in range(start, end):
+            user_id = _get_uuid(rng)
+            user_profile_id = _get_uuid(rng)
+            name, surname = rng.choice(NAMES), rng.choice(SURNAMES)
+            state, city = rng.choice(CITIES)
+            birth_date = datetime(1950, 1, 1) + timedelta(
+                days=rng.randint(0, 365 * 55))
+            user_rows.append((
+                str(user_id), name, surname, _get_code(rng, 16),
+                birth_date.isoformat(), "ITA", state, city))
+            user_profile_rows.append((
+                str(user_profile_id),
+                f"{name[0]}.{surname}.{run_id}.{index}@mail.com".lower().replace(" ", ""),
+                password_hash, created_at.isoformat(), str(user_id)))
+            user_profile_ids.append(user_profile_id)
+        _copy_rows(cursor, User, [
+            "id", "name", "surname", "tax_identification_number",
+            "birth_date", "birth_country", "birth_state", "birth_city"
+        ], user_rows)
+        _copy_rows(cursor, UserProfile, [
+            "id", "email", "password", "created_at", "user_id"
+        ], user_profile_rows)
+        _log.debug(f'[i] {end}/{users} users')
+    return user_profile_ids
+
+
+def generate_bank_accounts(
+    connection,
+    rng: random.Random,
+    user_profile_ids: Sequence[uuid.UUID],
+    accounts_per_user: int,
+    opening_balance_cents: int,
+    chunk_size: int,
+    created_at: datetime
+) -> List[uuid.UUID]:
+    _log.debug(
+        f'[i] Generating {len(user_profile_ids) * accounts_per_user} bank accounts...')
+    bank_ids = connection.execute(select(Bank.id)).scalars().all()
+    cursor = connection.connection.cursor()
+    bank_account_ids = []
+    owners = [
+        user_profile_id
+        for user_profile_id in user_profile_ids
+        for _ in range(accounts_per_user)]
+    for start, end in _chunks(len(owners), chunk_size):
+        rows = []
+        for user_profile_id in owners[start:end]:
+            bank_account_id = _get_uuid(rng)
+            rows.append((
+                str(bank_account_id), str(rng.choice(bank_ids)), "EUR",
+                _get_code(rng, rng.randint(16, 34)), _get_code(rng, 10),
+                _format_cents(opening_balance_cents), created_at.isoformat(),
+                str(user_profile_id)))
+            bank_account_ids.append(bank_account_id)
+        _copy_rows(cursor, BankAccount, [
+            "id", "bank_id", "currency", "iban_code", "account_number",
+            "balance", "created_at", "user_profile_id"
+        ], rows)
+    # Opening balances enter the ledger as in bootstrap.py
+    connection.execute(_get_open_bank_account_ledgers_statement())
+    return bank_account_ids
+
+
+def generate_transactions(
+    connection,
+    rng: random.Random,
+    bank_account_ids: Sequence[uuid.UUID],
+    transactions: int,
+    opening_balance_cents: int,
+    chunk_size: int,
+    started_at: datetime,
+    ended_at: datetime
+) -> None:
+    # Balances are tracked in cents, so that each bank account leg gets its
+    # running balance and the accounts their final one
+    _log.debug(f'[i] Generating {transactions} transactions...')
+    cursor = connection.connection.cursor()
+    balances = [opening_balance_cents] * len(bank_account_ids)
+    account_ids = [str(bank_account_id) for bank_account_id in bank_account_ids]
+    step = (ended_at - started_at) / max(transactions, 1)
+    # A transfer needs a second account to go to
+    transaction_type_weights = [
+        (transaction_type, weight)
+        for transaction_type, weight in TRANSACTION_TYPE_WEIGHTS
+        if transaction_type is not TransactionType.TRANSFER
+        or len(account_ids) > 1]
+    transaction_types = [
+        transaction_type for transaction_type, _ in transaction_type_weights]
+    weights = [weight for _, weight in transaction_type_weights]
+    reference_type = LedgerReferenceType.TRANSACTION.name
+    bank_account, external, fees = (
+        LedgerAccount.BANK_ACCOUNT.name, LedgerAccount.EXTERNAL.name,
+        LedgerAccount.FEES.name)
+
+    for start, end in _chunks(transactions, chunk_size):
+        transaction_rows, ledger_entry_rows = [], []
+        transaction_types_chunk = rng.choices(
+            transaction_types, weights, k=end - start)
+        for index, transaction_type in zip(
+                range(start, end), transaction_types_chunk):
+            transaction_created_at = started_at + step * index
+            timestamp_ms = int(
+                (transaction_created_at - EPOCH) / timedelta(milliseconds=1))
+            transaction_id = str(_get_ordered_uuid(rng, timestamp_ms))
+            created_at = transaction_created_at.isoformat()
+            amount_cents = rng.randint(100, 20000)
+            fee_percentage = rng.randint(0, 5)
+            fee_cents = _get_fee_cents(amount_cents, fee_percentage)
+            source = rng.randrange(len(account_ids))
+            if transaction_type is not TransactionType.DEPOSIT \
+                    and balances[source] < amount_cents + fee_cents:
+                transaction_type = TransactionType.DEPOSIT
+
+            legs = []
+            if transaction_type is TransactionType.DEPOSIT:
+                fee_percentage, fee_cents = 0, 0
+                destination = source
+                source = None
+                legs = [
+                    (bank_account, destination, amount_cents),
+                    (external, None, -amount_cents)]
+            elif transaction_type is TransactionType.WITHDRAW:
+                destination = None
+                legs = [
+                    (bank_account, source, -amount_cents - fee_cents),
+                    (external, None, amount_cents),
+                    (fees, None, fee_cents)]
+            else:
+                destination = rng.randrange(len(account_ids) - 1)
+                if destination >= source:
+                    destination += 1
+                legs = [
+                    (bank_account, source, -amount_cents - fee_cents),
+                    (bank_account, destination, amount_cents),
+                    (fees, None, fee_cents)]
+
+            transaction_rows.append((
+                transaction_id, _format_cents(amount_cents),
+                TRANSACTION_DESCRIPTIONS[transaction_type],
+                transaction_type.name, "{}.00".format(fee_percentage),
+                account_ids[source] if source is not None else NULL,
+                account_ids[destination] if destination is not None else NULL,
+                created_at))
+            for account, account_index, cents in legs:
+                if not cents:
+                    continue
+                balance_after = NULL
+                if account_index is not None:
+                    balances[account_index] += cents
+                    balance_after = _format_cents(balances[account_index])
+                ledger_entry_rows.append((
+                    str(_get_ordered_uuid(rng, timestamp_ms)),
+                    reference_type, transaction_id,
+                    account,
+                    account_ids[account_index] if account_index is not None else NULL,
+                    _format_cents(cents), balance_after, created_at))
+
+        _copy_rows(cursor, Transaction, [
+            "id", "amount", "description", "type", "fee",
+            "source_account_id", "destination_account_id", "created_at"
+        ], transaction_rows)
+        _copy_rows(cursor, LedgerEntry, [
+            "id", "reference_type", "reference_id", "account",
+            "bank_account_id", "amount", "balance_after", "created_at"
+        ], ledger_entry_rows)
+        _log.debug(f'[i] {end}/{transactions} transactions')
+
+    # Final balances are loaded next to the accounts and applied in a
+    # single UPDATE
+    cursor.execute(
+        "CREATE TEMPORARY TABLE generated_balance "
+        "(id uuid PRIMARY KEY, balance numeric(18, 2)) ON COMMIT DROP")
+    buffer = io.StringIO("".join(
+        "{}\t{}\n".format(account_id, _format_cents(balance))
+        for account_id, balance in zip(account_ids, balances)))
+    cursor.copy_expert("COPY generated_balance (id, balance) FROM STDIN", buffer)
+    cursor.execute(
+        "UPDATE bank_account SET balance = generated_balance.balance "
+        "FROM generated_balance WHERE bank_account.id = generated_balance.id")
+
+
+def generate_statement_rollups(connection) -> None:
+    # Accounts that existed before keep their rollups
+    _log.debug('[i] Generating statement rollups...')
+    statement_rollups = StatementRollup.__table__
+    connection.execute(pg_insert(statement_rollups).from_select(
+        [statement_rollups.c[column] for column in STATEMENT_ROLLUP_COLUMNS],
+        _get_statement_rollups_query()
+    ).on_conflict_do_nothing())
+    connection.execute(text("ANALYZE"))
+
+
+def main(arguments: argparse.Namespace) -> None:
+    rng = random.Random(arguments.seed)
+    ended_at = datetime.utcnow()
+    started_at = ended_at - timedelta(days=arguments.days)
+    opening_balance_cents = arguments.opening_balance * 100
+
+    asyncio.run(create_db_and_tables())
+    bootstrap.bootstrap_banks()
+    bootstrap.bootstrap_insurance_policy_products()
+    bootstrap.bootstrap_investment_products()
+    bootstrap.bootstrap_loan_products()
+
+    generation_started_at = time.perf_counter()
+    with engine.begin() as connection:
+        generate_products(connection, rng, arguments.products)
+        user_profile_ids = generate_users(
+            connection, rng, arguments.users, arguments.password,
+            arguments.chunk_size, started_at)
+        bank_account_ids = generate_bank_accounts(
+            connection, rng, user_profile_ids, arguments.accounts_per_user,
+            opening_balance_cents, arguments.chunk_size, started_at)
+        if bank_account_ids and arguments.transactions:
+            generate_transactions(
+                connection, rng, bank_account_ids, arguments.transactions,
+                opening_balance_cents, arguments.chunk_size,
+                started_at, ended_at)
+        generate_statement_rollups(connection)
+    _log.debug(
+        f'[+] Data generation done in '
+        f'{time.perf_counter() - generation_started_at:.1f}s!')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic data for load testing")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--accounts-per-user", type=int, default=1)
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument(
+        "--products", type=int, default=0,
+        help="Products to add to each catalog")
+    parser.add_argument(
+        "--days", type=int, default=365,
+        help="Days of history the transactions are spread over")
+    parser.add_argument("--opening-balance", type=int, default=5000)
+    parser.add_argument("--password", default="password")
+    parser.add_argument(
+        "--seed", type=int, default=None,
+        help="Makes the data reproducible on an empty database")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    main(parser.parse_args())
@@ -0,0 +1,64 @@
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+import app.core.cache as cache_module
+from app.core.cache import Cache, ModelSerializer, RedisCacheBackend
+from app.db.models import Bank
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def redis_backend(monkeypatch):
+    backend = RedisCacheBackend(
+        fakeredis.aioredis.FakeRedis(), key_prefix="test:", channel="test")
+    monkeypatch.setattr(cache_module, "cache_backend", backend)
+    monkeypatch.setattr(cache_module, "_caches", {})
+    return backend
+
+
+def _create_bank(name: str) -> Bank:
+    return Bank.model_validate(
+        dict(name=name, address="Via Roma 1", phone="0612345678"))
+
+
+def _create_cache() -> Cache:
+    return Cache(
+        "bank", max_size=10, ttl_seconds=60,
+        serializer=ModelSerializer(Bank))
+
+
+@pytest.mark.anyio
+async def test_read_through_skips_write_invalidated_by_another_worker(
+    redis_backend
+):
+    # Two workers' caches over the same Redis: B's invalidation never
+    # reaches A's local generation
+    worker_a, worker_b = _create_cache(), _create_cache()
+
+    async def load_stale_bank() -> Bank:
+        bank = _create_bank("Old")
+        await worker_b.delete_prefix()
+        return bank
+
+    bank = await worker_a.read_through("id:1", load_stale_bank)
+
+    assert bank.name == "Old"
+    assert await worker_b.get("id:1") is None
+    assert await worker_a.get("id:1") is None
+
+
+@pytest.mark.anyio
+async def test_read_through_shares_loaded_value(redis_backend):
+    worker_a, worker_b = _create_cache(), _create_cache()
+
+    async def load_bank() -> Bank:
+        return _create_bank("New")
+
+    await worker_a.read_through("id:1", load_bank)
+
+    assert (await worker_b.get("id:1")).name == "New"
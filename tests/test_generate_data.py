@@ -0,0 +1,43 @@
+import random
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.db.models import TransactionType
+from generate_data import generate_transactions
+
+
+class _RecordingCursor:
+    # Collects the rows COPYed per table instead of loading them
+    def __init__(self):
+        self.rows = {}
+
+    def copy_expert(self, sql, buffer):
+        table = sql.split()[1].strip('"')
+        self.rows.setdefault(table, []).extend(
+            line.split("\t") for line in buffer.getvalue().splitlines())
+
+    def execute(self, sql):
+        pass
+
+
+def test_generate_transactions_with_one_account():
+    cursor = _RecordingCursor()
+    connection = SimpleNamespace(
+        connection=SimpleNamespace(cursor=lambda: cursor))
+    bank_account_id = uuid.uuid4()
+    ended_at = datetime.utcnow()
+
+    generate_transactions(
+        connection, random.Random(1), [bank_account_id], transactions=200,
+        opening_balance_cents=500000, chunk_size=50,
+        started_at=ended_at - timedelta(days=30), ended_at=ended_at)
+
+    transaction_types = {row[3] for row in cursor.rows["transaction"]}
+    assert len(cursor.rows["transaction"]) == 200
+    assert TransactionType.TRANSFER.name not in transaction_types
+    [(_, balance)] = cursor.rows["generated_balance"]
+    bank_account_entries = [
+        row for row in cursor.rows["ledger_entry"]
+        if row[4] == str(bank_account_id)]
+    assert balance == bank_account_entries[-1][6]
@@ -0,0 +1,27 @@
+from decimal import Decimal
+
+from pydantic import BaseModel
+
+from app.db.models.money import Money, Percentage
+
+
+class _Amounts(BaseModel):
+    amount: Money
+    rate: Percentage
+
+
+def test_large_amount_round_trips_through_json():
+    # Beyond 2**53 cents, where a binary float can't hold every cent
+    amounts = _Amounts(amount="9999999999999999.99", rate=0.1)
+
+    json = amounts.model_dump_json()
+
+    assert json == '{"amount":"9999999999999999.99","rate":"0.10"}'
+    assert _Amounts.model_validate_json(json).amount \
+        == Decimal("9999999999999999.99")
+
+
+def test_amounts_are_accepted_as_numbers():
+    amounts = _Amounts(amount=10.5, rate=3)
+
+    assert amounts.model_dump(mode="json") == dict(amount="10.50", rate="3.00")